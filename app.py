@@ -6,15 +6,19 @@ from multiprocessing import set_start_method
 import click
 from tblib import pickling_support
 
-from satellite import db
+from satellite import audit_logs, db
 from satellite import logging as satellite_logging
-from satellite.aliases.store import AliasStore
+from satellite.aliases import manager as alias_manager
+from satellite.aliases import transfer
+from satellite.aliases.broker import AliasBroker
+from satellite.aliases.broker_client import AliasBrokerError
 from satellite.config import (
     InvalidConfigError,
     SatelliteConfig,
     configure,
     init_satellite_dir,
 )
+from satellite.routes import table as route_table
 from satellite.routes.loaders import LoadError, load_from_yaml
 from satellite.web_application import WebApplication
 
@@ -24,7 +28,7 @@ DEFAULT_CONFIG = SatelliteConfig()
 
 # Do not put default values for non-flag options. Otherwise other config
 # sources (env and config file) will be ignored.
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option(
     '--debug',
     is_flag=True,
@@ -103,6 +107,18 @@ DEFAULT_CONFIG = SatelliteConfig()
         'TTL for volatile aliases in seconds.'
     ),
 )
+@click.option(
+    '--volatile-aliases-in-memory',
+    is_flag=True,
+    default=None,
+    envvar='SATELLITE_VOLATILE_ALIASES_IN_MEMORY',
+    help=(
+        '[env:SATELLITE_VOLATILE_ALIASES_IN_MEMORY] '
+        f'(default:{DEFAULT_CONFIG.volatile_aliases_in_memory}) Keep volatile '
+        'aliases in memory instead of the DB. Unless the alias broker is used '
+        'volatile aliases are not shared between the proxies.'
+    ),
+)
 @click.option(
     '--routes-path',
     type=click.Path(exists=True, dir_okay=False),
@@ -113,7 +129,107 @@ DEFAULT_CONFIG = SatelliteConfig()
         'DB will be deleted.'
     ),
 )
-def main(**kwargs):
+@click.option(
+    '--compile-route-expressions',
+    is_flag=True,
+    default=None,
+    envvar='SATELLITE_COMPILE_ROUTE_EXPRESSIONS',
+    help=(
+        '[env:SATELLITE_COMPILE_ROUTE_EXPRESSIONS] '
+        f'(default:{DEFAULT_CONFIG.compile_route_expressions}) '
+        'Compile route filter expressions into Python functions.'
+    ),
+)
+@click.option(
+    '--audit-logs-level',
+    type=click.Choice([level.value for level in audit_logs.AuditLogLevel]),
+    envvar='SATELLITE_AUDIT_LOGS_LEVEL',
+    help=(
+        '[env:SATELLITE_AUDIT_LOGS_LEVEL] '
+        f'(default:{DEFAULT_CONFIG.audit_logs_level}) Route matching audit logs '
+        'verbosity: all the records, matched routes and filters only, a single '
+        'summary record per flow phase or no audit logs at all.'
+    ),
+)
+@click.option(
+    '--audit-logs-sample-rate',
+    type=click.FloatRange(0, 1),
+    envvar='SATELLITE_AUDIT_LOGS_SAMPLE_RATE',
+    help=(
+        '[env:SATELLITE_AUDIT_LOGS_SAMPLE_RATE] '
+        f'(default:{DEFAULT_CONFIG.audit_logs_sample_rate}) Fraction of flows '
+        'to produce audit logs for.'
+    ),
+)
+@click.option(
+    '--alias-cache-size',
+    type=int,
+    envvar='SATELLITE_ALIAS_CACHE_SIZE',
+    help=(
+        '[env:SATELLITE_ALIAS_CACHE_SIZE] '
+        f'(default:{DEFAULT_CONFIG.alias_cache_size}) Max number of cached '
+        'aliases per process (0 disables the cache).'
+    ),
+)
+@click.option(
+    '--alias-write-behind-interval',
+    type=int,
+    envvar='SATELLITE_ALIAS_WRITE_BEHIND_INTERVAL',
+    help=(
+        '[env:SATELLITE_ALIAS_WRITE_BEHIND_INTERVAL] '
+        f'(default:{DEFAULT_CONFIG.alias_write_behind_interval}) Interval in '
+        'milliseconds to save new aliases to the DB with group commits. New '
+        'aliases created within the interval are lost if the app crashes '
+        '(0 saves every alias before it is returned). Only UUID aliases are '
+        'saved this way, other aliases are always saved before they are '
+        'returned.'
+    ),
+)
+@click.option(
+    '--alias-write-behind-batch-size',
+    type=int,
+    envvar='SATELLITE_ALIAS_WRITE_BEHIND_BATCH_SIZE',
+    help=(
+        '[env:SATELLITE_ALIAS_WRITE_BEHIND_BATCH_SIZE] '
+        f'(default:{DEFAULT_CONFIG.alias_write_behind_batch_size}) Max number '
+        'of new aliases to save with a single group commit.'
+    ),
+)
+@click.option(
+    '--alias-reaper-interval',
+    type=int,
+    envvar='SATELLITE_ALIAS_REAPER_INTERVAL',
+    help=(
+        '[env:SATELLITE_ALIAS_REAPER_INTERVAL] '
+        f'(default:{DEFAULT_CONFIG.alias_reaper_interval}) Interval in seconds '
+        'to delete expired aliases (0 deletes them only at startup).'
+    ),
+)
+@click.option(
+    '--alias-reaper-batch-size',
+    type=int,
+    envvar='SATELLITE_ALIAS_REAPER_BATCH_SIZE',
+    help=(
+        '[env:SATELLITE_ALIAS_REAPER_BATCH_SIZE] '
+        f'(default:{DEFAULT_CONFIG.alias_reaper_batch_size}) Max number of '
+        'expired aliases to delete with a single DB query.'
+    ),
+)
+@click.option(
+    '--alias-broker',
+    is_flag=True,
+    default=None,
+    envvar='SATELLITE_ALIAS_BROKER',
+    help=(
+        '[env:SATELLITE_ALIAS_BROKER] '
+        f'(default:{DEFAULT_CONFIG.alias_broker}) Run a separate process which '
+        'is the only one accessing the aliases table. Other processes send '
+        'alias requests to it.'
+    ),
+)
+@click.pass_context
+def main(ctx: click.Context, **kwargs):
+    """Run the app (unless a command is given)."""
     set_start_method('fork')  # PyInstaller supports only fork start method
 
     pickling_support.install()
@@ -136,6 +252,21 @@ def main(**kwargs):
     except db.DBVersionMismatch as exc:
         raise click.ClickException(exc) from exc
 
+    if ctx.invoked_subcommand is not None:
+        return
+
+    route_table.configure(compile_expressions=config.compile_route_expressions)
+    alias_manager.configure(
+        cache_size=config.alias_cache_size,
+        write_behind_interval=config.alias_write_behind_interval,
+        write_behind_batch_size=config.alias_write_behind_batch_size,
+        volatile_in_memory=config.volatile_aliases_in_memory,
+    )
+    audit_logs.configure(
+        level=audit_logs.AuditLogLevel(config.audit_logs_level),
+        sample_rate=config.audit_logs_sample_rate,
+    )
+
     if config.routes_path:
         with open(config.routes_path, 'r') as stream:
             try:
@@ -146,11 +277,79 @@ def main(**kwargs):
                 ) from exc
         logger.info(f'Loaded {loaded_routes_count} routes from routes config file.')
 
-    deleted_aliases = AliasStore.cleanup()
-    logger.info(f'Deleted {deleted_aliases} expired aliases.')
+    alias_broker = None
+    if config.alias_broker:
+        alias_broker = AliasBroker()
+        alias_broker.start()
+        try:
+            alias_broker.wait_started(5)
+        except AliasBrokerError as exc:
+            raise click.ClickException(exc) from exc
+        alias_manager.use_broker(alias_broker.get_client())
+        logger.info('Started alias broker.')
 
     app = WebApplication(config)
-    app.start()
+    try:
+        app.start()
+    finally:
+        if alias_broker:
+            alias_broker.stop()
+
+
+@main.command()
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option(
+    '--batch-size',
+    type=click.IntRange(1),
+    default=transfer.DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help='Number of aliases fetched from the DB at once.',
+)
+def export_aliases(path: str, batch_size: int):
+    """Export all the aliases to an NDJSON file."""
+    with open(path, 'w') as stream:
+        exported = transfer.export_aliases(
+            stream,
+            batch_size=batch_size,
+            progress=lambda count: click.echo(f'Exported {count} aliases.', err=True),
+        )
+    click.echo(f'Done: exported {exported} aliases.', err=True)
+
+
+@main.command()
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    '--batch-size',
+    type=click.IntRange(1),
+    default=transfer.DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help='Number of aliases inserted into the DB with a single transaction.',
+)
+def import_aliases(path: str, batch_size: int):
+    """Import aliases from an NDJSON file produced by export-aliases.
+
+    Aliases already present in the DB are skipped, so an interrupted import can
+    be resumed by running the command again.
+    """
+
+    def report(progress: transfer.AliasImportProgress):
+        click.echo(
+            f'Read {progress.read} aliases: {progress.imported} imported, '
+            f'{progress.existing} already present, '
+            f'{progress.conflicting} with conflicting public aliases.',
+            err=True,
+        )
+
+    with open(path, 'r') as stream:
+        try:
+            progress = transfer.import_aliases(
+                stream,
+                batch_size=batch_size,
+                progress=report,
+            )
+        except transfer.InvalidAliasRecord as exc:
+            raise click.ClickException(str(exc)) from exc
+    click.echo(f'Done: imported {progress.imported} aliases.', err=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,388 @@
+import json
+import multiprocessing
+import platform
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, TextIO
+
+import click
+from sqlalchemy.exc import OperationalError
+
+from satellite import db
+from satellite.aliases import AliasGeneratorType, AliasNotFound, AliasStoreType
+from satellite.aliases import manager as alias_manager
+from satellite.aliases.store import AliasStore
+from satellite.db.models.alias import Alias, get_value_digest
+
+
+DEFAULT_SIZES = [10000, 100000, 1000000, 10000000]
+
+INSERT_BATCH_SIZE = 50000
+
+PERSISTENT = AliasStoreType.PERSISTENT
+
+# Share of volatile aliases among the generated ones.
+VOLATILE_SHARE = 0.1
+
+
+def populate(rnd: random.Random, start: int, stop: int) -> List[Alias]:
+    """Insert synthetic aliases and return a sample of them for lookups.
+
+    start and stop are indexes of the aliases (e.g. to grow a populated DB).
+    """
+    engine = db.get_engine()
+    table = Alias.__table__
+    generators = [AliasGeneratorType.UUID, AliasGeneratorType.RAW_UUID]
+    created_at = datetime(2021, 1, 1)
+    sample = []
+    for batch_start in range(start, stop, INSERT_BATCH_SIZE):
+        batch = []
+        for idx in range(batch_start, min(stop, batch_start + INSERT_BATCH_SIZE)):
+            expires_at = None
+            if rnd.random() < VOLATILE_SHARE:
+                # Half of the volatile aliases are expired.
+                expires_at = created_at + timedelta(days=rnd.choice([-1, 3650]))
+            value = str(rnd.getrandbits(64))
+            generator = rnd.choice(generators)
+            batch.append(
+                {
+                    'id': str(uuid.uuid4()),
+                    'created_at': created_at + timedelta(seconds=idx),
+                    'value': value,
+                    'alias_generator': generator,
+                    'value_digest': get_value_digest(engine, value, generator),
+                    'public_alias': f'tok_sat_{uuid.uuid4().hex}',
+                    'expires_at': expires_at,
+                }
+            )
+        with engine.begin() as connection:
+            connection.execute(table.insert(), batch)
+        sample.extend(Alias(**row) for row in rnd.sample(batch, min(len(batch), 100)))
+    return sample
+
+
+def drop_indexes():
+    with db.get_engine().begin() as connection:
+        for index in Alias.__table__.indexes:
+            index.drop(connection)
+
+
+def measure(operation: Callable[[], object], number: int) -> List[float]:
+    latencies = []
+    for _ in range(number):
+        started_at = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - started_at)
+    latencies.sort()
+    return latencies
+
+
+def summarize(latencies: List[float], elapsed: float = None) -> dict:
+    """Get throughput and latency percentiles of sorted latencies (seconds).
+
+    Throughput is computed for the elapsed time if it is given (e.g. for
+    concurrent operations) or for the total latency otherwise.
+    """
+    if not latencies:
+        return {'operations': 0}
+    return {
+        'operations': len(latencies),
+        'ops_per_sec': len(latencies) / (elapsed or sum(latencies)),
+        'p50_us': _percentile(latencies, 50) * 1e6,
+        'p90_us': _percentile(latencies, 90) * 1e6,
+        'p99_us': _percentile(latencies, 99) * 1e6,
+        'max_us': latencies[-1] * 1e6,
+    }
+
+
+def _percentile(values: List[float], percent: int) -> float:
+    return values[min(len(values) - 1, len(values) * percent // 100)]
+
+
+def _redact_existing(rnd: random.Random, sample: List[Alias]) -> Alias:
+    alias = rnd.choice(sample)
+    return alias_manager.redact(alias.value, alias.alias_generator, PERSISTENT)
+
+
+def _redact_new(rnd: random.Random) -> Alias:
+    return alias_manager.redact(
+        str(rnd.getrandbits(64)),
+        AliasGeneratorType.UUID,
+        PERSISTENT,
+    )
+
+
+def _reveal_unknown(rnd: random.Random):
+    try:
+        alias_manager.reveal(f'tok_sat_{rnd.getrandbits(64):x}', PERSISTENT)
+    except AliasNotFound:
+        pass
+
+
+def make_operations(
+    rnd: random.Random,
+    sample: List[Alias],
+) -> Dict[str, Callable[[], object]]:
+    """Make alias manager operations (hits use aliases from the sample)."""
+    return {
+        'redact (hit)': lambda: _redact_existing(rnd, sample),
+        'redact (miss)': lambda: _redact_new(rnd),
+        'reveal (hit)': lambda: alias_manager.reveal(
+            rnd.choice(sample).public_alias,
+            PERSISTENT,
+        ),
+        'reveal (miss)': lambda: _reveal_unknown(rnd),
+    }
+
+
+def measure_operations(
+    rnd: random.Random,
+    sample: List[Alias],
+    number: int,
+) -> Dict[str, dict]:
+    results = {}
+    for name, operation in make_operations(rnd, sample).items():
+        results[name] = summarize(measure(operation, number))
+        _echo_result(name, results[name])
+    return results
+
+
+# Shares of operations done by concurrent workers
+CONCURRENT_MIX = [
+    ('reveal (hit)', 0.6),
+    ('redact (hit)', 0.3),
+    ('redact (miss)', 0.1),
+]
+
+
+def _run_worker(
+    sample: List[Alias],
+    number: int,
+    seed: int,
+    results: multiprocessing.Queue,
+):
+    # Connections must not be shared with the parent process.
+    db.get_engine().dispose()
+    rnd = random.Random(seed)
+    operations = make_operations(rnd, sample)
+    names = [name for name, _ in CONCURRENT_MIX]
+    weights = [weight for _, weight in CONCURRENT_MIX]
+    latencies = []
+    errors = 0
+    for name in rnd.choices(names, weights, k=number):
+        started_at = time.perf_counter()
+        try:
+            operations[name]()
+        except OperationalError:
+            # E.g. the DB is locked by other writers for too long.
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started_at)
+    results.put((latencies, errors))
+
+
+def measure_concurrent(
+    sample: List[Alias],
+    processes: int,
+    number: int,
+    seed: int,
+) -> dict:
+    """Measure mixed operations done by multiple processes at once."""
+    # Processes are forked, so the current session must not hold a connection.
+    db.get_session().close()
+    mp_context = multiprocessing.get_context('fork')
+    queue = mp_context.Queue()
+    workers = [
+        mp_context.Process(
+            target=_run_worker,
+            args=(sample, number, seed + idx, queue),
+        )
+        for idx in range(processes)
+    ]
+    started_at = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    latencies = []
+    errors = 0
+    for _ in workers:
+        worker_latencies, worker_errors = queue.get()
+        latencies.extend(worker_latencies)
+        errors += worker_errors
+    elapsed = time.perf_counter() - started_at
+    for worker in workers:
+        worker.join()
+
+    latencies.sort()
+    result = {
+        'processes': processes,
+        'mix': dict(CONCURRENT_MIX),
+        'errors': errors,
+        **summarize(latencies, elapsed),
+    }
+    _echo_result(f'concurrent ({processes})', result)
+    return result
+
+
+def measure_cleanup() -> dict:
+    started_at = time.perf_counter()
+    deleted = AliasStore.cleanup()
+    elapsed = time.perf_counter() - started_at
+    click.echo(f'cleanup deleted {deleted} aliases in {elapsed * 1e3:.1f}ms', err=True)
+    return {
+        'deleted': deleted,
+        'seconds': elapsed,
+        'rows_per_sec': deleted / elapsed,
+    }
+
+
+def _echo_result(name: str, result: dict):
+    click.echo(
+        f'{name:>20} {result["ops_per_sec"]:>10.0f} '
+        f'{result["p50_us"]:>10.1f} {result["p99_us"]:>10.1f}',
+        err=True,
+    )
+
+
+def run(
+    rnd: random.Random,
+    sample: List[Alias],
+    rows: int,
+    populated: int,
+    operations: int,
+    processes: int,
+    seed: int,
+) -> dict:
+    """Grow the DB to the number of rows and measure the operations."""
+    started_at = time.perf_counter()
+    sample.extend(
+        alias for alias in populate(rnd, populated, rows) if alias.expires_at is None
+    )
+    populate_seconds = time.perf_counter() - started_at
+    click.echo(
+        f'Inserted {rows - populated} aliases in {populate_seconds:.1f}s', err=True
+    )
+
+    started_at = time.perf_counter()
+    AliasStore.rebuild_filter()
+    filter_seconds = time.perf_counter() - started_at
+
+    click.echo(
+        f'{"operation":>20} {"ops/sec":>10} {"p50, us":>10} {"p99, us":>10}',
+        err=True,
+    )
+    result = {
+        'rows': rows,
+        'populate_seconds': populate_seconds,
+        'filter_build_seconds': filter_seconds,
+        'operations': measure_operations(rnd, sample, operations),
+    }
+    if processes > 0:
+        result['concurrent'] = measure_concurrent(sample, processes, operations, seed)
+    result['cleanup'] = measure_cleanup()
+    return result
+
+
+def _get_app_version() -> Optional[str]:
+    try:
+        with open(Path(__file__).parent.parent / 'package.json') as stream:
+            return json.load(stream)['version']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+@click.command()
+@click.option(
+    '--rows',
+    'sizes',
+    type=int,
+    multiple=True,
+    default=DEFAULT_SIZES,
+    help='Number of aliases (can be used multiple times).',
+)
+@click.option(
+    '--operations',
+    type=int,
+    default=1000,
+    help='Number of operations per measurement (and per concurrent process).',
+)
+@click.option(
+    '--processes',
+    type=int,
+    default=4,
+    help='Number of concurrent processes (0 to skip the measurement).',
+)
+@click.option(
+    '--cache-size',
+    type=int,
+    default=0,
+    help='Alias cache size (by default the cache is disabled).',
+)
+@click.option('--seed', type=int, default=42, help='Random seed.')
+@click.option(
+    '--drop-indexes',
+    'no_indexes',
+    is_flag=True,
+    help='Drop the aliases indexes (to compare with the baseline).',
+)
+@click.option(
+    '--output',
+    type=click.File('w'),
+    default='-',
+    help='Path to a JSON file for the results (stdout by default).',
+)
+def main(
+    sizes: List[int],
+    operations: int,
+    processes: int,
+    cache_size: int,
+    seed: int,
+    no_indexes: bool,
+    output: TextIO,
+):
+    """Measure alias management throughput and latency for DBs of given sizes.
+
+    A single DB is grown to every size (in ascending order). Progress and a
+    summary are printed to stderr, results are written as JSON.
+    """
+    rnd = random.Random(seed)
+    sample = []
+    results = []
+    populated = 0
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db.configure(str(Path(tmp_dir) / 'aliases.sqlite'))
+        db.init()
+        if no_indexes:
+            drop_indexes()
+        alias_manager.configure(cache_size=cache_size)
+
+        for rows in sorted(set(sizes)):
+            click.echo(f'--- {rows} aliases', err=True)
+            results.append(
+                run(rnd, sample, rows, populated, operations, processes, seed)
+            )
+            populated = rows
+
+    report = {
+        'version': _get_app_version(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'parameters': {
+            'operations': operations,
+            'processes': processes,
+            'cache_size': cache_size,
+            'seed': seed,
+            'drop_indexes': no_indexes,
+        },
+        'results': results,
+    }
+    json.dump(report, output, indent=2)
+    output.write('\n')
+
+
+if __name__ == '__main__':
+    main()
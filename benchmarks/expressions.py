@@ -0,0 +1,87 @@
+import timeit
+
+import click
+
+from satellite.routes.compiler import compile_expression
+from satellite.routes.expressions import CompositeExpression
+from .utils import make_flow
+
+
+CONFIG = {
+    'condition': 'AND',
+    'rules': [
+        {
+            'expression': {
+                'field': 'ContentType',
+                'operator': 'equals',
+                'type': 'string',
+                'values': ['application/json'],
+            },
+        },
+        {
+            'condition': 'OR',
+            'rules': [
+                {
+                    'expression': {
+                        'field': 'PathInfo',
+                        'operator': 'matches',
+                        'type': 'string',
+                        'values': [r'/api/v\d+/payments'],
+                    },
+                },
+                {
+                    'expression': {
+                        'field': 'PathInfo',
+                        'operator': 'begins_with',
+                        'type': 'string',
+                        'values': ['/po'],
+                    },
+                },
+            ],
+        },
+        {
+            'expression': {
+                'field': 'Method',
+                'operator': 'does_not_equal',
+                'type': 'string',
+                'values': ['GET'],
+            },
+        },
+        {
+            'expression': {
+                'field': 'Status',
+                'operator': 'less_than',
+                'type': 'number',
+                'values': [400],
+            },
+        },
+    ],
+}
+
+
+@click.command()
+@click.option('--number', type=int, default=100000, help='Evaluations per run.')
+@click.option('--repeat', type=int, default=5, help='Number of runs.')
+def main(number: int, repeat: int):
+    """Compare interpreted and compiled filter expressions evaluation."""
+    flow = make_flow()
+
+    evaluators = {
+        'interpreted': CompositeExpression.build(CONFIG).evaluate,
+        'compiled': compile_expression(CONFIG),
+    }
+
+    results = {}
+    for name, evaluate in evaluators.items():
+        assert evaluate(flow)
+        best = min(
+            timeit.repeat(lambda: evaluate(flow), number=number, repeat=repeat)
+        )
+        results[name] = best / number * 1e6
+        click.echo(f'{name:>12}: {results[name]:.3f} us/evaluation')
+
+    click.echo(f'{"speedup":>12}: {results["interpreted"] / results["compiled"]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import random
+import time
+from typing import List
+
+import click
+
+from satellite import db
+from satellite.aliases import AliasGeneratorType
+from satellite.aliases.generators import check_luhn, get_alias_generator
+
+
+def generate_card_numbers(rnd: random.Random, count: int) -> List[str]:
+    """Generate Luhn-valid 16-digit card numbers."""
+    numbers = []
+    while len(numbers) < count:
+        number = f'4{rnd.getrandbits(64) % 10 ** 15:015d}'
+        if check_luhn(number):
+            numbers.append(number)
+    return numbers
+
+
+@click.command()
+@click.option('--values', 'count', type=int, default=10000, help='Number of values.')
+@click.option('--seed', type=int, default=42, help='Random seed.')
+def main(count: int, seed: int):
+    """Measure alias generation throughput for every generator type."""
+    # Keyed generators keep their keys in the DB.
+    db.configure(':memory:')
+    db.init()
+
+    values = generate_card_numbers(random.Random(seed), count)
+    click.echo(f'{"generator":>26} {"generate, /s":>14} {"generate_many, /s":>18}')
+    for generator_type in AliasGeneratorType:
+        generator = get_alias_generator(generator_type)
+
+        started_at = time.perf_counter()
+        for value in values:
+            generator.generate(value)
+        single_rate = count / (time.perf_counter() - started_at)
+
+        started_at = time.perf_counter()
+        generator.generate_many(values)
+        bulk_rate = count / (time.perf_counter() - started_at)
+
+        click.echo(
+            f'{generator_type.value:>26} {single_rate:>14.0f} {bulk_rate:>18.0f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+import random
+import time
+from typing import List, Tuple
+
+import click
+from mitmproxy.http import HTTPFlow
+
+from satellite import db
+from satellite.db.models.route import Route, RuleEntry
+from satellite.proxy import ProxyMode
+from satellite.routes import Operation, Phase, table as route_table
+from satellite.routes.matcher import match_route
+from .utils import make_flow
+
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+METHODS = ['GET', 'POST', 'PUT', 'DELETE']
+CONTENT_TYPES = ['application/json', 'application/xml', 'text/plain', None]
+STATUSES = [200, 201, 400, 404, 500]
+
+
+def _expression(field: str, operator: str, value, value_type: str = 'string'):
+    return {
+        'expression': {
+            'field': field,
+            'operator': operator,
+            'type': value_type,
+            'values': [value],
+        },
+    }
+
+
+def _make_path(rnd: random.Random, idx: int) -> str:
+    return rnd.choice(
+        [
+            f'/api/v{rnd.randint(1, 3)}/accounts/{idx}',
+            f'/api/v{rnd.randint(1, 3)}/payments/{idx}/capture',
+            f'/post/{idx}',
+        ]
+    )
+
+
+def _make_snapshot(rnd: random.Random, path: str) -> dict:
+    prefix = path[: path.rfind('/')]
+    path_rules = [
+        _expression('PathInfo', 'equals', path),
+        _expression('PathInfo', 'begins_with', prefix),
+        _expression('PathInfo', 'matches', f'{prefix}/[0-9a-z]+'),
+    ]
+    other_rules = [
+        _expression('Method', 'equals', rnd.choice(METHODS)),
+        _expression('ContentType', 'equals', 'application/json'),
+        _expression('Status', 'less_than', 400, 'number'),
+        {
+            'condition': 'OR',
+            'rules': [
+                _expression('Status', 'equals', rnd.choice(STATUSES), 'number'),
+                _expression('ContentType', 'does_not_equal', 'text/plain'),
+            ],
+        },
+    ]
+    return {
+        'condition': 'AND',
+        'rules': [
+            rnd.choice(path_rules),
+            *rnd.sample(other_rules, rnd.randint(1, 3)),
+        ],
+    }
+
+
+def _make_host_pattern(rnd: random.Random, idx: int) -> Tuple[str, str]:
+    host_pattern, host = rnd.choice(
+        [
+            (f'service{idx}\\.example\\.com', f'service{idx}.example.com'),
+            (f'.*\\.tenant{idx}\\.com', f'api.tenant{idx}.com'),
+            (f'api-[0-9]+\\.svc{idx}\\.net', f'api-1.svc{idx}.net'),
+        ]
+    )
+    return host_pattern, host
+
+
+def generate_routes(
+    rnd: random.Random,
+    size: int,
+) -> Tuple[List[Route], List[Tuple[bool, str, str]]]:
+    """Generate synthetic routes and (is outbound, host, path) they can match."""
+    routes = []
+    targets = []
+    for idx in range(size):
+        is_outbound = rnd.random() < 0.5
+        host_pattern, host = _make_host_pattern(rnd, idx)
+        filters = []
+        for phase in [Phase.REQUEST, Phase.RESPONSE]:
+            for _ in range(rnd.randint(1, 3)):
+                path = _make_path(rnd, idx)
+                filters.append(
+                    RuleEntry(
+                        phase=phase,
+                        operation=rnd.choice([Operation.REDACT, Operation.ENRICH]),
+                        expression_snapshot=_make_snapshot(rnd, path),
+                        targets=['body'],
+                        classifiers={},
+                        transformer_config=['$.secret'],
+                    )
+                )
+                targets.append((is_outbound, host, path))
+        routes.append(
+            Route(
+                protocol='http',
+                source_endpoint='*',
+                destination_override_endpoint=(
+                    '*' if is_outbound else f'https://{host}'
+                ),
+                host_endpoint=host_pattern,
+                port=80,
+                rule_entries_list=filters,
+            )
+        )
+
+    return routes, targets
+
+
+def generate_flows(
+    rnd: random.Random,
+    targets: List[Tuple[str, str]],
+    number: int,
+) -> List[HTTPFlow]:
+    flows = []
+    for _ in range(number):
+        host, path = rnd.choice(targets) if targets else ('localhost', '/')
+        if rnd.random() < 0.2:
+            # Requests which match no routes.
+            host, path = f'unknown.{host}', f'/unknown{path}'
+        flows.append(
+            make_flow(
+                method=rnd.choice(METHODS),
+                path=path,
+                host=host,
+                content_type=rnd.choice(CONTENT_TYPES),
+                status_code=rnd.choice(STATUSES),
+            )
+        )
+    return flows
+
+
+def store_routes(routes: List[Route]):
+    session = db.get_session()
+    session.query(RuleEntry).delete()
+    session.query(Route).delete()
+    session.add_all(routes)
+    session.commit()
+    route_table.reload()
+
+
+def _percentile(values: List[float], percent: int) -> float:
+    return values[min(len(values) - 1, len(values) * percent // 100)]
+
+
+@click.command()
+@click.option(
+    '--routes',
+    'sizes',
+    type=int,
+    multiple=True,
+    default=DEFAULT_SIZES,
+    help='Number of routes (can be used multiple times).',
+)
+@click.option('--flows', type=int, default=2000, help='Number of flows per run.')
+@click.option('--seed', type=int, default=42, help='Random seed.')
+@click.option(
+    '--compile-route-expressions',
+    is_flag=True,
+    help='Compile filter expressions into Python functions.',
+)
+def main(sizes: List[int], flows: int, seed: int, compile_route_expressions: bool):
+    """Measure match_route throughput and latency for synthetic route sets."""
+    db.configure(':memory:')
+    db.init()
+    route_table.configure(compile_expressions=compile_route_expressions)
+
+    click.echo(
+        f'{"routes":>8} {"mode":>8} {"flows/sec":>12} '
+        f'{"p50, us":>10} {"p99, us":>10} {"matched":>8}'
+    )
+    for size in sizes:
+        rnd = random.Random(seed)
+        routes, targets = generate_routes(rnd, size)
+        store_routes(routes)
+
+        for proxy_mode in ProxyMode:
+            is_outbound = proxy_mode == ProxyMode.FORWARD
+            test_flows = generate_flows(
+                rnd,
+                [
+                    (host, path)
+                    for outbound, host, path in targets
+                    if outbound == is_outbound
+                ],
+                flows,
+            )
+            latencies = []
+            matched = 0
+            for flow in test_flows:
+                started_at = time.perf_counter()
+                for phase in [Phase.REQUEST, Phase.RESPONSE]:
+                    route, _ = match_route(proxy_mode, phase, flow)
+                    matched += route is not None
+                latencies.append(time.perf_counter() - started_at)
+
+            latencies.sort()
+            click.echo(
+                f'{size:>8} {proxy_mode.value:>8} '
+                f'{len(latencies) / sum(latencies):>12.0f} '
+                f'{_percentile(latencies, 50) * 1e6:>10.1f} '
+                f'{_percentile(latencies, 99) * 1e6:>10.1f} '
+                f'{matched:>8}'
+            )
+
+
+if __name__ == '__main__':
+    main()
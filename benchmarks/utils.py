@@ -0,0 +1,21 @@
+from typing import Optional
+
+from mitmproxy.http import HTTPFlow
+from mitmproxy.test import tflow
+
+
+def make_flow(
+    method: str = 'POST',
+    path: str = '/post',
+    host: str = 'httpbin.org',
+    content_type: Optional[str] = 'application/json',
+    status_code: int = 200,
+) -> HTTPFlow:
+    flow = tflow.tflow(resp=True)
+    flow.request.method = method
+    flow.request.path = path
+    flow.request.host = host
+    if content_type:
+        flow.request.headers['Content-type'] = content_type
+    flow.response.status_code = status_code
+    return flow
@@ -1,7 +1,8 @@
 from enum import Enum, unique
+from typing import Set
 
 
-class RedactFailed(BaseException):
+class RedactFailed(Exception):
     pass
 
 
@@ -13,10 +14,20 @@ class AliasNotFound(RevealFailed):
     pass
 
 
+class AliasCollision(Exception):
+    """Raised on saving aliases with public aliases which are taken."""
+
+    def __init__(self, public_aliases: Set[str]):
+        super().__init__(f'Public aliases are taken: {len(public_aliases)}')
+        self.public_aliases = public_aliases
+
+
 @unique
 class AliasGeneratorType(Enum):
     FPE_SIX_T_FOUR = 'FPE_SIX_T_FOUR'
+    FPE_SIX_T_FOUR_KEYED = 'FPE_SIX_T_FOUR_KEYED'
     FPE_T_FOUR = 'FPE_T_FOUR'
+    FPE_T_FOUR_KEYED = 'FPE_T_FOUR_KEYED'
     NON_LUHN_FPE_ALPHANUMERIC = 'NON_LUHN_FPE_ALPHANUMERIC'
     NUM_LENGTH_PRESERVING = 'NUM_LENGTH_PRESERVING'
     PFPT = 'PFPT'
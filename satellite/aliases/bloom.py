@@ -0,0 +1,261 @@
+import hashlib
+import logging
+import math
+import threading
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, select
+
+from ..db import get_engine
+from ..db.models.alias import Alias
+
+
+logger = logging.getLogger()
+
+
+DEFAULT_CAPACITY = 100000
+DEFAULT_ERROR_RATE = 0.01
+
+# Number of rows fetched from the DB at once when the filter is (re)built.
+FETCH_BATCH_SIZE = 10000
+
+# Offset of the file change counter in the SQLite DB header. SQLite increments
+# the counter on every write transaction commit (in rollback journal mode).
+DB_CHANGE_COUNTER_OFFSET = 24
+
+
+@dataclass(frozen=True)
+class AliasFilterStats:
+    count: int
+    size: int  # bytes
+    false_positive_rate: float
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.count = 0
+        self._bits_count = max(
+            8,
+            math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2),
+        )
+        self._hashes_count = max(
+            1,
+            round(self._bits_count / capacity * math.log(2)),
+        )
+        self._bits = bytearray((self._bits_count + 7) // 8)
+
+    @property
+    def size(self) -> int:
+        return len(self._bits)
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Expected false positive rate for the current number of items."""
+        k = self._hashes_count
+        return (1 - math.exp(-k * self.count / self._bits_count)) ** k
+
+    def add(self, item: str) -> bool:
+        """Add an item. Returns False if it might have been added before.
+
+        Items which might have been added before are not counted.
+        """
+        added = False
+        for idx in self._get_indexes(item):
+            mask = 1 << (idx & 7)
+            if not self._bits[idx >> 3] & mask:
+                self._bits[idx >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[idx >> 3] & (1 << (idx & 7)) for idx in self._get_indexes(item)
+        )
+
+    def _get_indexes(self, item: str) -> List[int]:
+        # Double hashing (Kirsch-Mitzenmacher) with a single digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self._bits_count for i in range(self._hashes_count)]
+
+
+class PublicAliasFilter:
+    """Bloom filter of public aliases present in the aliases table.
+
+    Used to skip DB lookups of public aliases which definitely do not exist.
+    The SQLite file change counter (read without a DB query) tells whether
+    other processes might have saved aliases since the last sync. If so, the
+    aliases missing in the filter are looked up in the DB anyway and rows
+    inserted after the last sync (by rowid) are added to the filter in the
+    background. Deleted aliases stay in the filter until it is rebuilt.
+    """
+
+    def __init__(
+        self,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        min_capacity: int = DEFAULT_CAPACITY,
+    ):
+        self._error_rate = error_rate
+        self._min_capacity = min_capacity
+        self._bloom: Optional[BloomFilter] = None
+        # Change counter of the DB file when the filter was synced with it
+        self._db_version: Optional[int] = None
+        # (rowid, public alias) of the last row added to the filter
+        self._last_row: Optional[Tuple[int, str]] = None
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._syncer: Optional[threading.Thread] = None
+
+    @property
+    def stats(self) -> AliasFilterStats:
+        bloom = self._bloom
+        if bloom is None:
+            return AliasFilterStats(count=0, size=0, false_positive_rate=0.0)
+        return AliasFilterStats(
+            count=bloom.count,
+            size=bloom.size,
+            false_positive_rate=bloom.false_positive_rate,
+        )
+
+    def rebuild(self):
+        """Build the filter from scratch with a streaming scan of the aliases."""
+        db_version = _read_db_version()
+        with get_engine().connect() as connection:
+            count = connection.execute(
+                select([func.count()]).select_from(Alias.__table__)
+            ).scalar()
+        bloom = BloomFilter(max(self._min_capacity, 2 * count), self._error_rate)
+        _, last_row = _scan(bloom, None)
+        with self._lock:
+            self._bloom = bloom
+            self._last_row = last_row
+            # Aliases saved during the scan are fetched on the next sync.
+            self._db_version = db_version
+        logger.info(
+            f'Built public alias filter: {bloom.count} aliases, '
+            f'{bloom.size // 1024} KiB.'
+        )
+
+    def add(self, public_aliases: Iterable[str]):
+        """Add public aliases saved by the current process (after the commit)."""
+        db_version = _read_db_version()
+        with self._lock:
+            if self._bloom is None:
+                # Will be built (with the aliases) on the first lookup.
+                return
+            for public_alias in public_aliases:
+                self._bloom.add(public_alias)
+            # The filter is still in sync with the DB if nobody else committed
+            # since the last sync.
+            if (
+                self._db_version is not None
+                and db_version == (self._db_version + 1) % 2**32
+            ):
+                self._db_version = db_version
+
+    def might_contain(self, public_alias: str) -> bool:
+        return bool(self.filter([public_alias]))
+
+    def filter(self, public_aliases: Iterable[str]) -> List[str]:
+        """Get public aliases which might be present in the DB (in order)."""
+        public_aliases = list(public_aliases)
+        with self._lock:
+            if self._bloom is None:
+                self.rebuild()
+            bloom = self._bloom
+            db_version = self._db_version
+        missing = {alias for alias in public_aliases if alias not in bloom}
+        if missing and (db_version is None or _read_db_version() != db_version):
+            # Might be saved by other processes since the last sync.
+            self._ensure_syncer()
+            return public_aliases
+        return [alias for alias in public_aliases if alias not in missing]
+
+    def sync(self):
+        """Add aliases saved since the last sync (e.g. by other processes)."""
+        with self._sync_lock:
+            db_version = _read_db_version()
+            with self._lock:
+                bloom = self._bloom
+                last_row = self._last_row
+            if bloom is None:
+                return
+
+            is_consistent, last_row = _scan(bloom, last_row)
+            # The last added row might be deleted (so its rowid might be reused)
+            # or rowids might be changed (e.g. by VACUUM).
+            if not is_consistent or bloom.count > bloom.capacity:
+                self.rebuild()
+                return
+            with self._lock:
+                if self._bloom is bloom:
+                    self._last_row = last_row
+                    self._db_version = db_version
+
+    def _ensure_syncer(self):
+        with self._lock:
+            # Not alive after a fork: threads are not inherited by child processes.
+            if self._syncer and self._syncer.is_alive():
+                return
+            self._syncer = threading.Thread(
+                target=self._run_sync,
+                name='PublicAliasFilterSync',
+                daemon=True,
+            )
+            self._syncer.start()
+
+    def _run_sync(self):
+        try:
+            self.sync()
+        except Exception as exc:
+            # Retried on the next lookup of a missing alias.
+            logger.exception(f'Unable to sync public alias filter: {exc}')
+
+
+def _scan(
+    bloom: BloomFilter,
+    last_row: Optional[Tuple[int, str]],
+) -> Tuple[bool, Optional[Tuple[int, str]]]:
+    """Add public aliases inserted after the last row (by rowid) to the filter.
+
+    Rows are fetched in rowid ranges (with a query per range), so writers are
+    not blocked for the whole scan. Returns whether the last row is still
+    present and the new last row.
+    """
+    table = Alias.__table__
+    rowid = literal_column('rowid')
+    query = select([rowid, table.c.public_alias])
+    with get_engine().connect() as connection:
+        if last_row is not None:
+            row = connection.execute(query.where(rowid == last_row[0])).first()
+            if row is None or tuple(row) != last_row:
+                return False, last_row
+
+        query = query.order_by(rowid).limit(FETCH_BATCH_SIZE)
+        while True:
+            rows = connection.execute(
+                query if last_row is None else query.where(rowid > last_row[0])
+            ).fetchall()
+            for _, public_alias in rows:
+                bloom.add(public_alias)
+            if rows:
+                last_row = tuple(rows[-1])
+            if len(rows) < FETCH_BATCH_SIZE:
+                return True, last_row
+
+
+def _read_db_version() -> Optional[int]:
+    path = get_engine().url.database
+    if not path or path == ':memory:':
+        return None
+    try:
+        with open(path, 'rb') as stream:
+            stream.seek(DB_CHANGE_COUNTER_OFFSET)
+            return int.from_bytes(stream.read(4), 'big')
+    except OSError:
+        return None
@@ -0,0 +1,236 @@
+import logging
+import queue
+import secrets
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from multiprocessing import Event as MPEvent, Process
+from multiprocessing.connection import Connection, Listener
+from pathlib import Path
+from typing import List, NamedTuple
+
+from . import RedactFailed, manager as alias_manager
+from .broker_client import (
+    AliasBrokerClient,
+    AliasBrokerError,
+    CLEANUP_ALIASES,
+    GET_ALIASES,
+    GET_OR_CREATE_ALIASES,
+    STOP,
+    alias_to_dict,
+)
+from .. import db
+
+
+logger = logging.getLogger()
+
+
+# Max number of requests served with a single DB transaction.
+MAX_BATCH_SIZE = 1000
+
+
+class _Request(NamedTuple):
+    connection: Connection
+    request_id: int
+    method: str
+    args: tuple
+
+
+class AliasBroker(Process):
+    """Process owning the aliases table.
+
+    Serves alias requests of the other app processes over a Unix socket.
+    Requests received in the meantime are served together: lookups of all the
+    requests are done with a single query and new aliases are saved with a
+    single commit, so there is a single writer of the aliases table.
+    """
+
+    def __init__(self):
+        super().__init__(name='AliasBroker')
+        self._address = str(Path(tempfile.mkdtemp()) / 'aliases.sock')
+        self._authkey = secrets.token_bytes(32)
+        self._started_event = MPEvent()
+
+        self._requests: queue.Queue = None
+
+    def get_client(self) -> AliasBrokerClient:
+        return AliasBrokerClient(self._address, self._authkey)
+
+    def wait_started(self, timeout: float):
+        start_ts = time.monotonic()
+        while not self._started_event.wait(0.5):
+            if not self.is_alive():
+                raise AliasBrokerError('Unable to start alias broker.')
+            if time.monotonic() - start_ts > timeout:
+                self.kill()
+                self.join()
+                raise AliasBrokerError(
+                    f'Exceeded alias broker start timeout ({timeout}).'
+                )
+
+    def stop(self, timeout: float = 5):
+        if not self.is_alive():
+            return
+        try:
+            self.get_client().stop_broker()
+        except AliasBrokerError as exc:
+            logger.error(f'Unable to gracefully stop alias broker: {exc}')
+            self.kill()
+        self.join(timeout)
+
+    def run(self):
+        # Connections of the parent process pool must not be shared.
+        db.get_engine().dispose()
+        alias_manager.use_broker(None)
+
+        # The broker is stopped by the parent process.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        self._requests = queue.Queue()
+        listener = Listener(self._address, family='AF_UNIX', authkey=self._authkey)
+        threading.Thread(
+            target=self._accept,
+            args=(listener,),
+            name='AliasBrokerListener',
+            daemon=True,
+        ).start()
+        self._started_event.set()
+
+        try:
+            self._serve()
+        finally:
+            alias_manager.flush()
+            listener.close()
+            shutil.rmtree(Path(self._address).parent, ignore_errors=True)
+
+    def _accept(self, listener: Listener):
+        while True:
+            try:
+                connection = listener.accept()
+            except OSError:
+                return
+            except Exception as exc:
+                # E.g. authentication errors
+                logger.warning(f'Alias broker connection rejected: {exc}')
+                continue
+            threading.Thread(
+                target=self._receive,
+                args=(connection,),
+                name='AliasBrokerConnection',
+                daemon=True,
+            ).start()
+
+    def _receive(self, connection: Connection):
+        while True:
+            try:
+                request_id, method, args = connection.recv()
+            except (EOFError, OSError):
+                connection.close()
+                return
+            self._requests.put(_Request(connection, request_id, method, args))
+
+    def _serve(self):
+        while True:
+            batch = [self._requests.get()]
+            while len(batch) < MAX_BATCH_SIZE:
+                try:
+                    batch.append(self._requests.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._process_batch(
+                [request for request in batch if request.method != STOP]
+            )
+
+            stop_requests = [request for request in batch if request.method == STOP]
+            if stop_requests:
+                alias_manager.flush()
+                for request in stop_requests:
+                    self._respond(request, None)
+                return
+
+    def _process_batch(self, batch: List[_Request]):
+        requests_by_method = defaultdict(list)
+        for request in batch:
+            if request.method in [GET_OR_CREATE_ALIASES, GET_ALIASES]:
+                store_type = request.args[0]
+                requests_by_method[request.method, store_type].append(request)
+            elif request.method == CLEANUP_ALIASES:
+                self._cleanup_aliases(request)
+            else:
+                self._respond(
+                    request,
+                    AliasBrokerError(f'Unknown method: {request.method}'),
+                )
+
+        for (method, store_type), requests in requests_by_method.items():
+            self._serve_requests(method, store_type, requests)
+
+    def _serve_requests(self, method: str, store_type, requests: List[_Request]):
+        try:
+            if method == GET_OR_CREATE_ALIASES:
+                self._get_or_create_aliases(store_type, requests)
+            else:
+                self._get_aliases(store_type, requests)
+        except Exception as exc:
+            if len(requests) > 1:
+                # Served one by one, so only the failing requests get errors.
+                for request in requests:
+                    self._serve_requests(method, store_type, [request])
+                return
+            if isinstance(exc, RedactFailed):
+                logger.error(exc)
+                self._respond(requests[0], exc)
+            else:
+                logger.exception(exc)
+                self._respond(requests[0], AliasBrokerError(str(exc)))
+
+    def _get_or_create_aliases(self, store_type, requests: List[_Request]):
+        values = list(
+            dict.fromkeys(key for request in requests for key in request.args[1])
+        )
+        aliases, created = alias_manager.get_or_create_aliases(values, store_type)
+        for request in requests:
+            result = {}
+            request_created = set()
+            for key in request.args[1]:
+                alias = aliases[key]
+                result[key] = alias_to_dict(alias)
+                # Only the first request of the new value gets it as created.
+                if alias.id in created:
+                    request_created.add(alias.id)
+                    created.remove(alias.id)
+            self._respond(request, (result, request_created))
+
+    def _get_aliases(self, store_type, requests: List[_Request]):
+        public_aliases = list(
+            dict.fromkeys(alias for request in requests for alias in request.args[1])
+        )
+        aliases = alias_manager.get_aliases(public_aliases, store_type)
+        for request in requests:
+            self._respond(
+                request,
+                {
+                    public_alias: alias_to_dict(aliases[public_alias])
+                    for public_alias in request.args[1]
+                    if public_alias in aliases
+                },
+            )
+
+    def _cleanup_aliases(self, request: _Request):
+        try:
+            self._respond(request, alias_manager.cleanup(*request.args))
+        except Exception as exc:
+            logger.exception(exc)
+            self._respond(request, AliasBrokerError(str(exc)))
+
+    def _respond(self, request: _Request, result):
+        # Responses are sent by the serving thread only, so no locking needed.
+        try:
+            request.connection.send((request.request_id, result))
+        except OSError:
+            # The client is gone.
+            pass
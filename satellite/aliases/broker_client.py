@@ -0,0 +1,153 @@
+import itertools
+import os
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing.connection import Client, Connection
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from . import AliasGeneratorType, AliasStoreType
+from ..db.models.alias import Alias
+
+
+ALIAS_FIELDS = [
+    'id',
+    'created_at',
+    'value',
+    'alias_generator',
+    'public_alias',
+    'expires_at',
+]
+
+# Request methods
+GET_OR_CREATE_ALIASES = 'get_or_create_aliases'
+GET_ALIASES = 'get_aliases'
+CLEANUP_ALIASES = 'cleanup_aliases'
+STOP = 'stop'
+
+
+class AliasBrokerError(Exception):
+    pass
+
+
+class AliasBrokerClient:
+    """Client of the alias broker.
+
+    Requests from all the threads of a process are pipelined over a single
+    connection: a request is sent without waiting for responses to the
+    previous ones and responses are matched to requests by IDs.
+    """
+
+    def __init__(self, address: str, authkey: bytes, timeout: float = 30):
+        self._address = address
+        self._authkey = authkey
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._connection: Optional[Connection] = None
+        self._pid: Optional[int] = None
+        self._futures: Dict[int, Future] = {}
+        self._request_ids = itertools.count()
+
+    def get_or_create_aliases(
+        self,
+        values: List[Tuple[str, AliasGeneratorType]],
+        store_type: AliasStoreType,
+    ) -> Tuple[Dict[Tuple[str, AliasGeneratorType], Alias], Set[str]]:
+        aliases, created = self.call(GET_OR_CREATE_ALIASES, store_type, values)
+        return (
+            {key: alias_from_dict(alias) for key, alias in aliases.items()},
+            created,
+        )
+
+    def get_aliases(
+        self,
+        public_aliases: List[str],
+        store_type: AliasStoreType,
+    ) -> Dict[str, Alias]:
+        aliases = self.call(GET_ALIASES, store_type, public_aliases)
+        return {
+            public_alias: alias_from_dict(alias)
+            for public_alias, alias in aliases.items()
+        }
+
+    def cleanup_aliases(self, limit: Optional[int]) -> int:
+        return self.call(CLEANUP_ALIASES, limit)
+
+    def stop_broker(self):
+        self.call(STOP)
+
+    def call(self, method: str, *args) -> Any:
+        future = Future()
+        with self._lock:
+            connection = self._connect()
+            request_id = next(self._request_ids)
+            self._futures[request_id] = future
+            try:
+                connection.send((request_id, method, args))
+            except OSError as exc:
+                self._disconnect(connection)
+                raise AliasBrokerError(f'Unable to send request: {exc}') from exc
+        try:
+            return future.result(self._timeout)
+        except FutureTimeoutError as exc:
+            raise AliasBrokerError(
+                f'Alias broker request timeout ({self._timeout}) is exceeded.'
+            ) from exc
+
+    def _connect(self) -> Connection:
+        # A connection inherited from a parent process must not be used.
+        if self._connection is None or self._pid != os.getpid():
+            try:
+                connection = Client(
+                    self._address,
+                    family='AF_UNIX',
+                    authkey=self._authkey,
+                )
+            except OSError as exc:
+                raise AliasBrokerError(
+                    f'Unable to connect to alias broker: {exc}'
+                ) from exc
+            self._connection = connection
+            self._pid = os.getpid()
+            self._futures = {}
+            threading.Thread(
+                target=self._receive,
+                args=(connection, self._futures),
+                name='AliasBrokerClient',
+                daemon=True,
+            ).start()
+        return self._connection
+
+    def _disconnect(self, connection: Connection):
+        if self._connection is connection:
+            self._connection = None
+        connection.close()
+
+    def _receive(self, connection: Connection, futures: Dict[int, Future]):
+        while True:
+            try:
+                request_id, result = connection.recv()
+            except (EOFError, OSError):
+                break
+
+            future = futures.pop(request_id, None)
+            if future is None:
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        with self._lock:
+            self._disconnect(connection)
+            pending = list(futures.values())
+            futures.clear()
+        for future in pending:
+            future.set_exception(AliasBrokerError('Alias broker connection lost.'))
+
+
+def alias_to_dict(alias: Alias) -> dict:
+    return {name: getattr(alias, name) for name in ALIAS_FIELDS}
+
+
+def alias_from_dict(data: dict) -> Alias:
+    return Alias(**data)
@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Hashable, List, Optional
+
+from . import AliasGeneratorType
+from ..db.models.alias import Alias
+
+
+@dataclass(frozen=True)
+class AliasCacheStats:
+    hits: int
+    misses: int
+    size: int
+
+
+class AliasCache:
+    """LRU cache of aliases by value (and generator) and by public alias.
+
+    Cached aliases are detached copies, so they can be used in any thread.
+    Expired aliases are never served.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        # Aliases by IDs in LRU order
+        self._aliases: 'OrderedDict[str, Alias]' = OrderedDict()
+        # Alias IDs by lookup keys
+        self._keys: Dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def stats(self) -> AliasCacheStats:
+        return AliasCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            size=len(self._aliases),
+        )
+
+    def get_by_value(
+        self,
+        is_persistent: bool,
+        value: str,
+        generator_type: AliasGeneratorType,
+    ) -> Optional[Alias]:
+        return self._get(('value', is_persistent, value, generator_type))
+
+    def get_by_alias(self, is_persistent: bool, public_alias: str) -> Optional[Alias]:
+        return self._get(('alias', is_persistent, public_alias))
+
+    def put(self, is_persistent: bool, alias: Alias) -> Alias:
+        """Cache an alias and return its cached copy."""
+        alias = Alias(
+            id=alias.id,
+            created_at=alias.created_at,
+            value=alias.value,
+            alias_generator=alias.alias_generator,
+            public_alias=alias.public_alias,
+            expires_at=alias.expires_at,
+        )
+        if self._size <= 0:
+            return alias
+
+        with self._lock:
+            self._pop(alias.id)
+            self._aliases[alias.id] = alias
+            for key in get_lookup_keys(is_persistent, alias):
+                self._keys[key] = alias.id
+            while len(self._aliases) > self._size:
+                self._pop(next(iter(self._aliases)))
+
+        return alias
+
+    def clear(self):
+        with self._lock:
+            self._aliases.clear()
+            self._keys.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def _get(self, key: Hashable) -> Optional[Alias]:
+        with self._lock:
+            alias_id = self._keys.get(key)
+            alias = alias_id and self._aliases.get(alias_id)
+            if alias and _is_expired(alias):
+                self._pop(alias_id)
+                alias = None
+
+            if not alias:
+                self._misses += 1
+                return None
+
+            self._aliases.move_to_end(alias_id)
+            self._hits += 1
+            return alias
+
+    def _pop(self, alias_id: str):
+        alias = self._aliases.pop(alias_id, None)
+        if alias is None:
+            return
+        for is_persistent in [True, False]:
+            for key in get_lookup_keys(is_persistent, alias):
+                if self._keys.get(key) == alias_id:
+                    del self._keys[key]
+
+
+def get_lookup_keys(is_persistent: bool, alias: Alias) -> List[Hashable]:
+    return [
+        ('value', is_persistent, alias.value, alias.alias_generator),
+        ('alias', is_persistent, alias.public_alias),
+    ]
+
+
+def _is_expired(alias: Alias) -> bool:
+    return alias.expires_at is not None and alias.expires_at < datetime.utcnow()
@@ -0,0 +1,16 @@
+import hashlib
+import hmac
+
+
+# Digest size in bytes
+DIGEST_SIZE = 16
+
+
+def make_value_digest(key: bytes, value: str, generator: str) -> str:
+    """Make a keyed digest of a value aliased with a generator.
+
+    The digest is a truncated HMAC-SHA256 of the generator and the value
+    in hex. Generator names contain no colons, so the message is unambiguous.
+    """
+    message = f'{generator}:{value}'.encode()
+    return hmac.new(key, message, hashlib.sha256).hexdigest()[: DIGEST_SIZE * 2]
@@ -1,8 +1,13 @@
+import hashlib
+import hmac
+import os
 import random
 import re
+import threading
 import uuid
 from abc import ABC, abstractmethod
-from typing import Iterable, List, Set, Type
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, NamedTuple, Tuple, Type
 
 from base58 import b58encode
 
@@ -10,18 +15,33 @@ from . import AliasGeneratorType
 
 
 class AliasGenerator(ABC):
+    # Whether generated aliases are unique in practice (e.g. random UUIDs), so
+    # they can be used before they are saved.
+    collision_free: bool = False
+    # Whether a value always gets the same alias, so regenerating a taken
+    # alias is pointless.
+    deterministic: bool = False
+
     @abstractmethod
     def generate(self, value: str) -> str:
         pass
 
+    def generate_many(self, values: Iterable[str]) -> List[str]:
+        """Generate aliases of values (in the order of the values)."""
+        return [self.generate(value) for value in values]
+
 
 class UUID(AliasGenerator):
+    collision_free = True
+
     def generate(self, value: str) -> str:
         value = str(uuid.uuid4())
         return f'tok_sat_{b58encode(value).decode("UTF-8")}'[:30]
 
 
 class RawUUID(AliasGenerator):
+    collision_free = True
+
     def generate(self, value: str) -> str:
         return str(uuid.uuid4())
 
@@ -38,6 +58,23 @@ class ValidatingAliasGenerator(AliasGenerator):
             return self.fallback_generator_cls().generate(value)
         return self._generate(value)
 
+    def generate_many(self, values: Iterable[str]) -> List[str]:
+        values = list(values)
+        aliases = [None] * len(values)
+        invalid_indexes = []
+        for idx, value in enumerate(values):
+            if self.is_valid(value):
+                aliases[idx] = self._generate(value)
+            else:
+                invalid_indexes.append(idx)
+        if invalid_indexes:
+            fallback_aliases = self.fallback_generator_cls().generate_many(
+                values[idx] for idx in invalid_indexes
+            )
+            for idx, alias in zip(invalid_indexes, fallback_aliases):
+                aliases[idx] = alias
+        return aliases
+
     @abstractmethod
     def _generate(self, value: str) -> str:
         pass
@@ -52,18 +89,12 @@ class LuhnValidCardNumber(ValidatingAliasGenerator):
         return super().is_valid(value) and check_luhn(value)
 
     def _generate(self, value: str) -> str:
-        card_len = len(value)
-        fixed_indexes = set()
-        for s in self.fixed_digits:
-            start, stop, _ = s.indices(card_len)
-            fixed_indexes.update(range(start, stop))
-        loose_indexes = set(range(card_len)) - fixed_indexes
-
-        digits = _random_digits(map(int, value), loose_indexes)
+        plan = _get_position_plan(type(self), len(value))
+        digits = _random_digits(_to_digits(value), plan.loose_indexes)
 
         m = _mod10(digits)
         if m != 0:
-            idx = next(iter(loose_indexes))
+            idx = plan.loose_indexes[0]
             r_idx = len(digits) - idx - 1
             if r_idx % 2:
                 d = LUHN_DIGITS[digits[idx]]
@@ -80,7 +111,7 @@ class LuhnValidCardNumber(ValidatingAliasGenerator):
                     d -= m
             digits[idx] = d
 
-        return ''.join(map(str, digits))
+        return _from_digits(digits)
 
 
 class LuhnValidCardNumber6T4(LuhnValidCardNumber):
@@ -94,6 +125,67 @@ class LuhnValidCardNumberT4(LuhnValidCardNumber):
     fixed_digits = [slice(-4, None)]
 
 
+class KeyedLuhnValidCardNumber(LuhnValidCardNumber):
+    """Deterministic keyed format-preserving card number aliases.
+
+    Loose digits but the last one are encrypted with an FF1-style Feistel
+    network over decimal digits (the fixed digits and the length are used as
+    a tweak) and the last loose digit is set to keep the Luhn validity. So the
+    same value always yields the same alias, and distinct values of the same
+    fixed digits yield distinct aliases.
+
+    The generator only makes aliases deterministic: aliases are stored and
+    revealed like aliases of the other generators (with a DB lookup).
+
+    The key is generated once per DB unless it is passed explicitly.
+    """
+
+    deterministic = True
+
+    def __init__(self, key: bytes = None):
+        self._key = key
+
+    def _generate(self, value: str) -> str:
+        digits = _to_digits(value)
+        plan = _get_position_plan(type(self), len(digits))
+        *cipher_indexes, check_index = plan.loose_indexes
+
+        tweak = ''.join(
+            '_' if i in plan.loose_index_set else str(d) for i, d in enumerate(digits)
+        )
+        cipher_digits = ''.join(str(digits[i]) for i in cipher_indexes)
+        cipher_digits = _feistel(self._get_key(), tweak.encode(), cipher_digits)
+        for i, d in zip(cipher_indexes, cipher_digits):
+            digits[i] = int(d)
+
+        for d in range(10):
+            digits[check_index] = d
+            if _mod10(digits) == 0:
+                break
+
+        return _from_digits(digits)
+
+    def _get_key(self) -> bytes:
+        if self._key is not None:
+            return self._key
+
+        from ..db import get_engine
+        from ..db.models.secret import ALIAS_FPE_KEY, get_secret
+
+        return get_secret(get_engine(), ALIAS_FPE_KEY)
+
+
+class KeyedLuhnValidCardNumber6T4(KeyedLuhnValidCardNumber):
+    accepted_format: re.Pattern = LuhnValidCardNumber6T4.accepted_format
+    fallback_generator_cls: Type[AliasGenerator] = UUID
+    fixed_digits = LuhnValidCardNumber6T4.fixed_digits
+
+
+class KeyedLuhnValidCardNumberT4(KeyedLuhnValidCardNumber):
+    accepted_format: re.Pattern = LuhnValidCardNumberT4.accepted_format
+    fixed_digits = LuhnValidCardNumberT4.fixed_digits
+
+
 class LuhnValidCardNumberPFPT(LuhnValidCardNumber):
     accepted_format: re.Pattern = re.compile(r'\d{13,19}')
     fixed_digits = [slice(None, 5), slice(-4, None)]
@@ -108,10 +200,10 @@ class LuhnInvalidCardNumber(ValidatingAliasGenerator):
     fallback_generator_cls: Type[AliasGenerator] = RawUUID
 
     def _generate(self, value: str) -> str:
-        digits = [random.randint(0, 9) for _ in range(len(value))]
+        digits = _random_digit_buffer.take(len(value))
         if _mod10(digits) == 0:
             digits[-1] = (digits[-1] + 1) % 10
-        return ''.join(map(str, digits))
+        return _from_digits(digits)
 
 
 class NumLenPreserving(ValidatingAliasGenerator):
@@ -119,7 +211,8 @@ class NumLenPreserving(ValidatingAliasGenerator):
     fallback_generator_cls: Type[AliasGenerator] = RawUUID
 
     def _generate(self, value: str) -> str:
-        return ''.join(map(str, _random_digits(map(int, value))))
+        digits = _to_digits(value)
+        return _from_digits(_random_digits(digits, range(len(digits))))
 
 
 def get_alias_generator(generator_type: AliasGeneratorType) -> AliasGenerator:
@@ -128,7 +221,9 @@ def get_alias_generator(generator_type: AliasGeneratorType) -> AliasGenerator:
 
 _supported_generators = {
     AliasGeneratorType.FPE_SIX_T_FOUR: LuhnValidCardNumber6T4(),
+    AliasGeneratorType.FPE_SIX_T_FOUR_KEYED: KeyedLuhnValidCardNumber6T4(),
     AliasGeneratorType.FPE_T_FOUR: LuhnValidCardNumberT4(),
+    AliasGeneratorType.FPE_T_FOUR_KEYED: KeyedLuhnValidCardNumberT4(),
     AliasGeneratorType.NON_LUHN_FPE_ALPHANUMERIC: LuhnInvalidCardNumber(),
     AliasGeneratorType.NUM_LENGTH_PRESERVING: NumLenPreserving(),
     AliasGeneratorType.PFPT: LuhnValidCardNumberPFPT(),
@@ -141,26 +236,107 @@ LUHN_DIGITS = [0, 2, 4, 6, 8, 1, 3, 5, 7, 9]
 
 
 def _mod10(digits: List[int]) -> int:
-    return sum(LUHN_DIGITS[d] if i % 2 else d for i, d in enumerate(digits[::-1])) % 10
+    doubled = sum(LUHN_DIGITS[d] for d in digits[-2::-2])
+    return (sum(digits[-1::-2]) + doubled) % 10
+
+
+class _PositionPlan(NamedTuple):
+    # Indexes of the digits replaced in aliases (in ascending order)
+    loose_indexes: Tuple[int, ...]
+    loose_index_set: FrozenSet[int]
+
+
+@lru_cache(maxsize=256)
+def _get_position_plan(
+    generator_cls: Type[LuhnValidCardNumber],
+    card_len: int,
+) -> _PositionPlan:
+    fixed_indexes = set()
+    for s in generator_cls.fixed_digits:
+        start, stop, _ = s.indices(card_len)
+        fixed_indexes.update(range(start, stop))
+    loose_indexes = tuple(i for i in range(card_len) if i not in fixed_indexes)
+    return _PositionPlan(loose_indexes, frozenset(loose_indexes))
+
+
+# Number of random digits drawn at once
+RANDOM_BUFFER_SIZE = 4096
+
+_DIGITS = range(10)
+
+
+class _RandomDigitBuffer(threading.local):
+    """Per-thread buffer of random digits drawn in bulk."""
+
+    def __init__(self):
+        self._digits: List[int] = []
+        self._pid = os.getpid()
+
+    def take(self, count: int) -> List[int]:
+        if not count:
+            return []
+        # Digits inherited from a parent process must not be reused.
+        if self._pid != os.getpid():
+            self._digits = []
+            self._pid = os.getpid()
+        if len(self._digits) < count:
+            self._digits.extend(
+                random.choices(_DIGITS, k=max(count, RANDOM_BUFFER_SIZE))
+            )
+        digits = self._digits[-count:]
+        del self._digits[-count:]
+        return digits
+
+
+_random_digit_buffer = _RandomDigitBuffer()
+
+
+def _random_digits(digits: List[int], loose_indexes: Iterable[int]) -> List[int]:
+    """Replace the loose digits with random different ones (in place)."""
+    loose_indexes = list(loose_indexes)
+    for i, v in zip(loose_indexes, _random_digit_buffer.take(len(loose_indexes))):
+        d = digits[i]
+        digits[i] = (d + 1) % 10 if v == d else v
+    return digits
+
+
+_TO_DIGITS = bytes.maketrans(b'0123456789', bytes(_DIGITS))
+_FROM_DIGITS = bytes.maketrans(bytes(_DIGITS), b'0123456789')
+
+
+def _to_digits(value: str) -> List[int]:
+    if value.isascii():
+        return list(value.encode().translate(_TO_DIGITS))
+    # Other Unicode decimal digits are accepted by the validation regexps.
+    return [int(c) for c in value]
+
+
+def _from_digits(digits: List[int]) -> str:
+    return bytes(digits).translate(_FROM_DIGITS).decode()
+
+
+FEISTEL_ROUNDS = 10
 
 
-def _random_digits(
-    digits: Iterable[int],
-    loose_indexes: Set[int] = None,
-) -> List[int]:
-    result = []
-    for i, d in enumerate(digits):
-        if not loose_indexes or i in loose_indexes:
-            v = random.randint(0, 9)
-            if v == d:
-                v = (d + 1) % 10
-        else:
-            v = d
+def _feistel(key: bytes, tweak: bytes, digits: str) -> str:
+    """Encrypt a decimal digit string preserving its length."""
+    n = len(digits)
+    if n < 2:
+        return digits
+    u = n // 2
+    a, b = digits[:u], digits[u:]
 
-        result.append(v)
+    def round_value(i: int, half: str, m: int) -> int:
+        message = b'|'.join([tweak, str(n).encode(), bytes([i]), half.encode()])
+        digest = hmac.new(key, message, hashlib.sha256).digest()
+        return int.from_bytes(digest, 'big') % 10**m
 
-    return result
+    for i in range(FEISTEL_ROUNDS):
+        m = u if i % 2 == 0 else n - u
+        c = (int(a) + round_value(i, b, m)) % 10**m
+        a, b = b, str(c).zfill(m)
+    return a + b
 
 
 def check_luhn(card_number: str) -> bool:
-    return _mod10(list(map(int, card_number))) == 0
+    return _mod10(_to_digits(card_number)) == 0
@@ -1,37 +1,132 @@
+import threading
 import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
 from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from satellite.config import get_config
-from . import AliasGeneratorType, AliasNotFound, AliasStoreType
+from . import (
+    AliasCollision,
+    AliasGeneratorType,
+    AliasNotFound,
+    AliasStoreType,
+    RedactFailed,
+)
+from .bloom import AliasFilterStats
+from .broker_client import AliasBrokerClient
+from .cache import AliasCache, AliasCacheStats
 from .generators import get_alias_generator
-from .store import AliasStore
+from .store import (
+    AliasStore,
+    configure as configure_store,
+    get_filter_stats as get_store_filter_stats,
+)
+from .write_behind import AliasWriteBehind
 from .. import audit_logs
 from .. import ctx
 from ..db.models.alias import Alias
 
 
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_WRITE_BEHIND_BATCH_SIZE = 1000
+
+# Max number of attempts to generate a public alias which is not taken.
+MAX_ALIAS_GENERATION_ATTEMPTS = 5
+
+
+@dataclass(frozen=True)
+class AliasCollisionStats:
+    generated: int
+    collisions: int
+
+    @property
+    def collision_rate(self) -> float:
+        return self.collisions / self.generated if self.generated else 0.0
+
+
+def configure(
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    write_behind_interval: int = 0,
+    write_behind_batch_size: int = DEFAULT_WRITE_BEHIND_BATCH_SIZE,
+    volatile_in_memory: bool = False,
+):
+    """Configure alias management.
+
+    write_behind_interval is in milliseconds. If it is positive new aliases are
+    saved to the DB in the background with group commits (every interval or
+    write_behind_batch_size aliases) instead of a commit per redact call.
+
+    If volatile_in_memory is set volatile aliases are kept in the process
+    memory instead of the DB.
+    """
+    global _cache
+    global _write_behind
+
+    _cache = AliasCache(cache_size)
+    configure_store(volatile_in_memory=volatile_in_memory)
+
+    if _write_behind:
+        _write_behind.stop()
+    _write_behind = None
+    if write_behind_interval > 0:
+        _write_behind = AliasWriteBehind(
+            interval=write_behind_interval / 1000,
+            batch_size=write_behind_batch_size,
+        )
+
+
+def use_broker(broker: Optional[AliasBrokerClient]):
+    """Delegate cache misses to the alias broker (None to use the DB directly)."""
+    global _broker
+    _broker = broker
+
+
+def flush():
+    """Save the aliases pending in the write-behind buffer (if any)."""
+    if _write_behind:
+        _write_behind.flush()
+
+
+def get_cache_stats() -> AliasCacheStats:
+    return _cache.stats
+
+
+def get_filter_stats() -> AliasFilterStats:
+    """Get stats of the filter of public aliases present in the DB."""
+    return get_store_filter_stats()
+
+
+def get_collision_stats() -> Dict[AliasGeneratorType, AliasCollisionStats]:
+    """Get public alias collision stats by generator types."""
+    with _collision_stats_lock:
+        return {
+            generator_type: AliasCollisionStats(*counters)
+            for generator_type, counters in _collision_stats.items()
+        }
+
+
 def redact(
     value: str,
     generator_type: AliasGeneratorType,
     store_type: AliasStoreType,
 ) -> Alias:
-    make_log_record = None
-    flow_context = ctx.get_flow_context()
-    if flow_context:
-        make_log_record = partial(
-            audit_logs.records.VaultRecordUsageLogRecord,
-            alias_generator=generator_type,
-            flow_id=flow_context.flow.id,
-            phase=flow_context.phase,
-            proxy_mode=ctx.get_proxy_context().mode,
-            route_id=ctx.get_route_context().route.id,
-            record_type=store_type,
-        )
+    if _broker:
+        return redact_many([(value, generator_type)], store_type)[0]
+
+    make_log_record = _get_log_record_factory(store_type)
+    if make_log_record:
+        make_log_record = partial(make_log_record, alias_generator=generator_type)
 
     alias_store = _get_store(store_type)
-    aliases = alias_store.get_by_value(value, generator_type)
-    if aliases:
-        alias = aliases[0]
+    alias = _cache.get_by_value(alias_store.is_persistent, value, generator_type)
+    if alias is None and not _is_deterministic(value, generator_type):
+        alias = _find_by_value(alias_store, value, generator_type)
+        if alias:
+            alias = _cache.put(alias_store.is_persistent, alias)
+
+    if alias:
         if make_log_record:
             audit_logs.emit(
                 make_log_record(
@@ -41,20 +136,25 @@ def redact(
             )
         return alias
 
-    generator = get_alias_generator(generator_type)
     alias_id = str(uuid.uuid4())
     alias = Alias(
         id=alias_id,
+        created_at=datetime.utcnow(),
         value=value,
         alias_generator=generator_type,
-        public_alias=generator.generate(value),
+        public_alias=_generate(generator_type, [value])[0],
     )
-    alias_store.save(alias)
+    alias = _save(alias_store, [alias])[0]
+    alias = _cache.put(alias_store.is_persistent, alias)
 
     if make_log_record:
         audit_logs.emit(
             make_log_record(
-                action_type=audit_logs.records.ActionType.CREATED,
+                action_type=(
+                    audit_logs.records.ActionType.CREATED
+                    if alias.id == alias_id
+                    else audit_logs.records.ActionType.DE_DUPE
+                ),
                 record_id=alias.id,
             )
         )
@@ -62,28 +162,444 @@ def redact(
     return alias
 
 
+def redact_many(
+    values: List[Tuple[str, AliasGeneratorType]],
+    store_type: AliasStoreType,
+) -> List[Alias]:
+    """Redact (value, generator type) pairs in bulk.
+
+    Existing aliases are looked up with a single query (per chunk) and new
+    aliases are saved in a single transaction. Aliases are returned in the
+    order of the values.
+    """
+    make_log_record = _get_log_record_factory(store_type)
+    is_persistent = store_type == AliasStoreType.PERSISTENT
+
+    aliases: Dict[Tuple[str, AliasGeneratorType], Alias] = {}
+    missing = []
+    for key in dict.fromkeys(values):
+        alias = _cache.get_by_value(is_persistent, *key)
+        if alias is None:
+            missing.append(key)
+        else:
+            aliases[key] = alias
+
+    created = set()
+    if missing:
+        found, created = get_or_create_aliases(missing, store_type)
+        for key, alias in found.items():
+            aliases[key] = _cache.put(is_persistent, alias)
+
+    if make_log_record:
+        for value, generator_type in values:
+            alias = aliases[(value, generator_type)]
+            if alias.id in created:
+                action_type = audit_logs.records.ActionType.CREATED
+                created.remove(alias.id)
+            else:
+                action_type = audit_logs.records.ActionType.DE_DUPE
+            audit_logs.emit(
+                make_log_record(
+                    action_type=action_type,
+                    alias_generator=generator_type,
+                    record_id=alias.id,
+                )
+            )
+
+    return [aliases[key] for key in values]
+
+
 def reveal(alias: str, store_type: AliasStoreType) -> Alias:
+    if _broker:
+        revealed, _ = reveal_many([alias], store_type)
+        if alias not in revealed:
+            raise AliasNotFound('Alias was not found!')
+        return revealed[alias]
+
     alias_store = _get_store(store_type)
-    alias_entity = alias_store.get_by_alias(alias)
-    if not alias_entity:
-        raise AliasNotFound('Alias was not found!')
+    alias_entity = _cache.get_by_alias(alias_store.is_persistent, alias)
+    if alias_entity is None:
+        alias_entity = _find_by_alias(alias_store, alias)
+        if not alias_entity:
+            raise AliasNotFound('Alias was not found!')
+        alias_entity = _cache.put(alias_store.is_persistent, alias_entity)
+
+    make_log_record = _get_log_record_factory(store_type)
+    if make_log_record:
+        audit_logs.emit(_make_retrieved_log_record(make_log_record, alias_entity))
+
+    return alias_entity
+
+
+def reveal_many(
+    aliases: Iterable[str],
+    store_type: AliasStoreType,
+) -> Tuple[Dict[str, Alias], Set[str]]:
+    """Reveal public aliases in bulk.
+
+    Aliases missing in the cache are fetched with a single query (per chunk).
+    Returns revealed aliases by public aliases (in the order of the aliases)
+    and a set of unknown public aliases.
+    """
+    is_persistent = store_type == AliasStoreType.PERSISTENT
+    aliases = list(dict.fromkeys(aliases))
+
+    found: Dict[str, Alias] = {}
+    missing = []
+    for public_alias in aliases:
+        alias = _cache.get_by_alias(is_persistent, public_alias)
+        if alias is None:
+            missing.append(public_alias)
+        else:
+            found[public_alias] = alias
+
+    if missing:
+        for public_alias, alias in get_aliases(missing, store_type).items():
+            found[public_alias] = _cache.put(is_persistent, alias)
+
+    revealed = {}
+    unknown = set()
+    for public_alias in aliases:
+        if public_alias in found:
+            revealed[public_alias] = found[public_alias]
+        else:
+            unknown.add(public_alias)
 
+    make_log_record = _get_log_record_factory(store_type)
+    if make_log_record:
+        for alias in revealed.values():
+            audit_logs.emit(_make_retrieved_log_record(make_log_record, alias))
+
+    return revealed, unknown
+
+
+def get_or_create_aliases(
+    values: List[Tuple[str, AliasGeneratorType]],
+    store_type: AliasStoreType,
+) -> Tuple[Dict[Tuple[str, AliasGeneratorType], Alias], Set[str]]:
+    """Get aliases of unique (value, generator type) pairs creating missing ones.
+
+    Unlike redact_many neither uses the cache nor emits audit logs. Returns
+    aliases by the pairs and IDs of the created aliases.
+    """
+    if _broker:
+        return _broker.get_or_create_aliases(values, store_type)
+
+    alias_store = _get_store(store_type)
+    is_persistent = alias_store.is_persistent
+
+    aliases = {}
+    if _write_behind:
+        for key in values:
+            alias = _write_behind.get_by_value(is_persistent, *key)
+            if alias is not None:
+                aliases[key] = alias
+
+    missing = [key for key in values if key not in aliases]
+    to_look_up = [key for key in missing if not _is_deterministic(*key)]
+    if to_look_up:
+        stored_aliases = alias_store.get_by_values(to_look_up)
+        for key in to_look_up:
+            alias = stored_aliases.get(key)
+            if alias is not None:
+                aliases[key] = alias
+
+    new_values = defaultdict(list)
+    for value, generator_type in missing:
+        if (value, generator_type) not in aliases:
+            new_values[generator_type].append(value)
+
+    new_aliases = []
+    created_at = datetime.utcnow()
+    for generator_type, values_to_alias in new_values.items():
+        alias_ids = [str(uuid.uuid4()) for _ in values_to_alias]
+        public_aliases = _generate(generator_type, values_to_alias)
+        for alias_id, value, public_alias in zip(
+            alias_ids, values_to_alias, public_aliases
+        ):
+            new_aliases.append(
+                Alias(
+                    id=alias_id,
+                    created_at=created_at,
+                    value=value,
+                    alias_generator=generator_type,
+                    public_alias=public_alias,
+                )
+            )
+    created = set()
+    if new_aliases:
+        new_ids = {alias.id for alias in new_aliases}
+        for alias in _save(alias_store, new_aliases):
+            aliases[(alias.value, alias.alias_generator)] = alias
+            if alias.id in new_ids:
+                created.add(alias.id)
+
+    return aliases, created
+
+
+def get_aliases(
+    public_aliases: List[str],
+    store_type: AliasStoreType,
+) -> Dict[str, Alias]:
+    """Get aliases by public aliases.
+
+    Unlike reveal_many neither uses the cache nor emits audit logs.
+    """
+    if _broker:
+        return _broker.get_aliases(public_aliases, store_type)
+
+    alias_store = _get_store(store_type)
+
+    aliases = {}
+    if _write_behind:
+        for public_alias in public_aliases:
+            alias = _write_behind.get_by_alias(alias_store.is_persistent, public_alias)
+            if alias is not None:
+                aliases[public_alias] = alias
+
+    missing = [alias for alias in public_aliases if alias not in aliases]
+    if missing:
+        aliases.update(alias_store.get_by_aliases(missing))
+
+    return aliases
+
+
+def cleanup(limit: int = None) -> int:
+    """Delete expired aliases (at most `limit` DB rows if it is set).
+
+    With the broker the aliases are deleted by the broker process (the only
+    writer of the aliases table), in-memory volatile aliases of the broker are
+    evicted as well.
+    """
+    if _broker:
+        return _broker.cleanup_aliases(limit)
+    return AliasStore.cleanup(limit=limit)
+
+
+def _get_log_record_factory(
+    store_type: AliasStoreType,
+) -> Optional[Callable[..., audit_logs.records.VaultRecordUsageLogRecord]]:
     flow_context = ctx.get_flow_context()
-    if flow_context:
-        audit_logs.emit(
-            audit_logs.records.VaultRecordUsageLogRecord(
-                alias_generator=alias_entity.alias_generator,
-                flow_id=flow_context.flow.id,
-                phase=flow_context.phase,
-                proxy_mode=ctx.get_proxy_context().mode,
-                route_id=ctx.get_route_context().route.id,
-                action_type=audit_logs.records.ActionType.RETRIEVED,
-                record_type=store_type,
-                record_id=alias_entity.id,
+    if not flow_context:
+        return None
+
+    return partial(
+        audit_logs.records.VaultRecordUsageLogRecord,
+        flow_id=flow_context.flow.id,
+        phase=flow_context.phase,
+        proxy_mode=ctx.get_proxy_context().mode,
+        route_id=ctx.get_route_context().route.id,
+        record_type=store_type,
+    )
+
+
+def _is_deterministic(value: str, generator_type: AliasGeneratorType) -> bool:
+    """Whether a value gets the same alias each time.
+
+    Such aliases are saved without looking up existing aliases of the values:
+    an existing alias takes the public alias, so it is found on the collision
+    (see _find_same_aliases).
+    """
+    generator = get_alias_generator(generator_type)
+    return generator.deterministic and generator.is_valid(value)
+
+
+def _find_by_value(
+    alias_store: AliasStore,
+    value: str,
+    generator_type: AliasGeneratorType,
+) -> Optional[Alias]:
+    if _write_behind:
+        alias = _write_behind.get_by_value(
+            alias_store.is_persistent,
+            value,
+            generator_type,
+        )
+        if alias:
+            return alias
+    aliases = alias_store.get_by_value(value, generator_type)
+    return aliases[0] if aliases else None
+
+
+def _find_by_alias(alias_store: AliasStore, public_alias: str) -> Optional[Alias]:
+    if _write_behind:
+        alias = _write_behind.get_by_alias(alias_store.is_persistent, public_alias)
+        if alias:
+            return alias
+    return alias_store.get_by_alias(public_alias)
+
+
+def _save(alias_store: AliasStore, aliases: List[Alias]) -> List[Alias]:
+    """Save new aliases regenerating public aliases which are taken.
+
+    Only aliases of collision free generators are saved with the write-behind.
+    Other aliases are saved before they are returned, since their public
+    aliases might be taken by another process before a deferred save.
+
+    Returns the aliases to use (in the order of the new aliases): a new alias
+    is replaced with an existing one of the same value if it takes the public
+    alias (see _find_same_aliases).
+    """
+    immediate = []
+    deferred = []
+    for alias in aliases:
+        generator = get_alias_generator(alias.alias_generator)
+        if _write_behind and generator.collision_free:
+            deferred.append(alias)
+        else:
+            immediate.append(alias)
+    existing = {}
+    if immediate:
+        existing.update(_save_unique(alias_store, alias_store.save_many, immediate))
+    if deferred:
+        existing.update(
+            _save_unique(alias_store, partial(_write_behind.add, alias_store), deferred)
+        )
+    return [existing.get(alias.id, alias) for alias in aliases]
+
+
+def _save_unique(
+    alias_store: AliasStore,
+    save: Callable[[List[Alias]], None],
+    aliases: List[Alias],
+) -> Dict[str, Alias]:
+    """Save aliases. Returns existing aliases used instead of new ones by IDs.
+
+    Public aliases which are still taken after the last attempt (e.g. in a
+    small alias space) are generated by the fallback generators. So are taken
+    public aliases of deterministic generators right away, since they would be
+    regenerated the same.
+    """
+    existing = {}
+    for attempt in range(MAX_ALIAS_GENERATION_ATTEMPTS + 1):
+        try:
+            save(aliases)
+            return existing
+        except AliasCollision as exc:
+            collided = [
+                alias for alias in aliases if alias.public_alias in exc.public_aliases
+            ]
+            same, replaced = _find_same_aliases(alias_store, collided)
+            existing.update(same)
+            aliases = [alias for alias in aliases if alias.id not in same]
+            if not aliases:
+                return existing
+            if attempt == MAX_ALIAS_GENERATION_ATTEMPTS:
+                break
+            _regenerate(
+                [
+                    alias
+                    for alias in collided
+                    if alias.id not in same and alias.public_alias not in replaced
+                ],
+                use_fallback=attempt == MAX_ALIAS_GENERATION_ATTEMPTS - 1,
             )
+    raise RedactFailed('Unable to generate unique aliases.')
+
+
+def _find_same_aliases(
+    alias_store: AliasStore,
+    aliases: List[Alias],
+) -> Tuple[Dict[str, Alias], Set[str]]:
+    """Find stored aliases of the same values taking public aliases of new ones.
+
+    Deterministic generators (e.g. keyed ones) generate the same public alias
+    for a value each time, so it might be taken by an alias of the value saved
+    before, saved by another process, saved for another store type or expired.
+    Regenerating such an alias makes no sense: an existing alias is used
+    instead (volatile one is made persistent for the persistent store) and an
+    expired one is deleted. Returns the existing aliases by the new alias IDs
+    and public aliases of the deleted ones.
+    """
+    stored = alias_store.get_stored_by_aliases(alias.public_alias for alias in aliases)
+    now = datetime.utcnow()
+    same = {}
+    expired = []
+    volatile = []
+    taken_by_others = []
+    for alias in aliases:
+        stored_alias = stored.get(alias.public_alias)
+        if stored_alias is None:
+            continue
+        if (stored_alias.value, stored_alias.alias_generator) != (
+            alias.value,
+            alias.alias_generator,
+        ):
+            if _is_deterministic(alias.value, alias.alias_generator):
+                taken_by_others.append(alias)
+            continue
+        if stored_alias.expires_at is not None and stored_alias.expires_at < now:
+            expired.append(stored_alias)
+            continue
+        if alias_store.is_persistent and stored_alias.expires_at is not None:
+            volatile.append(stored_alias)
+        same[alias.id] = stored_alias
+
+    if taken_by_others:
+        # Existing aliases of such values are generated by the fallback
+        # generator, so they are looked up by the values.
+        found = alias_store.get_by_values(
+            (alias.value, alias.alias_generator) for alias in taken_by_others
         )
+        for alias in taken_by_others:
+            existing_alias = found.get((alias.value, alias.alias_generator))
+            if existing_alias is not None:
+                same[alias.id] = existing_alias
 
-    return alias_entity
+    replaced = {alias.public_alias for alias in expired}
+    if expired:
+        alias_store.delete_expired(expired)
+    if volatile:
+        alias_store.make_persistent(volatile)
+    return same, replaced
+
+
+def _generate(
+    generator_type: AliasGeneratorType,
+    values: List[str],
+    use_fallback: bool = False,
+) -> List[str]:
+    generator = get_alias_generator(generator_type)
+    fallback_generator_cls = getattr(generator, 'fallback_generator_cls', None)
+    if use_fallback and fallback_generator_cls is not None:
+        generator = fallback_generator_cls()
+    public_aliases = generator.generate_many(values)
+    with _collision_stats_lock:
+        _collision_stats[generator_type][0] += len(public_aliases)
+    return public_aliases
+
+
+def _regenerate(aliases: List[Alias], use_fallback: bool = False):
+    aliases_by_generator = defaultdict(list)
+    for alias in aliases:
+        aliases_by_generator[alias.alias_generator].append(alias)
+
+    for generator_type, generator_aliases in aliases_by_generator.items():
+        with _collision_stats_lock:
+            _collision_stats[generator_type][1] += len(generator_aliases)
+        generator = get_alias_generator(generator_type)
+        if generator.deterministic and not getattr(
+            generator, 'fallback_generator_cls', None
+        ):
+            raise RedactFailed('Unable to generate unique aliases.')
+        public_aliases = _generate(
+            generator_type,
+            [alias.value for alias in generator_aliases],
+            use_fallback or generator.deterministic,
+        )
+        for alias, public_alias in zip(generator_aliases, public_aliases):
+            alias.public_alias = public_alias
+
+
+def _make_retrieved_log_record(
+    make_log_record: Callable[..., audit_logs.records.VaultRecordUsageLogRecord],
+    alias: Alias,
+) -> audit_logs.records.VaultRecordUsageLogRecord:
+    return make_log_record(
+        action_type=audit_logs.records.ActionType.RETRIEVED,
+        alias_generator=alias.alias_generator,
+        record_id=alias.id,
+    )
 
 
 def _get_store(store_type: AliasStoreType) -> AliasStore:
@@ -92,3 +608,11 @@ def _get_store(store_type: AliasStoreType) -> AliasStore:
     elif store_type == AliasStoreType.VOLATILE:
         return AliasStore(get_config().volatile_aliases_ttl)
     raise Exception(f'Unknown alias store type: {store_type}')
+
+
+_cache = AliasCache(DEFAULT_CACHE_SIZE)
+_write_behind: Optional[AliasWriteBehind] = None
+_broker: Optional[AliasBrokerClient] = None
+# [generated, collisions] by generator types
+_collision_stats: Dict[AliasGeneratorType, List[int]] = defaultdict(lambda: [0, 0])
+_collision_stats_lock = threading.Lock()
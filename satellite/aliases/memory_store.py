@@ -0,0 +1,139 @@
+import heapq
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from . import AliasCollision, AliasGeneratorType
+from ..db.models.alias import Alias
+
+
+class MemoryAliasStore:
+    """In-memory store of volatile aliases.
+
+    Aliases are indexed by values and public aliases. Expired aliases are
+    evicted (in expiration order kept by a min-heap) on every store access,
+    so memory is bounded by the number of aliases created within the TTL.
+    """
+
+    def __init__(self):
+        self._aliases: Dict[str, Alias] = {}
+        # Alias IDs by values in creation order
+        self._by_value: Dict[str, List[str]] = {}
+        # Alias IDs by public aliases
+        self._by_alias: Dict[str, str] = {}
+        # (expires_at, alias ID) min-heap
+        self._expiration_heap: List[Tuple[datetime, str]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._aliases)
+
+    def get_by_value(
+        self,
+        value: str,
+        generator_type: AliasGeneratorType = None,
+    ) -> List[Alias]:
+        with self._lock:
+            self._evict_expired()
+            aliases = [
+                self._aliases[alias_id] for alias_id in self._by_value.get(value, [])
+            ]
+        if generator_type is not None:
+            aliases = [
+                alias for alias in aliases if alias.alias_generator == generator_type
+            ]
+        return aliases
+
+    def get_by_values(
+        self,
+        keys: Iterable[Tuple[str, AliasGeneratorType]],
+    ) -> Dict[Tuple[str, AliasGeneratorType], Alias]:
+        aliases = {}
+        for key in set(keys):
+            found = self.get_by_value(*key)
+            if found:
+                aliases[key] = found[0]
+        return aliases
+
+    def get_by_alias(self, public_alias: str) -> Optional[Alias]:
+        with self._lock:
+            self._evict_expired()
+            alias_id = self._by_alias.get(public_alias)
+            return alias_id and self._aliases[alias_id]
+
+    def get_by_aliases(self, public_aliases: Iterable[str]) -> Dict[str, Alias]:
+        aliases = {}
+        for public_alias in set(public_aliases):
+            alias = self.get_by_alias(public_alias)
+            if alias is not None:
+                aliases[public_alias] = alias
+        return aliases
+
+    def save_many(self, aliases: List[Alias]):
+        with self._lock:
+            self._evict_expired()
+            public_aliases = Counter(alias.public_alias for alias in aliases)
+            taken = {alias for alias, count in public_aliases.items() if count > 1}
+            taken.update(
+                alias.public_alias
+                for alias in aliases
+                if self._by_alias.get(alias.public_alias, alias.id) != alias.id
+            )
+            if taken:
+                raise AliasCollision(taken)
+
+            for alias in aliases:
+                # Column defaults are applied by the DB session otherwise.
+                if alias.id is None:
+                    alias.id = str(uuid.uuid4())
+                if alias.created_at is None:
+                    alias.created_at = datetime.utcnow()
+                self._remove(alias.id)
+                self._aliases[alias.id] = alias
+                self._by_value.setdefault(alias.value, []).append(alias.id)
+                self._by_alias[alias.public_alias] = alias.id
+                heapq.heappush(self._expiration_heap, (alias.expires_at, alias.id))
+
+    def get_taken(self, public_aliases: Iterable[str]) -> Set[str]:
+        with self._lock:
+            self._evict_expired()
+            return {alias for alias in public_aliases if alias in self._by_alias}
+
+    def cleanup(self) -> int:
+        """Evict expired aliases. Returns the number of evicted aliases."""
+        with self._lock:
+            return self._evict_expired()
+
+    def clear(self):
+        with self._lock:
+            self._aliases.clear()
+            self._by_value.clear()
+            self._by_alias.clear()
+            self._expiration_heap.clear()
+
+    def _evict_expired(self) -> int:
+        now = datetime.utcnow()
+        evicted = 0
+        while self._expiration_heap and self._expiration_heap[0][0] < now:
+            expires_at, alias_id = heapq.heappop(self._expiration_heap)
+            alias = self._aliases.get(alias_id)
+            # The heap entry might be left from a replaced alias.
+            if alias is not None and alias.expires_at == expires_at:
+                self._remove(alias_id)
+                evicted += 1
+        return evicted
+
+    def _remove(self, alias_id: str):
+        alias = self._aliases.pop(alias_id, None)
+        if alias is None:
+            return
+
+        alias_ids = self._by_value[alias.value]
+        alias_ids.remove(alias_id)
+        if not alias_ids:
+            del self._by_value[alias.value]
+
+        if self._by_alias.get(alias.public_alias) == alias_id:
+            del self._by_alias[alias.public_alias]
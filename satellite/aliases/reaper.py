@@ -0,0 +1,90 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from tornado.ioloop import IOLoop, PeriodicCallback
+
+from . import manager as alias_manager
+from .store import AliasStore
+
+
+logger = logging.getLogger()
+
+
+@dataclass(frozen=True)
+class AliasReaperRun:
+    deleted: int
+    duration: float  # seconds
+
+
+class AliasReaper:
+    """Deletes expired aliases in bounded batches.
+
+    Batches are deleted in a thread, so even a large cleanup does not block
+    request handling on the IOLoop. The first run is done right after the
+    start and then every `interval` seconds (if the interval is positive).
+
+    Aliases are deleted by the alias broker if it is used. Otherwise in-memory
+    volatile aliases of the current process only are evicted: the proxy
+    processes evict theirs when the aliases are looked up or saved.
+    """
+
+    def __init__(self, interval: int, batch_size: int):
+        self._interval = interval
+        self._batch_size = batch_size
+        self._periodic_callback: Optional[PeriodicCallback] = None
+        self._is_running = False
+        self.last_run: Optional[AliasReaperRun] = None
+
+    def start(self):
+        IOLoop.current().spawn_callback(self.run)
+        if self._interval > 0:
+            self._periodic_callback = PeriodicCallback(
+                lambda: IOLoop.current().spawn_callback(self.run),
+                self._interval * 1000,
+            )
+            self._periodic_callback.start()
+
+    def stop(self):
+        if self._periodic_callback:
+            self._periodic_callback.stop()
+
+    async def run(self) -> Optional[AliasReaperRun]:
+        if self._is_running:
+            return None
+
+        self._is_running = True
+        started_at = time.monotonic()
+        deleted = 0
+        try:
+            while True:
+                batch_deleted = await IOLoop.current().run_in_executor(
+                    None,
+                    alias_manager.cleanup,
+                    self._batch_size,
+                )
+                deleted += batch_deleted
+                if batch_deleted < self._batch_size:
+                    break
+            if deleted:
+                # Deleted aliases are dropped from the public alias filter
+                # (in a thread to keep the IOLoop responsive).
+                await IOLoop.current().run_in_executor(
+                    None,
+                    AliasStore.rebuild_filter,
+                )
+        except Exception as exc:
+            logger.exception(f'Unable to delete expired aliases: {exc}')
+        finally:
+            self._is_running = False
+
+        self.last_run = AliasReaperRun(
+            deleted=deleted,
+            duration=time.monotonic() - started_at,
+        )
+        logger.info(
+            f'Deleted {deleted} expired aliases in '
+            f'{self.last_run.duration * 1000:.1f}ms.'
+        )
+        return self.last_run
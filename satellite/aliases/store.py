@@ -1,16 +1,43 @@
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.query import Query
 
 from satellite.db import get_session
 from satellite.db.models import Alias
-from . import AliasGeneratorType
+from satellite.db.models.alias import get_value_digest
+from . import AliasCollision, AliasGeneratorType
+from .bloom import AliasFilterStats, PublicAliasFilter
+from .memory_store import MemoryAliasStore
+
+
+# Max number of IN (...) query parameters. Kept well below SQLite limit
+# of host parameters (999 for older SQLite versions).
+QUERY_CHUNK_SIZE = 500
+
+
+def configure(volatile_in_memory: bool = False):
+    """Configure whether volatile aliases are kept in memory instead of the DB.
+
+    In-memory aliases are visible to the current process only. The filter of
+    public aliases present in the DB is (re)built as well.
+    """
+    global _memory_store
+    _memory_store = MemoryAliasStore() if volatile_in_memory else None
+    _public_alias_filter.rebuild()
+
+
+def get_filter_stats() -> AliasFilterStats:
+    return _public_alias_filter.stats
 
 
 class AliasStore:
     def __init__(self, ttl: int = None):
         self._ttl = ttl
+        self._memory_store = None if ttl is None else _memory_store
 
     @property
     def is_persistent(self):
@@ -19,13 +46,47 @@ class AliasStore:
     def get_by_value(
         self, value: str, generator_type: AliasGeneratorType = None
     ) -> List[Alias]:
-        query = self._query().filter(Alias.value == value)
+        if self._memory_store is not None:
+            return self._memory_store.get_by_value(value, generator_type)
+        generator_types = list(AliasGeneratorType)
         if generator_type is not None:
-            query = query.filter(Alias.alias_generator == generator_type)
+            generator_types = [generator_type]
+        digests = [_get_value_digest(value, generator) for generator in generator_types]
+        query = self._query().filter(
+            Alias.value_digest.in_(digests),
+            # In case of digest collisions
+            Alias.value == value,
+        )
         return query.order_by('created_at').all()
 
+    def get_by_values(
+        self,
+        keys: Iterable[Tuple[str, AliasGeneratorType]],
+    ) -> Dict[Tuple[str, AliasGeneratorType], Alias]:
+        """Get the oldest aliases by (value, generator type) pairs."""
+        if self._memory_store is not None:
+            return self._memory_store.get_by_values(keys)
+        keys = set(keys)
+        aliases = {}
+        for chunk in _chunks(keys):
+            digests = [_get_value_digest(*key) for key in chunk]
+            query = (
+                self._query()
+                .filter(Alias.value_digest.in_(digests))
+                .order_by('created_at')
+            )
+            for alias in query:
+                key = (alias.value, alias.alias_generator)
+                if key in keys:
+                    aliases.setdefault(key, alias)
+        return aliases
+
     def get_by_alias(self, alias: str) -> Optional[Alias]:
-        return self._query().filter(Alias.public_alias == alias).first()
+        if self._memory_store is not None:
+            return self._memory_store.get_by_alias(alias)
+        if not _public_alias_filter.might_contain(alias):
+            return None
+        return self._query_by_alias().filter(Alias.public_alias == alias).first()
 
     def _query(self) -> Query:
         query = get_session().query(Alias)
@@ -33,18 +94,164 @@ class AliasStore:
             return query.filter(Alias.expires_at.is_(None))
         return query.filter(Alias.expires_at >= datetime.utcnow())
 
+    def _query_by_alias(self) -> Query:
+        if self.is_persistent:
+            return self._query()
+        # Public aliases are unique across the stores. Volatile redaction might
+        # return a persistent alias of a deterministic generator (see
+        # get_stored_by_aliases), so it must be revealed as well.
+        return (
+            get_session()
+            .query(Alias)
+            .filter(
+                or_(Alias.expires_at.is_(None), Alias.expires_at >= datetime.utcnow())
+            )
+        )
+
+    def get_by_aliases(self, aliases: Iterable[str]) -> Dict[str, Alias]:
+        """Get aliases by public aliases."""
+        if self._memory_store is not None:
+            return self._memory_store.get_by_aliases(aliases)
+        result = {}
+        for chunk in _chunks(_public_alias_filter.filter(set(aliases))):
+            query = self._query_by_alias().filter(Alias.public_alias.in_(chunk))
+            for alias in query:
+                result[alias.public_alias] = alias
+        return result
+
+    def get_stored_by_aliases(self, public_aliases: Iterable[str]) -> Dict[str, Alias]:
+        """Get stored aliases by public aliases regardless of the store type.
+
+        Unlike get_by_aliases includes persistent, volatile and expired aliases
+        (which are not deleted yet), e.g. to find aliases taking public aliases.
+        """
+        if self._memory_store is not None:
+            return self._memory_store.get_by_aliases(public_aliases)
+        result = {}
+        query = get_session().query(Alias)
+        for chunk in _chunks(set(public_aliases)):
+            for alias in query.filter(Alias.public_alias.in_(chunk)):
+                result[alias.public_alias] = alias
+        return result
+
     def save(self, alias: Alias):
+        if self._memory_store is not None:
+            self.save_many([alias])
+            return
         session = get_session()
         if not self.is_persistent:
             alias.expires_at = datetime.utcnow() + timedelta(seconds=self._ttl)
         session.add(alias)
         session.commit()
+        _public_alias_filter.add([alias.public_alias])
+
+    def save_many(self, aliases: List[Alias]):
+        """Save aliases in a single transaction."""
+        self.set_expiration(aliases)
+        if self._memory_store is not None:
+            self._memory_store.save_many(aliases)
+            return
+        session = get_session()
+        # Saved aliases are not expired on commit, so reading them afterwards
+        # does not cost a query per alias.
+        expire_on_commit = session.expire_on_commit
+        session.expire_on_commit = False
+        try:
+            session.add_all(aliases)
+            session.commit()
+            _public_alias_filter.add(alias.public_alias for alias in aliases)
+        except IntegrityError:
+            session.rollback()
+            public_aliases = Counter(alias.public_alias for alias in aliases)
+            taken = self.get_taken(public_aliases)
+            taken.update(alias for alias, count in public_aliases.items() if count > 1)
+            if taken:
+                raise AliasCollision(taken)
+            raise
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.expire_on_commit = expire_on_commit
+
+    def get_taken(self, public_aliases: Iterable[str]) -> Set[str]:
+        """Get public aliases which are taken.
+
+        Public aliases are unique across the aliases table (including expired
+        aliases which are not deleted yet).
+        """
+        if self._memory_store is not None:
+            return self._memory_store.get_taken(public_aliases)
+        taken = set()
+        query = get_session().query(Alias.public_alias)
+        for chunk in _chunks(set(public_aliases)):
+            taken.update(
+                public_alias
+                for public_alias, in query.filter(Alias.public_alias.in_(chunk))
+            )
+        return taken
+
+    def set_expiration(self, aliases: List[Alias]):
+        """Set expiration date of volatile aliases."""
+        if not self.is_persistent:
+            expires_at = datetime.utcnow() + timedelta(seconds=self._ttl)
+            for alias in aliases:
+                alias.expires_at = expires_at
 
     @staticmethod
-    def cleanup() -> int:
+    def delete_expired(aliases: List[Alias]):
+        """Delete the aliases if they are expired."""
         session = get_session()
-        result = (
-            session.query(Alias).filter(Alias.expires_at < datetime.utcnow()).delete()
-        )
+        now = datetime.utcnow()
+        for chunk in _chunks(alias.id for alias in aliases):
+            session.query(Alias).filter(
+                Alias.id.in_(chunk),
+                Alias.expires_at < now,
+            ).delete(synchronize_session=False)
+        session.commit()
+
+    @staticmethod
+    def make_persistent(aliases: List[Alias]):
+        """Make stored volatile aliases persistent."""
+        session = get_session()
+        for alias in aliases:
+            alias.expires_at = None
+        session.commit()
+
+    @staticmethod
+    def cleanup(limit: int = None) -> int:
+        """Delete expired aliases (at most `limit` DB rows if it is set)."""
+        session = get_session()
+        query = session.query(Alias).filter(Alias.expires_at < datetime.utcnow())
+        if limit is None:
+            result = query.delete()
+        else:
+            expired_ids = query.with_entities(Alias.id).limit(limit)
+            result = (
+                session.query(Alias)
+                .filter(Alias.id.in_(expired_ids))
+                .delete(synchronize_session=False)
+            )
         session.commit()
+        if _memory_store is not None:
+            result += _memory_store.cleanup()
         return result
+
+    @staticmethod
+    def rebuild_filter():
+        """Rebuild the public alias filter (e.g. to drop deleted aliases)."""
+        _public_alias_filter.rebuild()
+
+
+def _get_value_digest(value: str, generator_type: AliasGeneratorType) -> str:
+    return get_value_digest(get_session().get_bind(), value, generator_type)
+
+
+def _chunks(values: Iterable) -> Iterator[list]:
+    values = list(values)
+    for start in range(0, len(values), QUERY_CHUNK_SIZE):
+        yield values[start : start + QUERY_CHUNK_SIZE]
+
+
+_memory_store: Optional[MemoryAliasStore] = None
+_public_alias_filter = PublicAliasFilter()
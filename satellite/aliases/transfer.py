@@ -0,0 +1,179 @@
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO
+
+from sqlalchemy import select
+
+from . import AliasGeneratorType
+from .store import _chunks
+from ..db import get_engine
+from ..db.models.alias import Alias, get_value_digest
+
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Exported alias fields (value digests are keyed by DB specific secrets).
+EXPORTED_FIELDS = [
+    'id',
+    'created_at',
+    'value',
+    'alias_generator',
+    'public_alias',
+    'expires_at',
+]
+
+
+class InvalidAliasRecord(Exception):
+    pass
+
+
+@dataclass
+class AliasImportProgress:
+    read: int = 0
+    imported: int = 0
+    # Aliases with IDs present in the DB (e.g. imported by a previous run)
+    existing: int = 0
+    # Aliases with public aliases of other aliases present in the DB
+    conflicting: int = 0
+
+
+def export_aliases(
+    stream: TextIO,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Callable[[int], None] = None,
+) -> int:
+    """Write all the aliases to the stream as NDJSON.
+
+    Rows are streamed from a single query, so memory usage does not depend on
+    the number of aliases. Returns the number of exported aliases.
+    """
+    columns = [Alias.__table__.c[name] for name in EXPORTED_FIELDS]
+    exported = 0
+    with get_engine().connect() as connection:
+        result = connection.execution_options(stream_results=True).execute(
+            select(columns).order_by(Alias.__table__.c.created_at)
+        )
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            stream.writelines(_dump_record(row) for row in rows)
+            exported += len(rows)
+            if progress:
+                progress(exported)
+    return exported
+
+
+def import_aliases(
+    stream: TextIO,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Callable[[AliasImportProgress], None] = None,
+) -> AliasImportProgress:
+    """Import aliases exported with export_aliases.
+
+    Aliases are inserted in batches (a transaction per batch), present
+    aliases are looked up in smaller chunks. Aliases which are present in the
+    DB already (by IDs) are skipped, so an interrupted import can be resumed
+    by running it again with the same file. Aliases with public aliases taken
+    by other aliases are skipped as conflicting.
+    """
+    table = Alias.__table__
+    result = AliasImportProgress()
+    records = _load_records(stream)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        result.read += len(batch)
+
+        with get_engine().begin() as connection:
+            existing_ids = _select_existing(
+                connection,
+                table.c.id,
+                [record['id'] for record in batch],
+            )
+            new_records = []
+            for record in batch:
+                if record['id'] in existing_ids:
+                    result.existing += 1
+                else:
+                    existing_ids.add(record['id'])
+                    new_records.append(record)
+
+            taken_aliases = _select_existing(
+                connection,
+                table.c.public_alias,
+                [record['public_alias'] for record in new_records],
+            )
+            records_to_insert = []
+            for record in new_records:
+                if record['public_alias'] in taken_aliases:
+                    result.conflicting += 1
+                    continue
+                taken_aliases.add(record['public_alias'])
+                record['value_digest'] = get_value_digest(
+                    connection,
+                    record['value'],
+                    record['alias_generator'],
+                )
+                records_to_insert.append(record)
+
+            if records_to_insert:
+                connection.execute(table.insert(), records_to_insert)
+            result.imported += len(records_to_insert)
+
+        if progress:
+            progress(result)
+
+    return result
+
+
+def _select_existing(connection, column, values: List[str]) -> set:
+    existing = set()
+    for chunk in _chunks(set(values)):
+        existing.update(
+            value
+            for value, in connection.execute(select([column]).where(column.in_(chunk)))
+        )
+    return existing
+
+
+def _dump_record(row) -> str:
+    record = dict(zip(EXPORTED_FIELDS, row))
+    record['alias_generator'] = record['alias_generator'].value
+    for name in ['created_at', 'expires_at']:
+        record[name] = _dump_datetime(record[name])
+    return json.dumps(record) + '\n'
+
+
+def _load_records(lines: Iterable[str]) -> Iterator[dict]:
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield _load_record(json.loads(line))
+        except (KeyError, TypeError, ValueError) as exc:
+            raise InvalidAliasRecord(
+                f'Invalid alias record at line {line_number}: {exc!r}'
+            ) from exc
+
+
+def _load_record(data: dict) -> dict:
+    record = {name: data[name] for name in EXPORTED_FIELDS}
+    for name in ['id', 'value', 'public_alias']:
+        if not isinstance(record[name], str):
+            raise TypeError(f'{name} must be a string')
+    record['alias_generator'] = AliasGeneratorType(record['alias_generator'])
+    for name in ['created_at', 'expires_at']:
+        record[name] = _load_datetime(record[name])
+    return record
+
+
+def _dump_datetime(value: Optional[datetime]) -> Optional[str]:
+    return value and value.isoformat()
+
+
+def _load_datetime(value: Optional[str]) -> Optional[datetime]:
+    return value and datetime.fromisoformat(value)
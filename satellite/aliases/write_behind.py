@@ -0,0 +1,190 @@
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+from . import AliasCollision, AliasGeneratorType
+from .cache import get_lookup_keys
+from .generators import get_alias_generator
+from .store import AliasStore
+from ..db.models.alias import Alias
+
+
+logger = logging.getLogger()
+
+
+class AliasWriteBehind:
+    """Buffer of new aliases saved to the DB with group commits.
+
+    Aliases are saved every `interval` seconds or as soon as `batch_size`
+    aliases are pending, whichever comes first. Pending aliases can be looked up
+    (by value or public alias) until they are saved.
+
+    Pending aliases are in use before they are saved, so only aliases of
+    collision free generators are accepted: otherwise a public alias could be
+    taken by another process in the meantime.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self._interval = interval
+        self._batch_size = batch_size
+        # Pending aliases (and stores to save them to) by IDs
+        self._pending: 'OrderedDict[str, tuple]' = OrderedDict()
+        # Pending alias IDs by lookup keys
+        self._keys: Dict[Hashable, str] = {}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._should_stop = False
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def add(self, store: AliasStore, aliases: List[Alias]):
+        """Add new aliases.
+
+        Raises AliasCollision if public aliases are taken (by stored or pending
+        aliases), since the aliases are used before they are saved.
+        """
+        for alias in aliases:
+            if not get_alias_generator(alias.alias_generator).collision_free:
+                raise ValueError(
+                    f'{alias.alias_generator.value} aliases can not be saved '
+                    'in the background.'
+                )
+        public_aliases = Counter(alias.public_alias for alias in aliases)
+        taken = store.get_taken(public_aliases)
+        store.set_expiration(aliases)
+        with self._condition:
+            taken.update(
+                public_alias
+                for public_alias, count in public_aliases.items()
+                if count > 1 or self._is_pending(public_alias)
+            )
+            if taken:
+                raise AliasCollision(taken)
+
+            for alias in aliases:
+                self._pending[alias.id] = (store, alias)
+                for key in get_lookup_keys(store.is_persistent, alias):
+                    self._keys[key] = alias.id
+            self._ensure_flusher()
+            if len(self._pending) >= self._batch_size:
+                self._condition.notify()
+
+    def get_by_value(
+        self,
+        is_persistent: bool,
+        value: str,
+        generator_type: AliasGeneratorType,
+    ) -> Optional[Alias]:
+        return self._get(('value', is_persistent, value, generator_type))
+
+    def get_by_alias(self, is_persistent: bool, public_alias: str) -> Optional[Alias]:
+        return self._get(('alias', is_persistent, public_alias))
+
+    def flush(self) -> int:
+        """Save all the pending aliases. Returns the number of saved aliases."""
+        with self._flush_lock:
+            with self._condition:
+                pending = list(self._pending.values())
+            if not pending:
+                return 0
+
+            stores = {}
+            aliases_by_store = {}
+            for store, alias in pending:
+                stores[store.is_persistent] = store
+                aliases_by_store.setdefault(store.is_persistent, []).append(alias)
+
+            saved = 0
+            for is_persistent, aliases in aliases_by_store.items():
+                try:
+                    stores[is_persistent].save_many(aliases)
+                except AliasCollision as exc:
+                    # Taken by another process in the meantime (practically
+                    # impossible for collision free generators). The aliases
+                    # are in use already, so they can't be regenerated.
+                    collided = [
+                        alias
+                        for alias in aliases
+                        if alias.public_alias in exc.public_aliases
+                    ]
+                    logger.error(
+                        f'Discarding {len(collided)} aliases with taken '
+                        'public aliases.'
+                    )
+                    self._remove(is_persistent, collided)
+                    aliases = [
+                        alias
+                        for alias in aliases
+                        if alias.public_alias not in exc.public_aliases
+                    ]
+                    stores[is_persistent].save_many(aliases)
+                self._remove(is_persistent, aliases)
+                saved += len(aliases)
+
+            return saved
+
+    def stop(self):
+        """Stop the background flushing and save the pending aliases."""
+        with self._condition:
+            self._should_stop = True
+            self._condition.notify()
+        if self._flusher and self._flusher.is_alive():
+            self._flusher.join()
+        self.flush()
+
+    def _remove(self, is_persistent: bool, aliases: List[Alias]):
+        with self._condition:
+            for alias in aliases:
+                self._pending.pop(alias.id, None)
+                for key in get_lookup_keys(is_persistent, alias):
+                    if self._keys.get(key) == alias.id:
+                        del self._keys[key]
+
+    def _is_pending(self, public_alias: str) -> bool:
+        # Public aliases are unique across the stores.
+        return any(
+            ('alias', is_persistent, public_alias) in self._keys
+            for is_persistent in [True, False]
+        )
+
+    def _get(self, key: Hashable) -> Optional[Alias]:
+        with self._condition:
+            alias_id = self._keys.get(key)
+            return alias_id and self._pending[alias_id][1]
+
+    def _ensure_flusher(self):
+        # Not alive after a fork: threads are not inherited by child processes.
+        if self._should_stop or (self._flusher and self._flusher.is_alive()):
+            return
+        self._flusher = threading.Thread(
+            target=self._run,
+            name='AliasWriteBehind',
+            daemon=True,
+        )
+        self._flusher.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: (
+                        self._should_stop or len(self._pending) >= self._batch_size
+                    ),
+                    timeout=self._interval,
+                )
+                if self._should_stop:
+                    return
+            try:
+                self.flush()
+            except Exception as exc:
+                # Aliases stay pending and are retried after the interval.
+                logger.exception(f'Unable to save aliases: {exc}')
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: self._should_stop,
+                        timeout=self._interval,
+                    )
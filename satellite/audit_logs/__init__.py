@@ -1,3 +1,5 @@
+import zlib
+from enum import Enum, unique
 from typing import Callable
 
 from blinker import Signal
@@ -5,7 +7,40 @@ from blinker import Signal
 from .records import AuditLogRecord
 
 
+@unique
+class AuditLogLevel(Enum):
+    # All the records
+    FULL = 'full'
+    # Only matched route/filter evaluation records
+    MATCHED = 'matched'
+    # A single route matching summary record instead of evaluation records
+    SUMMARY = 'summary'
+    # No records at all
+    OFF = 'off'
+
+
+def configure(level: AuditLogLevel = AuditLogLevel.FULL, sample_rate: float = 1.0):
+    global _level
+    global _sample_rate
+
+    _level = level
+    _sample_rate = sample_rate
+
+
+def get_level(flow_id: str) -> AuditLogLevel:
+    """Get audit logs level for a flow.
+
+    Flows are sampled by their IDs, so a flow is either audited in all the
+    phases and processes or not audited at all.
+    """
+    if _sample_rate < 1 and zlib.crc32(flow_id.encode()) >= _sample_rate * 2**32:
+        return AuditLogLevel.OFF
+    return _level
+
+
 def emit(record: AuditLogRecord):
+    if get_level(record.flow_id) == AuditLogLevel.OFF:
+        return
     _sig_audit_log.send(record=record)
 
 
@@ -13,4 +48,6 @@ def subscribe(callback: Callable):
     _sig_audit_log.connect(lambda _, record: callback(record), weak=False)
 
 
+_level = AuditLogLevel.FULL
+_sample_rate = 1.0
 _sig_audit_log = Signal()
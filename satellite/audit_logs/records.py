@@ -1,7 +1,7 @@
 import time
 from dataclasses import dataclass, field
 from enum import Enum, unique
-from typing import List
+from typing import List, Optional
 
 from ..aliases import AliasGeneratorType, AliasStoreType
 from ..proxy import ProxyMode
@@ -85,6 +85,16 @@ class FilterEvaluationLogRecord(AuditLogRecord):
     phase: Phase
 
 
+@dataclass
+class RouteMatchingSummaryLogRecord(AuditLogRecord):
+    name: str = field(default='Route matching summary', init=False)
+    route_id: Optional[str]
+    matched: bool
+    phase: Phase
+    routes_evaluated: int
+    filters_evaluated: int
+
+
 @dataclass
 class VaultTrafficLogRecord(AuditLogRecord):
     name: str = field(default='Proxy traffic', init=False)
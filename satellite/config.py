@@ -4,8 +4,11 @@ from pathlib import Path
 from typing import Optional
 
 import marshmallow_dataclass
+from marshmallow import validate
 from ruamel.yaml import YAML
 
+from .audit_logs import AuditLogLevel
+
 
 SATELLITE_DIR = Path(
     os.getenv(
@@ -19,6 +22,21 @@ DEFAULT_DB_PATH = SATELLITE_DIR / 'db.sqlite'
 
 @dataclasses.dataclass(frozen=True)
 class SatelliteConfig:
+    alias_broker: bool = False
+    alias_cache_size: int = 10000
+    alias_reaper_batch_size: int = 1000
+    alias_reaper_interval: int = 300
+    alias_write_behind_batch_size: int = 1000
+    alias_write_behind_interval: int = 0
+    audit_logs_level: str = dataclasses.field(
+        default=AuditLogLevel.FULL.value,
+        metadata={'validate': validate.OneOf([level.value for level in AuditLogLevel])},
+    )
+    audit_logs_sample_rate: float = dataclasses.field(
+        default=1.0,
+        metadata={'validate': validate.Range(min=0, max=1)},
+    )
+    compile_route_expressions: bool = False
     db_path: str = str(DEFAULT_DB_PATH)
     debug: bool = False
     forward_proxy_port: int = 9099
@@ -26,6 +44,7 @@ class SatelliteConfig:
     reverse_proxy_port: int = 9098
     routes_path: Optional[str] = None
     silent: bool = False
+    volatile_aliases_in_memory: bool = False
     volatile_aliases_ttl: int = 3600
     web_server_port: int = 8089
 
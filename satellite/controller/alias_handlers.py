@@ -1,11 +1,15 @@
+from typing import List
+
 from . import BaseHandler, apply_request_schema, apply_response_schema
 from .exceptions import NotFoundError, ValidationError
 from ..aliases import AliasNotFound, AliasStoreType
-from ..aliases.manager import redact, reveal
+from ..aliases.manager import redact_many, reveal, reveal_many
+from ..db.models import Alias
 from ..schemas.aliases import (
     AliasResponseSchema,
     AliasesResponseSchema,
     RedactRequestSchema,
+    RevealRequestSchema,
 )
 
 
@@ -29,17 +33,19 @@ class AliasesHandler(BaseHandler):
                     application/json:
                         schema: AliasResponseSchema
         """
-        results = []
-        for item in validated_data['data']:
-            value, format = item['value'], item['format']
-            alias = redact(value, format, STORAGE_TYPE)
-            results.append(
-                {
-                    'aliases': [{'alias': alias.public_alias, 'format': format}],
-                    'created_at': alias.created_at,
-                    'value': item['value'],
-                }
-            )
+        items = validated_data['data']
+        aliases = redact_many(
+            [(item['value'], item['format']) for item in items],
+            STORAGE_TYPE,
+        )
+        results = [
+            {
+                'aliases': [{'alias': alias.public_alias, 'format': item['format']}],
+                'created_at': alias.created_at,
+                'value': item['value'],
+            }
+            for item, alias in zip(items, aliases)
+        ]
 
         return {'data': results}
 
@@ -65,23 +71,27 @@ class AliasesHandler(BaseHandler):
         if not aliases:
             raise ValidationError('Missing required parameter: "q"')
 
-        reveal_data = {}
-        errors = []
-        for public_alias in set(aliases.split(',')):
-            try:
-                reveal_result = _reveal(public_alias)
-            except AliasNotFound:
-                errors.append({'message': f'Unknown alias: {public_alias}'})
-            else:
-                reveal_data[public_alias] = reveal_result
+        return _reveal_many(aliases.split(','))
 
-        result = {}
-        if reveal_data:
-            result['data'] = reveal_data
-        if errors:
-            result['errors'] = errors
 
-        return result
+class AliasesRevealHandler(BaseHandler):
+    @apply_request_schema(RevealRequestSchema)
+    @apply_response_schema(AliasesResponseSchema)
+    def post(self, validated_data: dict):
+        """
+        ---
+        description: Perform reveal-operation for a (large) list of aliases
+        requestBody:
+            content:
+                application/json:
+                    schema: RevealRequestSchema
+        responses:
+            200:
+                content:
+                    application/json:
+                        schema: AliasesResponseSchema
+        """
+        return _reveal_many(validated_data['aliases'])
 
 
 class AliasHandler(BaseHandler):
@@ -115,8 +125,29 @@ class AliasHandler(BaseHandler):
         return {'data': [reveal_result]}
 
 
-def _reveal(public_alias: str) -> str:
-    alias = reveal(public_alias, STORAGE_TYPE)
+def _reveal(public_alias: str) -> dict:
+    return _make_record(reveal(public_alias, STORAGE_TYPE))
+
+
+def _reveal_many(public_aliases: List[str]) -> dict:
+    revealed, unknown = reveal_many(public_aliases, STORAGE_TYPE)
+
+    result = {}
+    if revealed:
+        result['data'] = {
+            public_alias: _make_record(alias)
+            for public_alias, alias in revealed.items()
+        }
+    if unknown:
+        result['errors'] = [
+            {'detail': f'Unknown alias: {public_alias}'}
+            for public_alias in sorted(unknown)
+        ]
+
+    return result
+
+
+def _make_record(alias: Alias) -> dict:
     return {
         'aliases': [
             {
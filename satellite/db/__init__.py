@@ -36,6 +36,11 @@ def get_session() -> Session:
     return _session_store.session
 
 
+def create_session() -> Session:
+    """Create a new session which is not bound to the current thread."""
+    return _Session()
+
+
 def init():
     alembic_cfg = Config()
     alembic_cfg.set_main_option(
@@ -0,0 +1,62 @@
+"""Make public aliases unique.
+
+Revision ID: 361b1a24ca85
+Revises: aef1fb35df93
+Create Date: 2026-10-17 16:48:37.905163
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '361b1a24ca85'
+down_revision = 'aef1fb35df93'
+branch_labels = None
+depends_on = None
+
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# Aliases sharing public aliases with older aliases are moved to this table.
+DUPLICATES_TABLE = 'aliases_duplicates'
+
+DUPLICATES_CONDITION = (
+    'rowid NOT IN (SELECT MIN(rowid) FROM aliases GROUP BY public_alias) '
+    'AND public_alias IS NOT NULL'
+)
+
+
+def upgrade():
+    connection = op.get_bind()
+    duplicates = connection.execute(
+        f'SELECT COUNT(*) FROM aliases WHERE {DUPLICATES_CONDITION}'
+    ).scalar()
+    if duplicates:
+        # Only the oldest of aliases sharing a public alias could be revealed
+        # (in the rowid order). The others are kept aside rather than deleted.
+        op.execute(
+            f'CREATE TABLE IF NOT EXISTS {DUPLICATES_TABLE} AS '
+            'SELECT * FROM aliases WHERE 0'
+        )
+        op.execute(
+            f'INSERT INTO {DUPLICATES_TABLE} '
+            f'SELECT * FROM aliases WHERE {DUPLICATES_CONDITION}'
+        )
+        op.execute(f'DELETE FROM aliases WHERE {DUPLICATES_CONDITION}')
+        logger.warning(
+            f'Moved {duplicates} aliases with duplicated public aliases to '
+            f'the {DUPLICATES_TABLE} table.'
+        )
+    op.drop_index('ix_aliases_public_alias', 'aliases')
+    op.create_index('ix_aliases_public_alias', 'aliases', ['public_alias'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_aliases_public_alias', 'aliases')
+    op.create_index('ix_aliases_public_alias', 'aliases', ['public_alias'])
+    if DUPLICATES_TABLE in sa.inspect(op.get_bind()).get_table_names():
+        op.execute(f'INSERT INTO aliases SELECT * FROM {DUPLICATES_TABLE}')
+        op.drop_table(DUPLICATES_TABLE)
@@ -0,0 +1,37 @@
+"""Add aliases indexes.
+
+Revision ID: 3f1b2c8d9e4a
+Revises: fe38630490f9
+Create Date: 2026-10-17 10:12:41.503187
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1b2c8d9e4a'
+down_revision = 'fe38630490f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_aliases_value_alias_generator_created_at',
+        'aliases',
+        ['value', 'alias_generator', 'created_at'],
+    )
+    op.create_index('ix_aliases_public_alias', 'aliases', ['public_alias'])
+    op.create_index(
+        'ix_aliases_expires_at',
+        'aliases',
+        ['expires_at'],
+        sqlite_where=sa.text('expires_at IS NOT NULL'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_aliases_expires_at', 'aliases')
+    op.drop_index('ix_aliases_public_alias', 'aliases')
+    op.drop_index('ix_aliases_value_alias_generator_created_at', 'aliases')
@@ -0,0 +1,116 @@
+"""Add alias value digest.
+
+Revision ID: aef1fb35df93
+Revises: 3f1b2c8d9e4a
+Create Date: 2026-10-17 14:05:12.274519
+
+"""
+import hashlib
+import hmac
+import secrets
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'aef1fb35df93'
+down_revision = '3f1b2c8d9e4a'
+branch_labels = None
+depends_on = None
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+aliases = sa.table(
+    'aliases',
+    sa.column('id', sa.String),
+    sa.column('value', sa.String),
+    sa.column('alias_generator', sa.String),
+    sa.column('value_digest', sa.String),
+)
+
+secrets_table = sa.table(
+    'secrets',
+    sa.column('name', sa.String),
+    sa.column('value', sa.LargeBinary),
+)
+
+
+def _make_value_digest(key: bytes, value: str, generator: str) -> str:
+    # Frozen copy of satellite.aliases.digest.make_value_digest
+    message = f'{generator}:{value}'.encode()
+    return hmac.new(key, message, hashlib.sha256).hexdigest()[:32]
+
+
+def upgrade():
+    connection = op.get_bind()
+
+    # The table might be created by the DB initialization already.
+    if 'secrets' not in sa.inspect(connection).get_table_names():
+        op.create_table(
+            'secrets',
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('value', sa.LargeBinary(), nullable=False),
+            sa.PrimaryKeyConstraint('name'),
+        )
+    key = connection.execute(
+        sa.select([secrets_table.c.value]).where(
+            secrets_table.c.name == 'alias_value_digest'
+        )
+    ).scalar()
+    if key is None:
+        key = secrets.token_bytes(32)
+        op.bulk_insert(secrets_table, [{'name': 'alias_value_digest', 'value': key}])
+
+    op.add_column('aliases', sa.Column('value_digest', sa.String(), nullable=True))
+
+    # Rows are paged by rowid, so every batch is a range scan of the table
+    # (there is no index on value_digest to find rows to update).
+    rowid = sa.literal_column('rowid')
+    last_rowid = 0
+    while True:
+        rows = connection.execute(
+            sa.select([rowid, aliases.c.value, aliases.c.alias_generator])
+            .where(rowid > last_rowid)
+            .order_by(rowid)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        connection.execute(
+            aliases.update()
+            .where(rowid == sa.bindparam('row_id'))
+            .values(value_digest=sa.bindparam('digest')),
+            [
+                {
+                    'row_id': row[0],
+                    'digest': _make_value_digest(key, row.value, row.alias_generator),
+                }
+                for row in rows
+            ],
+        )
+        last_rowid = rows[-1][0]
+
+    op.create_index('ix_aliases_value_digest', 'aliases', ['value_digest'])
+    op.drop_index('ix_aliases_value_alias_generator_created_at', 'aliases')
+
+
+def downgrade():
+    op.create_index(
+        'ix_aliases_value_alias_generator_created_at',
+        'aliases',
+        ['value', 'alias_generator', 'created_at'],
+    )
+    op.drop_index('ix_aliases_value_digest', 'aliases')
+    with op.batch_alter_table('aliases') as batch_op:
+        batch_op.drop_column('value_digest')
+    # The partial index condition is lost when the table is recreated.
+    op.drop_index('ix_aliases_expires_at', 'aliases')
+    op.create_index(
+        'ix_aliases_expires_at',
+        'aliases',
+        ['expires_at'],
+        sqlite_where=sa.text('expires_at IS NOT NULL'),
+    )
+    op.drop_table('secrets')
@@ -1,3 +1,4 @@
 from .alias import Alias  # noqa
 from .base import Base  # noqa
 from .route import Route, RuleEntry  # noqa
+from .secret import Secret  # noqa
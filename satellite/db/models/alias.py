@@ -1,14 +1,28 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Enum, String
+from sqlalchemy import Column, DateTime, Enum, Index, String, event, text
+from sqlalchemy.engine import Connectable
 
 from satellite.aliases import AliasGeneratorType
+from satellite.aliases.digest import make_value_digest
 from .base import Base
+from .secret import ALIAS_DIGEST_KEY, get_secret
 
 
 class Alias(Base):
     __tablename__ = 'aliases'
+    __table_args__ = (
+        Index('ix_aliases_value_digest', 'value_digest'),
+        Index('ix_aliases_public_alias', 'public_alias', unique=True),
+        # Persistent aliases have no expiration date, so only volatile ones
+        # are indexed.
+        Index(
+            'ix_aliases_expires_at',
+            'expires_at',
+            sqlite_where=text('expires_at IS NOT NULL'),
+        ),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     created_at = Column(DateTime, default=lambda: datetime.utcnow())
@@ -16,3 +30,27 @@ class Alias(Base):
     alias_generator = Column(Enum(AliasGeneratorType, create_constraint=False))
     public_alias = Column(String)
     expires_at = Column(DateTime)
+    # Keyed digest of the value and generator used for de-duplication lookups,
+    # so the plaintext values are not indexed.
+    value_digest = Column(String)
+
+
+def get_value_digest(
+    connectable: Connectable,
+    value: str,
+    generator_type: AliasGeneratorType,
+) -> str:
+    return make_value_digest(
+        get_secret(connectable, ALIAS_DIGEST_KEY),
+        value,
+        generator_type.value,
+    )
+
+
+@event.listens_for(Alias, 'before_insert')
+def _set_value_digest(mapper, connection, alias: Alias):
+    alias.value_digest = get_value_digest(
+        connection,
+        alias.value,
+        alias.alias_generator,
+    )
@@ -0,0 +1,64 @@
+import secrets
+from typing import Dict
+
+from sqlalchemy import Column, LargeBinary, String, event, select
+from sqlalchemy.engine import Connectable
+from sqlalchemy.exc import IntegrityError
+
+from .base import Base
+
+
+ALIAS_DIGEST_KEY = 'alias_value_digest'
+ALIAS_FPE_KEY = 'alias_fpe'
+
+SECRET_NAMES = [ALIAS_DIGEST_KEY, ALIAS_FPE_KEY]
+
+
+class Secret(Base):
+    """Secret keys generated once per DB."""
+
+    __tablename__ = 'secrets'
+
+    name = Column(String, primary_key=True)
+    value = Column(LargeBinary, nullable=False)
+
+
+def get_secret(connectable: Connectable, name: str) -> bytes:
+    """Get a secret of the DB (cached per engine).
+
+    A missing secret (e.g. introduced after the DB was created) is generated.
+    """
+    engine = connectable.engine
+    cache_key = (engine, name)
+    if cache_key not in _cache:
+        value = _select_secret(connectable, name)
+        if value is None:
+            try:
+                connectable.execute(
+                    Secret.__table__.insert(),
+                    [_generate_secret(name)],
+                )
+            except IntegrityError:
+                # Generated by another process in the meantime.
+                pass
+            value = _select_secret(connectable, name)
+        _cache[cache_key] = value
+    return _cache[cache_key]
+
+
+def _select_secret(connectable: Connectable, name: str) -> bytes:
+    return connectable.execute(
+        select([Secret.value]).where(Secret.name == name)
+    ).scalar()
+
+
+def _generate_secret(name: str) -> dict:
+    return {'name': name, 'value': secrets.token_bytes(32)}
+
+
+@event.listens_for(Secret.__table__, 'after_create')
+def _generate_secrets(target, connection, **kwargs):
+    connection.execute(target.insert(), [_generate_secret(n) for n in SECRET_NAMES])
+
+
+_cache: Dict[tuple, bytes] = {}
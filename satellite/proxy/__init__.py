@@ -5,3 +5,8 @@ from enum import Enum, unique
 class ProxyMode(Enum):
     FORWARD = 'regular'
     REVERSE = 'reverse'
+
+
+# Flow metadata key of the host requested by a reverse proxy client (the Host
+# header is replaced with the upstream one by the proxy).
+REQUESTED_HOST_METADATA_KEY = 'satellite_requested_host'
@@ -7,6 +7,7 @@ from mitmproxy.http import HTTPFlow
 from . import commands
 from . import exceptions
 from ..flows import copy_flow, get_flow_state
+from ..routes import table as route_table
 
 
 logger = logging.getLogger()
@@ -108,6 +109,10 @@ class ProxyCommandProcessor:
 
         self.view.update([flow])
 
+    @process_command.register
+    def _(self, _: commands.ReloadRoutesCommand):
+        route_table.reload()
+
     def _get_flow(self, flow_id: str) -> HTTPFlow:
         flow = self.view.get_by_id(flow_id)
         if not flow:
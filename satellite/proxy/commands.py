@@ -40,3 +40,8 @@ class ReplayFlowCommand(ProxyCommand):
 class UpdateFlowCommand(ProxyCommand):
     flow_id: str
     flow_data: str
+
+
+@dataclass
+class ReloadRoutesCommand(ProxyCommand):
+    pass
@@ -16,6 +16,7 @@ from .process import ProxyProcess
 from ..audit_logs.records import AuditLogRecord
 from ..audit_logs.store import AuditLogStore
 from ..flows import load_flow_from_state
+from ..routes import manager as route_manager
 
 
 logger = logging.getLogger()
@@ -75,6 +76,8 @@ class ProxyManager:
                 self._event_handlers,
             )
             self._event_listener.start()
+
+            route_manager.subscribe(self._sig_routes_changed)
         except Exception:
             self.stop()
             raise
@@ -83,6 +86,8 @@ class ProxyManager:
         if self._should_stop.is_set():
             return
 
+        route_manager.unsubscribe(self._sig_routes_changed)
+
         for mode, proxy in self._proxies.items():
             if proxy.process.is_alive():
                 try:
@@ -179,6 +184,11 @@ class ProxyManager:
 
         return result
 
+    def _sig_routes_changed(self, _):
+        for proxy in self._proxies.values():
+            if proxy.process.is_alive():
+                self._send_proxy_command(proxy, commands.ReloadRoutesCommand())
+
     def _handle_event(self, event):
         self._process_event(event)
 
@@ -13,6 +13,7 @@ from mitmproxy.proxy.config import ProxyConfig
 
 from . import ProxyMode
 from .server import ProxyServer
+from .upstreams import ReverseUpstreamAddon
 from ..vault.vault_handler import VaultFlows
 
 
@@ -50,6 +51,7 @@ class ProxyEventsAddon:
 
 class ProxyMaster(Master):
     def __init__(self, mode: ProxyMode, port: int):
+        mode_addons = [ReverseUpstreamAddon()] if mode == ProxyMode.REVERSE else []
         mode = (
             f'{mode.value}:https://dummy-upstream'
             if mode == ProxyMode.REVERSE
@@ -61,6 +63,7 @@ class ProxyMaster(Master):
         self.view = View()
         self.addons.add(
             *default_addons(),
+            *mode_addons,
             VaultFlows(),
             self.view,
             ProxyEventsAddon(),
@@ -17,6 +17,7 @@ from .command_processor import ProxyCommandProcessor
 from .commands import ProxyCommand
 from .master import ProxyMaster
 from .. import audit_logs
+from ..aliases import manager as alias_manager
 from ..ctx import ProxyContext, set_context
 from ..flows import get_flow_state
 
@@ -96,6 +97,7 @@ class ProxyProcess(Process):
         logger.info('Stopping proxy.')
         self._should_stop.set()
         self.master.shutdown()
+        alias_manager.flush()
         logger.info('Stopped proxy.')
         self._event_queue.close()
         self._event_queue.join_thread()
@@ -1,5 +1,6 @@
 import logging
 from copy import copy
+from typing import Dict, Optional
 
 from mitmproxy.proxy.config import ProxyConfig
 from mitmproxy.proxy.server import (
@@ -9,22 +10,27 @@ from mitmproxy.proxy.server import (
 
 from ..ctx import get_proxy_context
 from ..proxy import ProxyMode
-from ..routes import manager as route_manager
+from ..routes import table as route_table
 
 
 logger = logging.getLogger()
 
+# Max number of cached reverse proxy configs (one per upstream).
+MAX_REVERSE_CONFIGS = 64
+
 
 class ProxyServer(BaseProxyServer):
+    def __init__(self, config: ProxyConfig):
+        super().__init__(config)
+        self._reverse_configs: Dict[str, ProxyConfig] = {}
+
     def handle_client_connection(self, conn, client_address):
         config = self.config
 
         if get_proxy_context().mode == ProxyMode.REVERSE:
             upstream = self._get_upstream()
             if upstream:
-                options = copy(self.config.options)
-                options.mode = f'reverse:{upstream}'
-                config = ProxyConfig(options)
+                config = self._get_reverse_config(upstream)
 
         handler = ConnectionHandler(
             conn,
@@ -34,6 +40,18 @@ class ProxyServer(BaseProxyServer):
         )
         handler.handle()
 
-    def _get_upstream(self):
-        routes = route_manager.get_all_by_type(is_outbound=False)
-        return routes and routes[0].destination_override_endpoint
+    def _get_reverse_config(self, upstream: str) -> ProxyConfig:
+        # Building a config is expensive (e.g. it sets up a cert store), so
+        # configs are reused by all the connections to the same upstream.
+        config = self._reverse_configs.get(upstream)
+        if config is None:
+            options = copy(self.config.options)
+            options.mode = f'reverse:{upstream}'
+            config = ProxyConfig(options)
+            if len(self._reverse_configs) >= MAX_REVERSE_CONFIGS:
+                self._reverse_configs.clear()
+            self._reverse_configs[upstream] = config
+        return config
+
+    def _get_upstream(self) -> Optional[str]:
+        return route_table.get_table().get_upstream()
@@ -0,0 +1,56 @@
+from functools import lru_cache
+from typing import Optional
+
+from mitmproxy.http import HTTPFlow
+from mitmproxy.net import server_spec
+from mitmproxy.net.http import url
+
+from . import REQUESTED_HOST_METADATA_KEY
+from ..routes import table as route_table
+
+
+class ReverseUpstreamAddon:
+    """Select a reverse proxy upstream per request.
+
+    The upstream is taken from the first inbound route whose host pattern
+    matches the requested host (Host header or SNI). The upstream the proxy
+    connection was set up with is used when no routes match.
+    """
+
+    def requestheaders(self, flow: HTTPFlow):
+        # Has to be done before the proxy replaces the Host header.
+        flow.metadata[REQUESTED_HOST_METADATA_KEY] = _get_requested_host(flow)
+
+    def request(self, flow: HTTPFlow):
+        host = flow.metadata.get(REQUESTED_HOST_METADATA_KEY)
+        if host is None:
+            return
+
+        upstream = route_table.get_table().get_upstream(host)
+        if not upstream:
+            return
+
+        scheme, (upstream_host, upstream_port) = _parse_upstream(upstream)
+        request = flow.request
+        if (request.scheme, request.host, request.port) != (
+            scheme,
+            upstream_host,
+            upstream_port,
+        ):
+            request.scheme = scheme
+            request.host = upstream_host
+            request.port = upstream_port
+            request.host_header = url.hostport(scheme, upstream_host, upstream_port)
+
+
+def _get_requested_host(flow: HTTPFlow) -> Optional[str]:
+    host_header = flow.request.host_header
+    if host_header:
+        host, _ = url.parse_authority(host_header, check=False)
+        return host
+    return flow.client_conn.sni
+
+
+@lru_cache(maxsize=64)
+def _parse_upstream(upstream: str) -> server_spec.ServerSpec:
+    return server_spec.parse(upstream)
@@ -0,0 +1,127 @@
+import re
+from types import MappingProxyType
+from typing import Any, Callable, Dict
+
+from mitmproxy.http import HTTPFlow
+
+from .expressions import (
+    BaseExpression,
+    CompositeExpression,
+    FlowFields,
+    MatchCondition,
+    MatchField,
+)
+from .operators import MatchOperatorType
+
+
+# Operator templates: (expression for a non-empty value, is inverse).
+# Inverse operators match empty (None) values like InverseMatchOperator does.
+_OPERATOR_TEMPLATES = MappingProxyType(
+    {
+        MatchOperatorType.EQUALS: ('{value} == {param}', False),
+        MatchOperatorType.DOES_NOT_EQUAL: ('{value} == {param}', True),
+        MatchOperatorType.LESS_THAN: ('{value} < {param}', False),
+        MatchOperatorType.GREATER_THAN_OR_EQUAL: ('{value} < {param}', True),
+        MatchOperatorType.GREATER_THAN: ('{value} > {param}', False),
+        MatchOperatorType.LESS_THAN_OR_EQUALS: ('{value} > {param}', True),
+        MatchOperatorType.BEGINS_WITH: ('{value}.startswith({param})', False),
+        MatchOperatorType.DOES_NOT_BEGIN_WITH: ('{value}.startswith({param})', True),
+        MatchOperatorType.ENDS_WITH: ('{value}.endswith({param})', False),
+        MatchOperatorType.DOES_NOT_END_WITH: ('{value}.endswith({param})', True),
+        MatchOperatorType.IS_EMPTY: ("{value} == ''", False),
+        MatchOperatorType.IS_NOT_EMPTY: ("{value} == ''", True),
+        MatchOperatorType.MATCHES: ('{param}.match({value}) is not None', False),
+    }
+)
+
+_CONDITION_OPERATORS = MappingProxyType(
+    {
+        MatchCondition.AND: (' and ', 'True'),
+        MatchCondition.OR: (' or ', 'False'),
+    }
+)
+
+
+class _CodeGenerator:
+    def __init__(self):
+        self.namespace: Dict[str, Any] = {'FlowFields': FlowFields}
+        self.fields: Dict[MatchField, str] = {}
+        self._params_count = 0
+
+    def generate(self, config: dict) -> str:
+        body = self._composite(config)
+        lines = [
+            'def evaluate(flow, fields=None):',
+            '    if fields is None:',
+            '        fields = FlowFields(flow)',
+        ]
+        for field, name in self.fields.items():
+            self.namespace[f'{name}_key'] = field
+        lines.append(f'    return {body}')
+        return '\n'.join(lines)
+
+    def _composite(self, config: dict) -> str:
+        operator, default = _CONDITION_OPERATORS[MatchCondition(config['condition'])]
+        rules = []
+        for rule in config['rules']:
+            expr = rule.get('expression')
+            rules.append(self._expression(expr) if expr else self._composite(rule))
+        return f'({operator.join(rules)})' if rules else default
+
+    def _expression(self, config: dict) -> str:
+        field = MatchField(config['field'])
+        template, is_inverse = _OPERATOR_TEMPLATES[
+            MatchOperatorType(config['operator'])
+        ]
+
+        value = self.fields.setdefault(field, f'field{len(self.fields)}')
+        param = None
+        if config['values']:
+            param = self._add_param(config)
+
+        expr = template.format(value=value, param=param)
+        # Fields are looked up only for evaluated terms (like the interpreter
+        # does), e.g. the response status is not extracted without a response.
+        lookup = f'({value} := fields[{value}_key])'
+        if is_inverse:
+            return f'({lookup} is None or not {expr})'
+        return f'({lookup} is not None and {expr})'
+
+    def _add_param(self, config: dict) -> str:
+        name = f'param{self._params_count}'
+        self._params_count += 1
+        param = config['values'][0]
+        if MatchOperatorType(config['operator']) == MatchOperatorType.MATCHES:
+            param = re.compile(param)
+        self.namespace[name] = param
+        return name
+
+
+def compile_expression(config: dict) -> Callable[[HTTPFlow, FlowFields], bool]:
+    """Compile an expression config into a single function.
+
+    The expression tree is folded into one short-circuit boolean expression.
+    Fields are looked up in the flow fields by the terms which are evaluated.
+    """
+    # Building the interpreted expression validates the config, so only
+    # valid configs reach the code generator.
+    CompositeExpression.build(config)
+
+    generator = _CodeGenerator()
+    source = generator.generate(config)
+    namespace = generator.namespace
+    exec(compile(source, '<compiled-expression>', 'exec'), namespace)
+    return namespace['evaluate']
+
+
+class CompiledExpression(BaseExpression):
+    def __init__(self, evaluate: Callable[[HTTPFlow, FlowFields], bool]):
+        super().__init__()
+        self._evaluate = evaluate
+
+    def evaluate(self, flow: HTTPFlow, fields: FlowFields = None) -> bool:
+        return self._evaluate(flow, fields)
+
+    @classmethod
+    def build(cls, config: dict) -> 'CompiledExpression':
+        return cls(compile_expression(config))
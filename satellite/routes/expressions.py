@@ -1,7 +1,9 @@
+import hashlib
+import json
 from abc import ABC, abstractclassmethod, abstractmethod
 from enum import Enum, unique
 from types import MappingProxyType
-from typing import Any, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
 
 from mitmproxy.http import HTTPFlow
 
@@ -78,13 +80,28 @@ FIELD_TYPES = MappingProxyType(
 )
 
 
+class FlowFields(dict):
+    """Flow field values extracted on demand and only once per field.
+
+    Shared by all the expressions evaluated against a flow in a phase.
+    """
+
+    def __init__(self, flow: HTTPFlow):
+        super().__init__()
+        self.flow = flow
+
+    def __missing__(self, field: MatchField) -> Any:
+        value = self[field] = FIELD_EXTRACTORS[field](self.flow)
+        return value
+
+
 class ExpressionError(Exception):
     pass
 
 
 class BaseExpression(ABC):
     @abstractmethod
-    def evaluate(self, flow: HTTPFlow) -> bool:
+    def evaluate(self, flow: HTTPFlow, fields: FlowFields = None) -> bool:
         pass
 
     @abstractclassmethod
@@ -108,10 +125,12 @@ class Expression(BaseExpression):
             )
 
         self.operator = get_operator(operator, VALUE_TYPES[value_type], params)
-        self.filed_extractor = FIELD_EXTRACTORS[field]
+        self.field = field
 
-    def evaluate(self, flow: HTTPFlow) -> bool:
-        return self.operator(value=self.filed_extractor(flow))
+    def evaluate(self, flow: HTTPFlow, fields: FlowFields = None) -> bool:
+        if fields is None:
+            fields = FlowFields(flow)
+        return self.operator(value=fields[self.field])
 
     @classmethod
     def build(cls, config: dict) -> 'Expression':
@@ -135,8 +154,10 @@ class CompositeExpression(BaseExpression):
         self.rules = rules
         self.condition = CONDITIONS[condition]
 
-    def evaluate(self, flow: HTTPFlow) -> bool:
-        return self.condition(rule.evaluate(flow) for rule in self.rules)
+    def evaluate(self, flow: HTTPFlow, fields: FlowFields = None) -> bool:
+        if fields is None:
+            fields = FlowFields(flow)
+        return self.condition(rule.evaluate(flow, fields) for rule in self.rules)
 
     @classmethod
     def build(cls, config: dict) -> 'CompositeExpression':
@@ -156,3 +177,43 @@ class CompositeExpression(BaseExpression):
                 rules.append(cls.build(rule))
 
         return cls(rules, condition)
+
+
+ExpressionCacheKey = Tuple[str, str]
+
+
+class ExpressionCache:
+    """Built filter expressions keyed by filter ID and expression snapshot hash."""
+
+    def __init__(self, expression_cls: Type[BaseExpression] = CompositeExpression):
+        self._expression_cls = expression_cls
+        self._expressions: Dict[ExpressionCacheKey, BaseExpression] = {}
+
+    def __len__(self) -> int:
+        return len(self._expressions)
+
+    def __contains__(self, key: ExpressionCacheKey) -> bool:
+        return key in self._expressions
+
+    @staticmethod
+    def make_key(filter_id: str, snapshot: dict) -> ExpressionCacheKey:
+        snapshot_json = json.dumps(snapshot, sort_keys=True, separators=(',', ':'))
+        return filter_id, hashlib.sha1(snapshot_json.encode()).hexdigest()
+
+    def get(self, filter_id: str, snapshot: dict) -> BaseExpression:
+        key = self.make_key(filter_id, snapshot)
+        expr = self._expressions.get(key)
+        if expr is None:
+            expr = self._expression_cls.build(snapshot)
+            self._expressions[key] = expr
+        return expr
+
+    def retain(self, keys: Iterable[ExpressionCacheKey]):
+        """Drop all the cached expressions except the ones with given keys."""
+        expressions = self._expressions
+        self._expressions = {
+            key: expressions[key] for key in keys if key in expressions
+        }
+
+    def clear(self):
+        self._expressions = {}
@@ -0,0 +1,264 @@
+import heapq
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# A host pattern alternative which is either an exact host (suffix_kind is None)
+# or a domain suffix with a wildcard prefix.
+@dataclass(frozen=True)
+class _HostAlternative:
+    host: str
+    suffix_kind: Optional[str] = None
+
+
+# Wildcard prefixes of suffix-style patterns and the corresponding kinds:
+# '*' - any (possibly empty) prefix, '+' - any non-empty prefix,
+# '?' - optional subdomain (the suffix itself also matches).
+_SUFFIX_PREFIXES = [
+    ('(.*\\.)?', '?'),
+    ('(.+\\.)?', '?+'),
+    ('.*', '*'),
+    ('.+', '+'),
+    ('(.*)', '*'),
+    ('(.+)', '+'),
+]
+
+_LITERAL_RE = re.compile(r'(?:[\w-]|\\[^\w\s])+')
+_UNESCAPE_RE = re.compile(r'\\(.)')
+# Patterns which change their meaning when combined with other patterns.
+_UNCOMBINABLE_RE = re.compile(r'\\\d|\(\?P=|\(\?[aiLmsux]+\)')
+
+
+def _unescape_literal(pattern: str) -> Optional[str]:
+    if not _LITERAL_RE.fullmatch(pattern):
+        return None
+    return _UNESCAPE_RE.sub(r'\1', pattern)
+
+
+def _split_alternatives(pattern: str) -> List[str]:
+    alternatives = []
+    depth = 0
+    in_class = False
+    start = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 1
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            alternatives.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    alternatives.append(pattern[start:])
+    return alternatives
+
+
+def _strip_group(pattern: str) -> str:
+    for prefix in ['(?:', '(']:
+        if pattern.startswith(prefix) and pattern.endswith(')'):
+            inner = pattern[len(prefix) : -1]
+            if inner.startswith('?'):
+                return pattern
+            # Make sure the outer parentheses enclose a single group,
+            # e.g. not '(a)|(b)'.
+            if _is_balanced(inner):
+                return _strip_group(inner)
+    return pattern
+
+
+def _is_balanced(pattern: str) -> bool:
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 1
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                return False
+        i += 1
+    return depth == 0
+
+
+def parse_host_pattern(pattern: str) -> Optional[List[_HostAlternative]]:
+    """Split a host pattern into exact hosts and domain suffixes.
+
+    Return None if the pattern can not be represented this way.
+    """
+    result = []
+    for alternative in _split_alternatives(_strip_group(pattern)):
+        alternative = _strip_group(alternative)
+        sub_alternatives = _split_alternatives(alternative)
+        if len(sub_alternatives) > 1:
+            parsed = parse_host_pattern(alternative)
+            if parsed is None:
+                return None
+            result.extend(parsed)
+            continue
+
+        host = _unescape_literal(alternative)
+        if host is not None:
+            result.append(_HostAlternative(host))
+            continue
+
+        for prefix, kind in _SUFFIX_PREFIXES:
+            if not alternative.startswith(prefix):
+                continue
+            suffix = _unescape_literal(alternative[len(prefix) :])
+            if suffix is None:
+                continue
+            if kind.startswith('?'):
+                result.append(_HostAlternative(suffix))
+                result.append(_HostAlternative(f'.{suffix}', kind[1:] or '*'))
+                break
+            if suffix.startswith('.'):
+                result.append(_HostAlternative(suffix, kind))
+                break
+        else:
+            return None
+
+    return result
+
+
+@dataclass
+class _TrieNode:
+    children: Dict[str, '_TrieNode'] = field(default_factory=dict)
+    # (route position, whether a non-empty prefix is required)
+    routes: List[Tuple[int, bool]] = field(default_factory=list)
+
+
+class HostIndex:
+    """Index of host patterns which preserves the patterns order.
+
+    Exact hosts are looked up in a dict, domain suffixes (like
+    `.*\\.example\\.com`) in a trie of reversed host labels and the rest of
+    the patterns are combined into a single regex.
+    """
+
+    def __init__(self, patterns: Sequence[Optional[re.Pattern]]):
+        self._exact: Dict[str, List[int]] = {}
+        self._suffixes = _TrieNode()
+        self._regex_positions: List[int] = []
+
+        for position, pattern in enumerate(patterns):
+            if pattern is None:
+                # Missing patterns match nothing.
+                continue
+            alternatives = parse_host_pattern(pattern.pattern)
+            if alternatives is None or pattern.flags & ~re.UNICODE:
+                self._regex_positions.append(position)
+                continue
+            for alternative in alternatives:
+                if alternative.suffix_kind is None:
+                    positions = self._exact.setdefault(alternative.host, [])
+                    if position not in positions[-1:]:
+                        positions.append(position)
+                else:
+                    self._add_suffix(alternative, position)
+
+        self._patterns = patterns
+        self._regex, self._regex_groups = self._combine(
+            [patterns[position] for position in self._regex_positions]
+        )
+
+    def match(self, host: str) -> Iterator[int]:
+        """Lazily yield positions of the patterns matching the host (in order)."""
+        positions = self._exact.get(host, [])
+        suffix_positions = self._match_suffixes(host)
+        if suffix_positions:
+            positions = sorted({*positions, *suffix_positions})
+
+        if not self._regex_positions:
+            return iter(positions)
+
+        return self._unique(heapq.merge(positions, self._match_regexes(host)))
+
+    def _add_suffix(self, alternative: _HostAlternative, position: int):
+        # The leading dot is a part of the suffix, not a separate label.
+        node = self._suffixes
+        for label in reversed(alternative.host[1:].split('.')):
+            node = node.children.setdefault(label, _TrieNode())
+        node.routes.append((position, alternative.suffix_kind == '+'))
+
+    def _match_suffixes(self, host: str) -> List[int]:
+        if '\n' in host:
+            # '.' does not match new lines in the wildcard prefixes.
+            return []
+
+        labels = host.split('.')
+        node = self._suffixes
+        positions = []
+        for depth, label in enumerate(reversed(labels), 1):
+            node = node.children.get(label)
+            if node is None:
+                break
+            if depth == len(labels):
+                break
+            for position, non_empty_prefix in node.routes:
+                if non_empty_prefix and depth == len(labels) - 1 and not labels[0]:
+                    continue
+                positions.append(position)
+        return positions
+
+    def _match_regexes(self, host: str) -> Iterator[int]:
+        start = 0
+        if self._regex is not None:
+            match = self._regex.fullmatch(host)
+            if match is None:
+                return
+            idx = self._regex_groups[match.lastindex]
+            yield self._regex_positions[idx]
+            start = idx + 1
+
+        # The combined regex points to the first matching pattern only, so
+        # the rest of the patterns are checked one by one (lazily).
+        for position in self._regex_positions[start:]:
+            if self._patterns[position].fullmatch(host):
+                yield position
+
+    @staticmethod
+    def _combine(
+        patterns: List[re.Pattern],
+    ) -> Tuple[Optional[re.Pattern], Dict[int, int]]:
+        if not patterns or any(
+            _UNCOMBINABLE_RE.search(pattern.pattern) for pattern in patterns
+        ):
+            return None, {}
+
+        groups = {}
+        group = 1
+        for idx, pattern in enumerate(patterns):
+            groups[group] = idx
+            group += pattern.groups + 1
+
+        try:
+            regex = re.compile('|'.join(f'({pattern.pattern})' for pattern in patterns))
+        except re.error:
+            return None, {}
+
+        return regex, groups
+
+    @staticmethod
+    def _unique(positions: Iterator[int]) -> Iterator[int]:
+        last = None
+        for position in positions:
+            if position != last:
+                yield position
+            last = position
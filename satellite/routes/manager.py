@@ -1,6 +1,8 @@
 import logging
 import re
-from typing import List
+from typing import Callable, List
+
+from blinker import Signal
 
 from .expressions import CompositeExpression, ExpressionError
 from ..db import get_session, update_model
@@ -55,6 +57,7 @@ def create(route_data: dict, store: bool = True) -> Route:
         except Exception:
             session.rollback()
             raise
+        _notify_changed()
 
     return route
 
@@ -101,6 +104,7 @@ def update(route_id: str, route_data: dict) -> Route:
     except Exception:
         session.rollback()
         raise
+    _notify_changed()
 
     return route
 
@@ -112,19 +116,44 @@ def delete(route_id: str):
     session = get_session()
     session.delete(route)
     session.commit()
+    _notify_changed()
 
 
 def replace(routes_data: List[dict]) -> List[Route]:
     routes = [create(route_data, False) for route_data in routes_data]
 
     session = get_session()
-    with session.begin_nested():
-        session.query(Route).delete()
-        session.add_all(routes)
+    try:
+        with session.begin_nested():
+            session.query(Route).delete()
+            session.add_all(routes)
+        # Routes must be visible to other sessions (e.g. route tables of
+        # the proxies) before they are notified about the change.
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    _notify_changed()
 
     return routes
 
 
+def subscribe(callback: Callable):
+    """Subscribe to route changes made via the manager.
+
+    The callback is invoked with a single (sender) argument.
+    """
+    _sig_routes_changed.connect(callback, weak=False)
+
+
+def unsubscribe(callback: Callable):
+    _sig_routes_changed.disconnect(callback)
+
+
+def _notify_changed():
+    _sig_routes_changed.send()
+
+
 def check_filter(fltr: RuleEntry):
     if fltr.expression_snapshot:
         try:
@@ -151,3 +180,6 @@ def check_route(route: Route):
 
     for rule in route.rule_entries_list:
         check_filter(rule)
+
+
+_sig_routes_changed = Signal()
@@ -1,14 +1,15 @@
-import re
 from functools import partial
 from typing import List, Optional, Tuple
 
 from mitmproxy.http import HTTPFlow
 
 from satellite import audit_logs
+from satellite.audit_logs import AuditLogLevel
 from satellite.db.models.route import Route, RuleEntry
-from satellite.proxy import ProxyMode
-from . import Phase, manager as route_manager
-from .expressions import CompositeExpression
+from satellite.proxy import ProxyMode, REQUESTED_HOST_METADATA_KEY
+from . import Phase, table as route_table
+from .expressions import FlowFields, MatchField
+from .table import CompiledFilter
 
 
 def match_route(
@@ -18,57 +19,108 @@ def match_route(
 ) -> Tuple[Optional[Route], List[RuleEntry]]:
     request = flow.request
     is_outbound = proxy_mode == ProxyMode.FORWARD
-    routes = route_manager.get_all_by_type(is_outbound)
+    table = route_table.get_table()
+    # Field values are shared by all the filters evaluated in this phase.
+    fields = FlowFields(flow)
+    if is_outbound:
+        routes = table.match_outbound(request.host)
+    else:
+        # Only routes of the requested upstream (see ReverseUpstreamAddon).
+        routes = table.match_inbound(flow.metadata.get(REQUESTED_HOST_METADATA_KEY))
 
-    for route in routes:
-        if is_outbound and not match_host(request.host, route.host_endpoint):
-            continue
+    audit_level = audit_logs.get_level(flow.id)
+    match_filters = partial(
+        match_filter,
+        proxy_mode,
+        phase,
+        flow,
+        fields=fields,
+        audit_level=audit_level,
+    )
+    routes_evaluated = 0
+    filters_evaluated = 0
 
-        match_filters = partial(match_filter, proxy_mode, phase, flow)
-        filters = list(filter(match_filters, route.rule_entries_list))
+    for compiled_route in routes:
+        route = compiled_route.route
+        phase_filters = compiled_route.filters[phase]
+        # Filters which can not match the path are not evaluated at all.
+        candidates = compiled_route.path_indexes[phase].match(
+            fields[MatchField.PATH_INFO]
+        )
+        filters = [
+            compiled_filter.rule_entry
+            for position, compiled_filter in enumerate(phase_filters)
+            if match_filters(
+                compiled_filter,
+                is_candidate=candidates is None or position in candidates,
+            )
+        ]
         matched = bool(filters)
+        routes_evaluated += 1
+        filters_evaluated += len(phase_filters if candidates is None else candidates)
+        if _should_emit(audit_level, matched):
+            audit_logs.emit(
+                audit_logs.records.RouteEvaluationLogRecord(
+                    flow_id=flow.id,
+                    matched=matched,
+                    phase=phase,
+                    proxy_mode=proxy_mode,
+                    route_id=route.id,
+                )
+            )
+        if matched:
+            break
+    else:
+        route, filters = None, []
+
+    if audit_level == AuditLogLevel.SUMMARY:
         audit_logs.emit(
-            audit_logs.records.RouteEvaluationLogRecord(
+            audit_logs.records.RouteMatchingSummaryLogRecord(
                 flow_id=flow.id,
-                matched=matched,
+                matched=route is not None,
                 phase=phase,
                 proxy_mode=proxy_mode,
-                route_id=route.id,
+                route_id=route and route.id,
+                routes_evaluated=routes_evaluated,
+                filters_evaluated=filters_evaluated,
             )
         )
-        if matched:
-            return route, filters
-
-    return None, []
-
 
-def match_host(request_host: str, host_pattern: str) -> bool:
-    rx = re.compile(host_pattern)
-    return rx.fullmatch(request_host)
+    return route, filters
 
 
 def match_filter(
     proxy_mode: ProxyMode,
     phase: Phase,
     flow: HTTPFlow,
-    fltr: RuleEntry,
+    compiled_filter: CompiledFilter,
+    fields: FlowFields = None,
+    is_candidate: bool = True,
+    audit_level: AuditLogLevel = AuditLogLevel.FULL,
 ) -> bool:
+    fltr = compiled_filter.rule_entry
     if fltr.phase != phase:
         # TODO: Should we emit filter audit logs when phases do not match?
         return False
 
-    expr = CompositeExpression.build(fltr.expression_snapshot)
-    matched = expr.evaluate(flow)
+    matched = is_candidate and compiled_filter.expression.evaluate(flow, fields)
 
-    audit_logs.emit(
-        audit_logs.records.FilterEvaluationLogRecord(
-            flow_id=flow.id,
-            matched=matched,
-            phase=phase,
-            proxy_mode=proxy_mode,
-            route_id=fltr.route_id,
-            filter_id=fltr.id,
+    if _should_emit(audit_level, matched):
+        audit_logs.emit(
+            audit_logs.records.FilterEvaluationLogRecord(
+                flow_id=flow.id,
+                matched=matched,
+                phase=phase,
+                proxy_mode=proxy_mode,
+                route_id=fltr.route_id,
+                filter_id=fltr.id,
+            )
         )
-    )
 
     return matched
+
+
+def _should_emit(audit_level: AuditLogLevel, matched: bool) -> bool:
+    return audit_level == AuditLogLevel.FULL or (
+        audit_level == AuditLogLevel.MATCHED and matched
+    )
@@ -0,0 +1,121 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .expressions import MatchCondition, MatchField, ValueType
+from .operators import MatchOperatorType
+
+
+# Alternatives of a path constraint as (is prefix, value) pairs.
+# A path matching none of the alternatives can not match the expression.
+PathConstraint = List[Tuple[bool, str]]
+
+_PATH_OPERATORS = {
+    MatchOperatorType.EQUALS: False,
+    MatchOperatorType.BEGINS_WITH: True,
+}
+
+
+def get_path_constraint(config: dict) -> Optional[PathConstraint]:
+    """Get a necessary PathInfo condition of an expression config.
+
+    Return None if the expression is not constrained by PathInfo
+    `equals`/`begins_with` operators.
+    """
+    expr = config.get('expression')
+    if expr:
+        return _get_expression_constraint(expr)
+
+    try:
+        condition = MatchCondition(config['condition'])
+        rules = config['rules']
+    except (ValueError, KeyError):
+        return None
+    if not isinstance(rules, list):
+        return None
+
+    constraints = [get_path_constraint(rule) for rule in rules]
+    if condition == MatchCondition.AND:
+        # Any of the AND rules constraints is enough. The narrower is the better.
+        constraints = [c for c in constraints if c is not None]
+        return min(constraints, key=len) if constraints else None
+
+    if any(c is None for c in constraints):
+        return None
+    return [alternative for c in constraints for alternative in c]
+
+
+def _get_expression_constraint(config: dict) -> Optional[PathConstraint]:
+    try:
+        field = MatchField(config['field'])
+        operator = MatchOperatorType(config['operator'])
+        value_type = ValueType(config['type'])
+        [value] = config['values']
+    except (ValueError, KeyError):
+        return None
+
+    if (
+        field != MatchField.PATH_INFO
+        or value_type != ValueType.STRING
+        or operator not in _PATH_OPERATORS
+        or not isinstance(value, str)
+    ):
+        return None
+
+    return [(_PATH_OPERATORS[operator], value)]
+
+
+@dataclass
+class _TrieNode:
+    children: Dict[str, '_TrieNode'] = field(default_factory=dict)
+    positions: List[int] = field(default_factory=list)
+
+
+class PathIndex:
+    """Index of expressions by their PathInfo constraints.
+
+    Equal values are looked up in a dict and prefixes in a trie, expressions
+    without a path constraint are always candidates.
+    """
+
+    def __init__(self, constraints: Sequence[Optional[PathConstraint]]):
+        self._unconstrained: Set[int] = set()
+        self._equals: Dict[str, List[int]] = {}
+        self._prefixes = _TrieNode()
+
+        for position, constraint in enumerate(constraints):
+            if constraint is None:
+                self._unconstrained.add(position)
+                continue
+            for is_prefix, value in constraint:
+                if is_prefix:
+                    node = self._prefixes
+                    for char in value:
+                        node = node.children.setdefault(char, _TrieNode())
+                    node.positions.append(position)
+                else:
+                    self._equals.setdefault(value, []).append(position)
+
+        self._is_empty = len(self._unconstrained) == len(constraints)
+
+    def match(self, path: Optional[str]) -> Optional[Set[int]]:
+        """Get positions of the expressions which can match the path.
+
+        Return None if all the expressions are candidates.
+        """
+        if self._is_empty:
+            return None
+
+        candidates = set(self._unconstrained)
+        if path is None:
+            return candidates
+
+        candidates.update(self._equals.get(path, ()))
+        node = self._prefixes
+        candidates.update(node.positions)
+        for char in path:
+            node = node.children.get(char)
+            if node is None:
+                break
+            candidates.update(node.positions)
+
+        return candidates
@@ -0,0 +1,204 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import selectinload
+
+from . import Phase, manager as route_manager
+from .compiler import CompiledExpression
+from .expressions import (
+    BaseExpression,
+    CompositeExpression,
+    ExpressionCache,
+    ExpressionError,
+)
+from .hosts import HostIndex
+from .paths import PathIndex, get_path_constraint
+from ..db import create_session
+from ..db.models.route import Route, RuleEntry
+
+
+logger = logging.getLogger()
+
+
+@dataclass(frozen=True)
+class CompiledFilter:
+    rule_entry: RuleEntry
+    expression: BaseExpression
+
+
+@dataclass(frozen=True)
+class CompiledRoute:
+    route: Route
+    filters: Mapping[Phase, Tuple[CompiledFilter, ...]]
+    host_pattern: Optional[re.Pattern] = None
+    path_indexes: Mapping[Phase, PathIndex] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+
+    @classmethod
+    def build(cls, route: Route, expression_cache: ExpressionCache) -> 'CompiledRoute':
+        filters = {phase: [] for phase in Phase}
+        for fltr in route.rule_entries_list:
+            try:
+                expr = expression_cache.get(fltr.id, fltr.expression_snapshot)
+            except ExpressionError as exc:
+                # Should not happen since filters are validated on save.
+                logger.error(
+                    f'Skipping filter {fltr.id} with invalid expression: {exc}'
+                )
+                continue
+            filters[fltr.phase].append(CompiledFilter(rule_entry=fltr, expression=expr))
+
+        host_pattern = None
+        if route.host_endpoint:
+            try:
+                host_pattern = re.compile(route.host_endpoint)
+            except re.error as exc:
+                # Should not happen since host patterns are validated on save.
+                logger.error(f'Invalid host pattern of route {route.id}: {exc}')
+
+        return cls(
+            route=route,
+            filters=MappingProxyType(
+                {
+                    phase: tuple(phase_filters)
+                    for phase, phase_filters in filters.items()
+                }
+            ),
+            host_pattern=host_pattern,
+            path_indexes=MappingProxyType(
+                {
+                    phase: PathIndex(
+                        [
+                            get_path_constraint(cf.rule_entry.expression_snapshot)
+                            for cf in phase_filters
+                        ]
+                    )
+                    for phase, phase_filters in filters.items()
+                }
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class RouteTable:
+    inbound: Tuple[CompiledRoute, ...] = ()
+    outbound: Tuple[CompiledRoute, ...] = ()
+    inbound_hosts: HostIndex = field(init=False, repr=False, compare=False)
+    outbound_hosts: HostIndex = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        for name, routes in [
+            ('inbound_hosts', self.inbound),
+            ('outbound_hosts', self.outbound),
+        ]:
+            object.__setattr__(
+                self,
+                name,
+                HostIndex([compiled_route.host_pattern for compiled_route in routes]),
+            )
+
+    def get_routes(self, is_outbound: bool) -> Tuple[CompiledRoute, ...]:
+        return self.outbound if is_outbound else self.inbound
+
+    def match_outbound(self, host: str) -> Iterator[CompiledRoute]:
+        """Lazily yield outbound routes matching the host (in order)."""
+        for position in self.outbound_hosts.match(host):
+            yield self.outbound[position]
+
+    def match_inbound(self, host: Optional[str]) -> Sequence[CompiledRoute]:
+        """Get inbound routes serving the host (the one clients requested).
+
+        All the inbound routes are returned if none of them matches the host,
+        e.g. when Satellite fronts a single upstream and is requested via
+        localhost.
+        """
+        if host is None:
+            return self.inbound
+        routes = [self.inbound[position] for position in self.inbound_hosts.match(host)]
+        return routes or self.inbound
+
+    def get_upstream(self, host: Optional[str] = None) -> Optional[str]:
+        routes = self.match_inbound(host)
+        return routes[0].route.destination_override_endpoint if routes else None
+
+    @classmethod
+    def build(
+        cls,
+        routes: Iterable[Route],
+        expression_cache: ExpressionCache = None,
+    ) -> 'RouteTable':
+        if expression_cache is None:
+            expression_cache = ExpressionCache()
+
+        compiled_routes = [
+            CompiledRoute.build(route, expression_cache) for route in routes
+        ]
+
+        # Expressions of deleted or updated filters are not needed anymore.
+        expression_cache.retain(
+            expression_cache.make_key(
+                compiled_filter.rule_entry.id,
+                compiled_filter.rule_entry.expression_snapshot,
+            )
+            for compiled_route in compiled_routes
+            for phase_filters in compiled_route.filters.values()
+            for compiled_filter in phase_filters
+        )
+
+        return cls(
+            inbound=tuple(cr for cr in compiled_routes if not cr.route.is_outbound()),
+            outbound=tuple(cr for cr in compiled_routes if cr.route.is_outbound()),
+        )
+
+
+def configure(compile_expressions: bool = False):
+    global _expression_cache
+    _expression_cache = ExpressionCache(
+        CompiledExpression if compile_expressions else CompositeExpression
+    )
+    invalidate()
+
+
+def get_table() -> RouteTable:
+    table = _table
+    if table is None:
+        table = reload()
+    return table
+
+
+def reload() -> RouteTable:
+    global _table
+    table = RouteTable.build(_load_routes(), _expression_cache)
+    _table = table
+    return table
+
+
+def invalidate():
+    global _table
+    _table = None
+
+
+def _load_routes() -> List[Route]:
+    session = create_session()
+    try:
+        return (
+            session.query(Route)
+            .options(
+                selectinload(Route.rule_entries_list).joinedload(RuleEntry.rule_chain)
+            )
+            .all()
+        )
+    finally:
+        # Closing the session detaches fully loaded routes, so they can be
+        # used later without any DB access.
+        session.close()
+
+
+_table: Optional[RouteTable] = None
+_expression_cache = ExpressionCache()
+
+route_manager.subscribe(lambda _: invalidate())
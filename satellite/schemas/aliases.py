@@ -4,6 +4,10 @@ from marshmallow_enum import EnumField
 from ..aliases import AliasGeneratorType
 
 
+MAX_REDACT_VALUES = 10000
+MAX_REVEAL_ALIASES = 10000
+
+
 class RedactRequestSchema(Schema):
     class ValueToRedact(Schema):
         value = fields.Str(
@@ -37,7 +41,19 @@ class RedactRequestSchema(Schema):
     data = fields.List(
         fields.Nested(ValueToRedact),
         required=True,
-        validate=validate.Length(1, 20),
+        validate=validate.Length(1, MAX_REDACT_VALUES),
+    )
+
+
+class RevealRequestSchema(Schema):
+    aliases = fields.List(
+        fields.Str(),
+        required=True,
+        validate=validate.Length(1, MAX_REVEAL_ALIASES),
+        metadata={
+            'description': 'Aliases to reveal',
+            'example': ['tok_sat_medNmHNXKxwuHq8AvfAhmo'],
+        },
     )
 
 
@@ -62,6 +62,14 @@ class FilterEvaluationLogRecordSchema(AuditLogRecordBaseSchema):
     phase = EnumField(Phase, by_value=True, required=True)
 
 
+class RouteMatchingSummaryLogRecordSchema(AuditLogRecordBaseSchema):
+    route_id = fields.Str(required=True, allow_none=True)
+    matched = fields.Bool(required=True)
+    phase = EnumField(Phase, by_value=True, required=True)
+    routes_evaluated = fields.Int(required=True)
+    filters_evaluated = fields.Int(required=True)
+
+
 class VaultTrafficLogRecordSchema(AuditLogRecordBaseSchema):
     bytes = fields.Int(required=True)
     label = EnumField(records.TrafficLabel, by_value=True, required=True)
@@ -96,6 +104,7 @@ class AuditLogRecordSchema(OneOfSchema):
             OperationPipelineEvaluationLogRecordSchema
         ),
         'RouteEvaluationLogRecord': RouteEvaluationLogRecordSchema,
+        'RouteMatchingSummaryLogRecord': RouteMatchingSummaryLogRecordSchema,
         'UpstreamResponseLogRecord': UpstreamResponseLogRecordSchema,
         'VaultRecordUsageLogRecord': VaultRecordUsageLogRecordSchema,
         'VaultRequestAuditLogRecord': VaultRequestAuditLogRecordSchema,
@@ -0,0 +1,156 @@
+import threading
+import uuid
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from satellite.aliases import AliasGeneratorType
+from satellite.aliases.bloom import BloomFilter, PublicAliasFilter
+from satellite.aliases.store import AliasStore, get_filter_stats
+from satellite.db import get_engine, get_session
+from satellite.db.models.alias import Alias
+
+
+def make_alias() -> Alias:
+    return Alias(
+        value=str(uuid.uuid4()),
+        alias_generator=AliasGeneratorType.UUID,
+        public_alias=f'public_{uuid.uuid4()}',
+    )
+
+
+def insert(*aliases: Alias):
+    # Saved bypassing the store (as another process would do).
+    session = get_session()
+    session.add_all(aliases)
+    session.commit()
+
+
+@contextmanager
+def count_queries():
+    # Queries of the current thread only (not of the background sync)
+    thread = threading.current_thread()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if threading.current_thread() is thread:
+            statements.append(statement)
+
+    event.listen(get_engine(), 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(get_engine(), 'before_cursor_execute', before_cursor_execute)
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [str(i) for i in range(1000)]
+
+    assert all(bloom.add(item) for item in items[:10])
+    assert not bloom.add(items[0])
+    for item in items[10:]:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    assert 990 <= bloom.count <= 1000
+    assert 0.005 < bloom.false_positive_rate < 0.015
+    false_positives = sum(str(i) in bloom for i in range(1000, 11000))
+    assert false_positives < 200
+
+
+def test_filter():
+    alias = make_alias()
+    public_alias = alias.public_alias
+    insert(alias)
+    alias_filter = PublicAliasFilter()
+    alias_filter.rebuild()
+
+    with count_queries() as statements:
+        assert alias_filter.filter(['unknown', public_alias]) == [public_alias]
+        assert not alias_filter.might_contain('unknown')
+    assert statements == []
+
+    stats = alias_filter.stats
+    assert stats.count >= 1
+    assert stats.size > 0
+    assert 0 < stats.false_positive_rate < 0.01
+
+
+def test_filter_sync():
+    alias_filter = PublicAliasFilter()
+    alias_filter.rebuild()
+
+    # Saved by another process
+    alias = make_alias()
+    insert(alias)
+    assert alias_filter.might_contain(alias.public_alias)
+    alias_filter.sync()
+    assert alias.public_alias in alias_filter._bloom
+
+    # Saved by the current process
+    other_alias = make_alias()
+    alias_filter.add([other_alias.public_alias])
+    assert alias_filter.might_contain(other_alias.public_alias)
+
+    # The last synced row is replaced (its rowid is reused).
+    session = get_session()
+    session.delete(alias)
+    session.commit()
+    new_alias = make_alias()
+    insert(new_alias)
+    alias_filter.sync()
+    assert alias_filter.might_contain(new_alias.public_alias)
+    assert not alias_filter.might_contain(alias.public_alias)
+
+
+def test_filter_queries_after_write(monkeypatch):
+    alias_filter = PublicAliasFilter()
+    monkeypatch.setattr('satellite.aliases.store._public_alias_filter', alias_filter)
+    alias_filter.rebuild()
+    store = AliasStore()
+
+    # Saved by the current process
+    store.save(make_alias())
+    with count_queries() as statements:
+        assert store.get_by_alias('unknown') is None
+    assert statements == []
+
+    # Saved by another process: looked up directly while the filter is synced
+    # in the background.
+    insert(make_alias())
+    with count_queries() as statements:
+        assert store.get_by_alias('unknown') is None
+    assert len(statements) == 1
+    alias_filter._syncer.join()
+    with count_queries() as statements:
+        assert store.get_by_alias('unknown') is None
+    assert statements == []
+
+
+def test_filter_grow():
+    alias_filter = PublicAliasFilter(min_capacity=1)
+    alias_filter.rebuild()
+    capacity = alias_filter.stats.count * 2
+
+    aliases = [make_alias() for _ in range(capacity + 1)]
+    insert(*aliases)
+    alias_filter.sync()
+
+    assert alias_filter.filter(a.public_alias for a in aliases) == [
+        a.public_alias for a in aliases
+    ]
+    assert alias_filter.stats.false_positive_rate < 0.01
+
+
+def test_store_skips_unknown_aliases():
+    store = AliasStore()
+    alias = make_alias()
+    store.save(alias)
+    assert store.get_by_alias(alias.public_alias) == alias
+
+    with count_queries() as statements:
+        assert store.get_by_alias('unknown') is None
+        assert store.get_by_aliases(['unknown', 'other']) == {}
+    assert statements == []
+    assert get_filter_stats().count >= 1
@@ -0,0 +1,222 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from satellite.aliases import (
+    AliasGeneratorType,
+    AliasNotFound,
+    AliasStoreType,
+    RedactFailed,
+)
+from satellite.aliases import manager as alias_manager
+from satellite.aliases.broker import AliasBroker, _Request
+from satellite.aliases.broker_client import AliasBrokerError, GET_OR_CREATE_ALIASES
+from satellite.aliases.cache import AliasCache
+from satellite.aliases.store import AliasStore
+from satellite.config import SatelliteConfig
+from satellite.db import get_session
+from satellite.db.models.alias import Alias
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    monkeypatch.setattr(
+        'satellite.aliases.manager.get_config',
+        Mock(return_value=SatelliteConfig()),
+    )
+    broker = AliasBroker()
+    broker.start()
+    broker.wait_started(5)
+    yield broker
+    broker.stop()
+
+
+def test_get_or_create_aliases(broker):
+    client = broker.get_client()
+    key = (str(uuid.uuid4()), AliasGeneratorType.UUID)
+
+    aliases, created = client.get_or_create_aliases([key], AliasStoreType.PERSISTENT)
+
+    alias = aliases[key]
+    assert alias.value == key[0]
+    assert created == {alias.id}
+    assert AliasStore().get_by_alias(alias.public_alias).id == alias.id
+
+    aliases, created = client.get_or_create_aliases([key], AliasStoreType.PERSISTENT)
+    assert aliases[key].id == alias.id
+    assert created == set()
+
+    assert client.get_aliases(
+        [alias.public_alias, 'tok_sat_unknown'],
+        AliasStoreType.PERSISTENT,
+    ).keys() == {alias.public_alias}
+
+    volatile_key = (str(uuid.uuid4()), AliasGeneratorType.UUID)
+    volatile_aliases, _ = client.get_or_create_aliases(
+        [volatile_key], AliasStoreType.VOLATILE
+    )
+    volatile_alias = volatile_aliases[volatile_key]
+    assert (
+        client.get_aliases([volatile_alias.public_alias], AliasStoreType.PERSISTENT)
+        == {}
+    )
+
+
+def test_pipelined_requests(broker):
+    client = broker.get_client()
+    key = (str(uuid.uuid4()), AliasGeneratorType.UUID)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(
+            executor.map(
+                lambda _: client.get_or_create_aliases(
+                    [key],
+                    AliasStoreType.PERSISTENT,
+                ),
+                range(32),
+            )
+        )
+
+    assert len({aliases[key].id for aliases, _ in results}) == 1
+    assert sum(len(created) for _, created in results) == 1
+
+
+def test_cleanup_aliases(broker):
+    session = get_session()
+    expired_alias = Alias(
+        value=str(uuid.uuid4()),
+        alias_generator=AliasGeneratorType.UUID,
+        public_alias=str(uuid.uuid4()),
+        expires_at=datetime.utcnow() - timedelta(seconds=1),
+    )
+    session.add(expired_alias)
+    session.commit()
+    expired_id = expired_alias.id
+
+    assert broker.get_client().cleanup_aliases(None) >= 1
+
+    assert session.query(Alias).filter(Alias.id == expired_id).count() == 0
+
+
+def test_manager_uses_broker(monkeypatch, broker):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    alias_manager.use_broker(broker.get_client())
+    try:
+        value = str(uuid.uuid4())
+        alias = alias_manager.redact(
+            value,
+            generator_type=AliasGeneratorType.UUID,
+            store_type=AliasStoreType.PERSISTENT,
+        )
+        [same_alias] = alias_manager.redact_many(
+            [(value, AliasGeneratorType.UUID)],
+            store_type=AliasStoreType.PERSISTENT,
+        )
+        assert same_alias.id == alias.id
+        assert (
+            alias_manager.reveal(
+                alias.public_alias,
+                store_type=AliasStoreType.PERSISTENT,
+            ).value
+            == value
+        )
+        volatile_alias = alias_manager.redact(
+            value,
+            generator_type=AliasGeneratorType.UUID,
+            store_type=AliasStoreType.VOLATILE,
+        )
+        assert volatile_alias.id != alias.id
+        with pytest.raises(AliasNotFound):
+            alias_manager.reveal(
+                volatile_alias.public_alias,
+                store_type=AliasStoreType.PERSISTENT,
+            )
+    finally:
+        alias_manager.use_broker(None)
+
+
+def make_collisions(monkeypatch):
+    # RAW_UUID aliases have no fallback generator.
+    taken_alias = Alias(
+        value=str(uuid.uuid4()),
+        alias_generator=AliasGeneratorType.RAW_UUID,
+        public_alias=str(uuid.uuid4()),
+    )
+    AliasStore().save(taken_alias)
+    public_alias = taken_alias.public_alias
+    monkeypatch.setattr(
+        'satellite.aliases.generators.RawUUID.generate_many',
+        lambda _, values: [public_alias for _ in values],
+    )
+
+
+def test_redact_failed(monkeypatch):
+    make_collisions(monkeypatch)
+    monkeypatch.setattr(
+        'satellite.aliases.manager.get_config',
+        Mock(return_value=SatelliteConfig()),
+    )
+    broker = AliasBroker()
+    broker.start()
+    broker.wait_started(5)
+    try:
+        client = broker.get_client()
+        with pytest.raises(RedactFailed):
+            client.get_or_create_aliases(
+                [(str(uuid.uuid4()), AliasGeneratorType.RAW_UUID)],
+                AliasStoreType.PERSISTENT,
+            )
+
+        # The broker keeps serving requests.
+        key = (str(uuid.uuid4()), AliasGeneratorType.UUID)
+        aliases, _ = client.get_or_create_aliases([key], AliasStoreType.PERSISTENT)
+        assert aliases[key].value == key[0]
+    finally:
+        broker.stop()
+
+
+def test_redact_failed_in_batch(monkeypatch):
+    make_collisions(monkeypatch)
+    responses = {}
+    broker = AliasBroker()
+    monkeypatch.setattr(
+        broker,
+        '_respond',
+        lambda request, result: responses.update({request.request_id: result}),
+    )
+    key = (str(uuid.uuid4()), AliasGeneratorType.UUID)
+    failing_key = (str(uuid.uuid4()), AliasGeneratorType.RAW_UUID)
+
+    broker._process_batch(
+        [
+            _Request(
+                Mock(), 1, GET_OR_CREATE_ALIASES, (AliasStoreType.PERSISTENT, [key])
+            ),
+            _Request(
+                Mock(),
+                2,
+                GET_OR_CREATE_ALIASES,
+                (AliasStoreType.PERSISTENT, [failing_key]),
+            ),
+        ]
+    )
+
+    # Only the request of the failing value gets the error.
+    aliases, created = responses[1]
+    assert aliases[key]['value'] == key[0]
+    assert created == {aliases[key]['id']}
+    assert isinstance(responses[2], RedactFailed)
+
+
+def test_stop(broker):
+    client = broker.get_client()
+    client.get_aliases(['tok_sat_unknown'], AliasStoreType.PERSISTENT)
+
+    broker.stop()
+
+    assert not broker.is_alive()
+    with pytest.raises(AliasBrokerError):
+        client.get_aliases(['tok_sat_unknown'], AliasStoreType.PERSISTENT)
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+from satellite.aliases.cache import AliasCache, AliasCacheStats
+from satellite.aliases.generators import AliasGeneratorType
+from satellite.db.models.alias import Alias
+
+
+def _make_alias(value: str, expires_at: datetime = None) -> Alias:
+    return Alias(
+        id=f'id_{value}',
+        value=value,
+        alias_generator=AliasGeneratorType.UUID,
+        public_alias=f'tok_{value}',
+        expires_at=expires_at,
+    )
+
+
+def test_get():
+    cache = AliasCache(10)
+    alias = _make_alias('value')
+
+    cached_alias = cache.put(True, alias)
+
+    assert cached_alias is not alias
+    assert cached_alias.public_alias == alias.public_alias
+    assert cache.get_by_value(True, 'value', AliasGeneratorType.UUID) is cached_alias
+    assert cache.get_by_alias(True, 'tok_value') is cached_alias
+    assert cache.get_by_value(True, 'value', AliasGeneratorType.RAW_UUID) is None
+    assert cache.get_by_value(False, 'value', AliasGeneratorType.UUID) is None
+    assert cache.get_by_alias(False, 'tok_value') is None
+    assert cache.stats == AliasCacheStats(hits=2, misses=3, size=1)
+
+
+def test_expired():
+    cache = AliasCache(10)
+    cache.put(False, _make_alias('expired', datetime.utcnow() - timedelta(seconds=1)))
+    cache.put(False, _make_alias('valid', datetime.utcnow() + timedelta(seconds=60)))
+
+    assert cache.get_by_alias(False, 'tok_expired') is None
+    assert cache.get_by_alias(False, 'tok_valid') is not None
+
+
+def test_lru_eviction():
+    cache = AliasCache(2)
+    cache.put(True, _make_alias('a'))
+    cache.put(True, _make_alias('b'))
+    assert cache.get_by_alias(True, 'tok_a') is not None
+
+    cache.put(True, _make_alias('c'))
+
+    assert cache.stats.size == 2
+    assert cache.get_by_alias(True, 'tok_a') is not None
+    assert cache.get_by_alias(True, 'tok_b') is None
+    assert cache.get_by_alias(True, 'tok_c') is not None
+
+
+def test_disabled():
+    cache = AliasCache(0)
+    cache.put(True, _make_alias('a'))
+    assert cache.get_by_alias(True, 'tok_a') is None
+    assert cache.stats.size == 0
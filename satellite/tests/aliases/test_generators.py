@@ -1,9 +1,18 @@
+import random
 from unittest.mock import Mock
 
 import pytest
 
 from satellite.aliases import AliasGeneratorType
-from satellite.aliases.generators import check_luhn, get_alias_generator
+from satellite.aliases.generators import (
+    KeyedLuhnValidCardNumber6T4,
+    KeyedLuhnValidCardNumberT4,
+    LuhnValidCardNumber,
+    RANDOM_BUFFER_SIZE,
+    _RandomDigitBuffer,
+    check_luhn,
+    get_alias_generator,
+)
 
 
 def test_uuid(monkeypatch):
@@ -126,3 +135,92 @@ def test_num_length_preserving_invalid(monkeypatch, value: str):
     generator = get_alias_generator(AliasGeneratorType.NUM_LENGTH_PRESERVING)
     result = generator.generate(value)
     assert result == 'default-alias'
+
+
+@pytest.mark.parametrize(
+    'generator_type,value,fixed',
+    [
+        (AliasGeneratorType.FPE_SIX_T_FOUR_KEYED, '4444333322221111', [6, -4]),
+        (AliasGeneratorType.FPE_SIX_T_FOUR_KEYED, '36227206271667', [6, -4]),
+        (AliasGeneratorType.FPE_T_FOUR_KEYED, '4444333322221111', [0, -4]),
+        (AliasGeneratorType.FPE_T_FOUR_KEYED, '4000056655665556', [0, -4]),
+    ],
+)
+def test_fpe_keyed(generator_type: AliasGeneratorType, value: str, fixed: list):
+    generator = get_alias_generator(generator_type)
+    head, tail = fixed
+
+    result = generator.generate(value)
+
+    assert len(result) == len(value)
+    assert result[:head] == value[:head]
+    assert result[tail:] == value[tail:]
+    assert check_luhn(result)
+    assert generator.generate(value) == result
+
+
+def test_fpe_keyed_key():
+    value = '4444333322221111'
+    generator1 = KeyedLuhnValidCardNumber6T4(b'1' * 32)
+    generator2 = KeyedLuhnValidCardNumber6T4(b'2' * 32)
+
+    assert generator1.generate(value) != value
+    assert generator1.generate(value) != generator2.generate(value)
+
+
+def test_fpe_keyed_is_bijective():
+    generator = KeyedLuhnValidCardNumberT4(b'1' * 32)
+    values = [f'{n:010d}1111' for n in range(100000)]
+    values = [value for value in values if check_luhn(value)]
+
+    aliases = {generator.generate(value) for value in values}
+
+    assert len(aliases) == len(values)
+
+
+@pytest.mark.parametrize('value', ['abc', '4111', '4111111111111112'])
+def test_fpe_keyed_invalid(monkeypatch, value: str):
+    monkeypatch.setattr(
+        'satellite.aliases.generators.UUID.generate', Mock(return_value='default-alias')
+    )
+    generator = get_alias_generator(AliasGeneratorType.FPE_SIX_T_FOUR_KEYED)
+
+    assert generator.generate(value) == 'default-alias'
+
+
+@pytest.mark.parametrize('generator_type', list(AliasGeneratorType))
+def test_generate_many(generator_type: AliasGeneratorType):
+    generator = get_alias_generator(generator_type)
+    values = ['4444333322221111', 'abc', '4000056655665556']
+
+    aliases = generator.generate_many(values)
+
+    assert len(aliases) == len(values)
+    assert len(set(aliases)) == len(values)
+    assert all(type(alias) is str for alias in aliases)
+    if isinstance(generator, LuhnValidCardNumber):
+        assert check_luhn(aliases[0]) and check_luhn(aliases[2])
+
+
+def test_random_digit_buffer(monkeypatch):
+    buffer = _RandomDigitBuffer()
+    choices = Mock(side_effect=random.choices)
+    monkeypatch.setattr('satellite.aliases.generators.random.choices', choices)
+
+    digits = buffer.take(10) + buffer.take(RANDOM_BUFFER_SIZE - 10)
+
+    assert len(digits) == RANDOM_BUFFER_SIZE
+    assert all(0 <= d <= 9 for d in digits)
+    choices.assert_called_once()
+
+    assert len(buffer.take(RANDOM_BUFFER_SIZE + 1)) == RANDOM_BUFFER_SIZE + 1
+    assert choices.call_count == 2
+
+
+def test_random_digit_buffer_take_none():
+    buffer = _RandomDigitBuffer()
+    buffer.take(10)
+    left = RANDOM_BUFFER_SIZE - 10
+
+    assert buffer.take(0) == []
+    assert len(buffer.take(left)) == left
@@ -1,13 +1,30 @@
+import random
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
 from unittest.mock import Mock
 
 import pytest
 from freezegun import freeze_time
+from sqlalchemy import event
 
 from satellite import ctx
-from satellite.aliases import AliasStoreType
+from satellite.aliases import AliasStoreType, RedactFailed
 from satellite.aliases import manager as alias_manager
-from satellite.aliases.generators import AliasGeneratorType
+from satellite.aliases.cache import AliasCache, AliasCacheStats
+from satellite.aliases.generators import (
+    AliasGeneratorType,
+    check_luhn,
+    get_alias_generator,
+)
+from satellite.aliases.manager import AliasCollisionStats
+from satellite.aliases.memory_store import MemoryAliasStore
+from satellite.aliases.store import AliasStore
+from satellite.aliases.write_behind import AliasWriteBehind
 from satellite.audit_logs import records
+from satellite.config import SatelliteConfig
+from satellite.db import get_session
+from satellite.db.models.alias import Alias
 from satellite.proxy import ProxyMode
 from satellite.routes import Phase
 
@@ -189,3 +206,471 @@ def test_reveal(
             route_id='41265f94-3ea5-46ad-b5f5-26221a41db34',
         )
     )
+
+
+def test_redact_reveal_cached(monkeypatch):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(10))
+    get_by_value = Mock(side_effect=AliasStore().get_by_value)
+    monkeypatch.setattr(
+        'satellite.aliases.store.AliasStore.get_by_value',
+        lambda _, *args: get_by_value(*args),
+    )
+    get_by_alias = Mock(side_effect=AliasStore().get_by_alias)
+    monkeypatch.setattr(
+        'satellite.aliases.store.AliasStore.get_by_alias',
+        lambda _, *args: get_by_alias(*args),
+    )
+
+    value = str(uuid.uuid4())
+    alias = alias_manager.redact(
+        value,
+        generator_type=AliasGeneratorType.UUID,
+        store_type=AliasStoreType.PERSISTENT,
+    )
+    for _ in range(3):
+        assert (
+            alias_manager.redact(
+                value,
+                generator_type=AliasGeneratorType.UUID,
+                store_type=AliasStoreType.PERSISTENT,
+            ).public_alias
+            == alias.public_alias
+        )
+        assert (
+            alias_manager.reveal(
+                alias.public_alias,
+                store_type=AliasStoreType.PERSISTENT,
+            ).value
+            == value
+        )
+
+    get_by_value.assert_called_once()
+    get_by_alias.assert_not_called()
+    assert alias_manager.get_cache_stats() == AliasCacheStats(hits=6, misses=1, size=1)
+
+
+def test_redact_many(monkeypatch, proxy_context, flow_context, route_context):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(10))
+    emit_audit_log = Mock()
+    monkeypatch.setattr(
+        'satellite.aliases.manager.audit_logs.emit',
+        emit_audit_log,
+    )
+    existing_alias = alias_manager.redact(
+        str(uuid.uuid4()),
+        generator_type=AliasGeneratorType.UUID,
+        store_type=AliasStoreType.PERSISTENT,
+    )
+    alias_manager._cache.clear()
+    new_value = str(uuid.uuid4())
+    save_many = Mock(side_effect=AliasStore().save_many)
+    monkeypatch.setattr(
+        'satellite.aliases.store.AliasStore.save_many',
+        lambda _, *args: save_many(*args),
+    )
+
+    with ctx.use_context(proxy_context), ctx.use_context(flow_context), ctx.use_context(
+        route_context
+    ):
+        aliases = alias_manager.redact_many(
+            [
+                (new_value, AliasGeneratorType.UUID),
+                (existing_alias.value, AliasGeneratorType.UUID),
+                (new_value, AliasGeneratorType.UUID),
+                (new_value, AliasGeneratorType.RAW_UUID),
+            ],
+            store_type=AliasStoreType.PERSISTENT,
+        )
+
+    assert aliases[0] is aliases[2]
+    assert aliases[1].public_alias == existing_alias.public_alias
+    assert aliases[3].alias_generator == AliasGeneratorType.RAW_UUID
+    assert len({alias.public_alias for alias in aliases}) == 3
+    save_many.assert_called_once()
+    assert len(save_many.call_args[0][0]) == 2
+    assert [call[0][0].action_type for call in emit_audit_log.call_args_list] == [
+        records.ActionType.CREATED,
+        records.ActionType.DE_DUPE,
+        records.ActionType.DE_DUPE,
+        records.ActionType.CREATED,
+    ]
+    for alias in aliases:
+        assert (
+            alias_manager.reveal(
+                alias.public_alias,
+                store_type=AliasStoreType.PERSISTENT,
+            ).value
+            == alias.value
+        )
+
+
+@freeze_time('2020-11-04')
+def test_reveal_many(monkeypatch, proxy_context, flow_context, route_context):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(10))
+    emit_audit_log = Mock()
+    monkeypatch.setattr(
+        'satellite.aliases.manager.audit_logs.emit',
+        emit_audit_log,
+    )
+    cached_alias, stored_alias = alias_manager.redact_many(
+        [
+            (str(uuid.uuid4()), AliasGeneratorType.UUID),
+            (str(uuid.uuid4()), AliasGeneratorType.RAW_UUID),
+        ],
+        store_type=AliasStoreType.PERSISTENT,
+    )
+    alias_manager._cache.clear()
+    alias_manager._cache.put(True, cached_alias)
+    get_by_aliases = Mock(side_effect=AliasStore().get_by_aliases)
+    monkeypatch.setattr(
+        'satellite.aliases.store.AliasStore.get_by_aliases',
+        lambda _, *args: get_by_aliases(*args),
+    )
+
+    with ctx.use_context(proxy_context), ctx.use_context(flow_context), ctx.use_context(
+        route_context
+    ):
+        revealed, unknown = alias_manager.reveal_many(
+            [
+                stored_alias.public_alias,
+                'tok_sat_unknown',
+                cached_alias.public_alias,
+                stored_alias.public_alias,
+            ],
+            store_type=AliasStoreType.PERSISTENT,
+        )
+
+    assert list(revealed) == [stored_alias.public_alias, cached_alias.public_alias]
+    assert revealed[stored_alias.public_alias].value == stored_alias.value
+    assert revealed[cached_alias.public_alias].value == cached_alias.value
+    assert unknown == {'tok_sat_unknown'}
+    get_by_aliases.assert_called_once_with(
+        [stored_alias.public_alias, 'tok_sat_unknown']
+    )
+    assert [call[0][0] for call in emit_audit_log.call_args_list] == [
+        records.VaultRecordUsageLogRecord(
+            action_type=records.ActionType.RETRIEVED,
+            alias_generator=alias.alias_generator,
+            flow_id=flow_context.flow.id,
+            phase=Phase.REQUEST,
+            proxy_mode=ProxyMode.REVERSE,
+            record_id=alias.id,
+            record_type=AliasStoreType.PERSISTENT,
+            route_id=route_context.route.id,
+        )
+        for alias in [stored_alias, cached_alias]
+    ]
+
+
+def test_redact_reveal_write_behind(monkeypatch):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    monkeypatch.setattr(
+        'satellite.aliases.manager._write_behind',
+        AliasWriteBehind(interval=60, batch_size=100),
+    )
+    store = AliasStore()
+    value = str(uuid.uuid4())
+
+    alias = alias_manager.redact(
+        value,
+        generator_type=AliasGeneratorType.UUID,
+        store_type=AliasStoreType.PERSISTENT,
+    )
+
+    assert alias.created_at is not None
+    assert store.get_by_value(value) == []
+    assert (
+        alias_manager.redact(
+            value,
+            generator_type=AliasGeneratorType.UUID,
+            store_type=AliasStoreType.PERSISTENT,
+        ).id
+        == alias.id
+    )
+    [many_alias] = alias_manager.redact_many(
+        [(value, AliasGeneratorType.UUID)],
+        store_type=AliasStoreType.PERSISTENT,
+    )
+    assert many_alias.id == alias.id
+    assert (
+        alias_manager.reveal(
+            alias.public_alias,
+            store_type=AliasStoreType.PERSISTENT,
+        ).value
+        == value
+    )
+    revealed, _ = alias_manager.reveal_many(
+        [alias.public_alias],
+        store_type=AliasStoreType.PERSISTENT,
+    )
+    assert revealed[alias.public_alias].value == value
+
+    alias_manager.flush()
+
+    assert [stored.id for stored in store.get_by_value(value)] == [alias.id]
+
+
+def test_redact_write_behind_not_collision_free(monkeypatch):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    write_behind = AliasWriteBehind(interval=60, batch_size=100)
+    monkeypatch.setattr('satellite.aliases.manager._write_behind', write_behind)
+    values = [str(uuid.uuid4()), '1234567890']
+
+    uuid_alias, num_alias = alias_manager.redact_many(
+        [
+            (values[0], AliasGeneratorType.UUID),
+            (values[1], AliasGeneratorType.NUM_LENGTH_PRESERVING),
+        ],
+        store_type=AliasStoreType.PERSISTENT,
+    )
+
+    # Saved before the public alias is returned.
+    assert AliasStore().get_by_alias(num_alias.public_alias).id == num_alias.id
+    assert AliasStore().get_by_alias(uuid_alias.public_alias) is None
+    assert write_behind.pending_count == 1
+    write_behind.flush()
+    assert AliasStore().get_by_alias(uuid_alias.public_alias).id == uuid_alias.id
+
+
+def test_redact_collision(monkeypatch):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    monkeypatch.setattr(
+        'satellite.aliases.manager._collision_stats', defaultdict(lambda: [0, 0])
+    )
+    taken_alias = alias_manager.redact(
+        str(uuid.uuid4()),
+        generator_type=AliasGeneratorType.NUM_LENGTH_PRESERVING,
+        store_type=AliasStoreType.PERSISTENT,
+    )
+    generate_many = Mock(side_effect=[[taken_alias.public_alias], ['1234']])
+    monkeypatch.setattr(
+        'satellite.aliases.generators.NumLenPreserving.generate_many',
+        lambda _, values: generate_many(values),
+    )
+
+    alias = alias_manager.redact(
+        '4321',
+        generator_type=AliasGeneratorType.NUM_LENGTH_PRESERVING,
+        store_type=AliasStoreType.PERSISTENT,
+    )
+
+    assert alias.public_alias == '1234'
+    assert AliasStore().get_by_alias('1234').id == alias.id
+    stats = alias_manager.get_collision_stats()
+    assert stats == {
+        AliasGeneratorType.NUM_LENGTH_PRESERVING: AliasCollisionStats(
+            generated=3,
+            collisions=1,
+        )
+    }
+    assert stats[AliasGeneratorType.NUM_LENGTH_PRESERVING].collision_rate == 1 / 3
+
+
+def test_redact_collision_fallback(monkeypatch):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    taken_alias = alias_manager.redact(
+        str(uuid.uuid4()),
+        generator_type=AliasGeneratorType.NUM_LENGTH_PRESERVING,
+        store_type=AliasStoreType.PERSISTENT,
+    )
+    # E.g. all the aliases of a small alias space are taken.
+    monkeypatch.setattr(
+        'satellite.aliases.generators.NumLenPreserving.generate_many',
+        lambda _, values: [taken_alias.public_alias for _ in values],
+    )
+
+    alias = alias_manager.redact(
+        '4321',
+        generator_type=AliasGeneratorType.NUM_LENGTH_PRESERVING,
+        store_type=AliasStoreType.PERSISTENT,
+    )
+
+    assert alias.public_alias != taken_alias.public_alias
+    assert alias.alias_generator == AliasGeneratorType.NUM_LENGTH_PRESERVING
+    assert AliasStore().get_by_alias(alias.public_alias).value == '4321'
+
+
+def test_redact_collision_attempts_exceeded(monkeypatch):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    taken_alias = alias_manager.redact(
+        str(uuid.uuid4()),
+        generator_type=AliasGeneratorType.RAW_UUID,
+        store_type=AliasStoreType.PERSISTENT,
+    )
+    monkeypatch.setattr(
+        'satellite.aliases.generators.RawUUID.generate_many',
+        lambda _, values: [taken_alias.public_alias for _ in values],
+    )
+
+    with pytest.raises(RedactFailed):
+        alias_manager.redact_many(
+            [(str(uuid.uuid4()), AliasGeneratorType.RAW_UUID)],
+            store_type=AliasStoreType.PERSISTENT,
+        )
+
+
+@pytest.fixture
+def config(monkeypatch):
+    monkeypatch.setattr(
+        'satellite.aliases.manager.get_config',
+        Mock(return_value=SatelliteConfig()),
+    )
+
+
+def make_card_number() -> str:
+    prefix = '4' + ''.join(random.choices('0123456789', k=14))
+    return next(prefix + digit for digit in '0123456789' if check_luhn(prefix + digit))
+
+
+@pytest.mark.parametrize(
+    'store_types',
+    [
+        (AliasStoreType.PERSISTENT, AliasStoreType.VOLATILE),
+        (AliasStoreType.VOLATILE, AliasStoreType.PERSISTENT),
+    ],
+)
+def test_redact_keyed_other_store(monkeypatch, config, store_types):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    value = make_card_number()
+    first_store_type, second_store_type = store_types
+
+    alias = alias_manager.redact(
+        value, AliasGeneratorType.FPE_SIX_T_FOUR_KEYED, first_store_type
+    )
+    other_alias = alias_manager.redact(
+        value, AliasGeneratorType.FPE_SIX_T_FOUR_KEYED, second_store_type
+    )
+
+    # The public alias is taken by the alias of the same value.
+    assert other_alias.id == alias.id
+    for store_type in AliasStoreType:
+        assert alias_manager.reveal(alias.public_alias, store_type).value == value
+    # Made persistent if needed
+    assert AliasStore().get_by_alias(alias.public_alias).id == alias.id
+
+
+def test_redact_keyed_expired(monkeypatch, config):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    value = make_card_number()
+    with freeze_time(datetime.utcnow() - timedelta(days=1)):
+        expired_alias = alias_manager.redact(
+            value, AliasGeneratorType.FPE_T_FOUR_KEYED, AliasStoreType.VOLATILE
+        )
+        expired_id = expired_alias.id
+        public_alias = expired_alias.public_alias
+
+    alias = alias_manager.redact(
+        value, AliasGeneratorType.FPE_T_FOUR_KEYED, AliasStoreType.VOLATILE
+    )
+
+    assert alias.id != expired_id
+    assert alias.public_alias == public_alias
+    assert alias_manager.reveal(alias.public_alias, AliasStoreType.VOLATILE).id == (
+        alias.id
+    )
+    assert get_session().query(Alias).get(expired_id) is None
+
+
+def test_redact_keyed_concurrently(monkeypatch):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    value = make_card_number()
+    generator_type = AliasGeneratorType.FPE_T_FOUR_KEYED
+    # Saved by another process
+    concurrent_alias = Alias(
+        value=value,
+        alias_generator=generator_type,
+        public_alias=get_alias_generator(generator_type).generate(value),
+    )
+    session = get_session()
+    session.add(concurrent_alias)
+    session.commit()
+    concurrent_id = concurrent_alias.id
+
+    aliases, created = alias_manager.get_or_create_aliases(
+        [(value, generator_type)], AliasStoreType.PERSISTENT
+    )
+
+    assert aliases[(value, generator_type)].id == concurrent_id
+    assert created == set()
+
+
+def test_redact_keyed_in_memory(monkeypatch, config):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    monkeypatch.setattr('satellite.aliases.store._memory_store', MemoryAliasStore())
+    value = make_card_number()
+
+    persistent_alias = alias_manager.redact(
+        value, AliasGeneratorType.FPE_T_FOUR_KEYED, AliasStoreType.PERSISTENT
+    )
+    alias = alias_manager.redact(
+        value, AliasGeneratorType.FPE_T_FOUR_KEYED, AliasStoreType.VOLATILE
+    )
+
+    assert alias.public_alias == persistent_alias.public_alias
+    assert alias.id != persistent_alias.id
+    revealed = alias_manager.reveal(alias.public_alias, AliasStoreType.VOLATILE)
+    assert revealed.id == alias.id
+
+
+def test_redact_keyed_collision(monkeypatch, config):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    monkeypatch.setattr(
+        'satellite.aliases.manager._collision_stats', defaultdict(lambda: [0, 0])
+    )
+    generator_type = AliasGeneratorType.FPE_SIX_T_FOUR_KEYED
+    value = make_card_number()
+    public_alias = get_alias_generator(generator_type).generate(value)
+    # Taken by an alias of another value
+    AliasStore().save(
+        Alias(
+            value=str(uuid.uuid4()),
+            alias_generator=AliasGeneratorType.NUM_LENGTH_PRESERVING,
+            public_alias=public_alias,
+        )
+    )
+
+    alias = alias_manager.redact(value, generator_type, AliasStoreType.PERSISTENT)
+
+    # The fallback generator is used without regenerating the same alias.
+    assert alias.public_alias.startswith('tok_sat_')
+    assert alias_manager.get_collision_stats()[generator_type] == (
+        AliasCollisionStats(generated=2, collisions=1)
+    )
+
+    # The alias generated by the fallback generator is found by the value.
+    same_alias = alias_manager.redact(value, generator_type, AliasStoreType.PERSISTENT)
+    assert same_alias.id == alias.id
+
+
+def test_redact_keyed_without_lookup(monkeypatch, config):
+    monkeypatch.setattr('satellite.aliases.manager._cache', AliasCache(0))
+    generator_type = AliasGeneratorType.FPE_T_FOUR_KEYED
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if 'aliases' in statement:
+            statements.append(statement.split()[0])
+
+    engine = get_session().get_bind()
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        alias = alias_manager.redact(
+            make_card_number(), generator_type, AliasStoreType.PERSISTENT
+        )
+        [other_alias] = alias_manager.redact_many(
+            [(make_card_number(), generator_type)], AliasStoreType.PERSISTENT
+        )
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    # Existing aliases are not looked up by values before saving.
+    assert statements == ['INSERT', 'INSERT']
+    # Existing aliases are found on collisions.
+    same_alias = alias_manager.redact(
+        alias.value, generator_type, AliasStoreType.PERSISTENT
+    )
+    assert same_alias.id == alias.id
+    [same_alias] = alias_manager.redact_many(
+        [(other_alias.value, generator_type)], AliasStoreType.PERSISTENT
+    )
+    assert same_alias.id == other_alias.id
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import pytest
+from freezegun import freeze_time
+
+from satellite.aliases import AliasCollision, AliasGeneratorType
+from satellite.aliases.memory_store import MemoryAliasStore
+from satellite.db.models.alias import Alias
+
+
+def make_alias(
+    alias_id: str,
+    value: str = 'value',
+    alias_generator: AliasGeneratorType = AliasGeneratorType.UUID,
+    ttl: int = 60,
+) -> Alias:
+    return Alias(
+        id=alias_id,
+        value=value,
+        alias_generator=alias_generator,
+        public_alias=f'public_{alias_id}',
+        expires_at=datetime.utcnow() + timedelta(seconds=ttl),
+    )
+
+
+@freeze_time('2021-01-01')
+def test_get():
+    store = MemoryAliasStore()
+    alias1 = make_alias('1')
+    alias2 = make_alias('2', alias_generator=AliasGeneratorType.RAW_UUID)
+    alias3 = make_alias('3', value='other')
+    store.save_many([alias1, alias2, alias3])
+
+    assert store.get_by_value('value') == [alias1, alias2]
+    assert store.get_by_value('value', AliasGeneratorType.RAW_UUID) == [alias2]
+    assert store.get_by_value('unknown') == []
+    assert store.get_by_values(
+        [
+            ('value', AliasGeneratorType.UUID),
+            ('value', AliasGeneratorType.RAW_UUID),
+            ('other', AliasGeneratorType.UUID),
+            ('unknown', AliasGeneratorType.UUID),
+        ]
+    ) == {
+        ('value', AliasGeneratorType.UUID): alias1,
+        ('value', AliasGeneratorType.RAW_UUID): alias2,
+        ('other', AliasGeneratorType.UUID): alias3,
+    }
+    assert store.get_by_alias('public_1') is alias1
+    assert store.get_by_alias('unknown') is None
+    assert store.get_by_aliases(['public_1', 'public_3', 'unknown']) == {
+        'public_1': alias1,
+        'public_3': alias3,
+    }
+
+
+def test_expiration():
+    store = MemoryAliasStore()
+    with freeze_time('2021-01-01') as frozen_time:
+        store.save_many([make_alias('1', ttl=10), make_alias('2', ttl=20)])
+        assert len(store) == 2
+
+        frozen_time.tick(timedelta(seconds=10))
+        assert [alias.id for alias in store.get_by_value('value')] == ['1', '2']
+
+        frozen_time.tick(timedelta(seconds=1))
+        assert [alias.id for alias in store.get_by_value('value')] == ['2']
+        assert store.get_by_alias('public_1') is None
+        assert len(store) == 1
+
+        frozen_time.tick(timedelta(seconds=10))
+        assert store.cleanup() == 1
+        assert len(store) == 0
+
+
+def test_replace():
+    store = MemoryAliasStore()
+    with freeze_time('2021-01-01') as frozen_time:
+        store.save_many([make_alias('1', ttl=10)])
+        alias = make_alias('1', ttl=20)
+        store.save_many([alias])
+
+        frozen_time.tick(timedelta(seconds=15))
+        assert store.get_by_value('value') == [alias]
+        assert len(store) == 1
+
+
+def test_collision():
+    store = MemoryAliasStore()
+    alias = make_alias('1')
+    store.save_many([alias])
+    other_alias = make_alias('2')
+    other_alias.public_alias = alias.public_alias
+
+    with pytest.raises(AliasCollision) as exc_info:
+        store.save_many([make_alias('3'), other_alias])
+
+    assert exc_info.value.public_aliases == {alias.public_alias}
+    assert len(store) == 1
+    assert store.get_taken([alias.public_alias, 'public_3']) == {alias.public_alias}
+    # The same alias can be saved again.
+    store.save_many([alias])
@@ -0,0 +1,76 @@
+import uuid
+from unittest.mock import Mock
+
+from tornado.ioloop import IOLoop
+
+from satellite.aliases import AliasGeneratorType
+from satellite.aliases.memory_store import MemoryAliasStore
+from satellite.aliases.reaper import AliasReaper
+from satellite.aliases.store import AliasStore
+from satellite.db import get_session
+from satellite.db.models.alias import Alias
+
+
+def make_alias() -> Alias:
+    return Alias(
+        value=str(uuid.uuid4()),
+        alias_generator=AliasGeneratorType.UUID,
+        public_alias=str(uuid.uuid4()),
+    )
+
+
+def test_run():
+    session = get_session()
+    session.query(Alias).delete()
+    session.commit()
+    for _ in range(5):
+        AliasStore(-1).save(make_alias())
+    alias = make_alias()
+    AliasStore(60).save(alias)
+
+    reaper = AliasReaper(interval=0, batch_size=2)
+    run = IOLoop.current().run_sync(reaper.run)
+
+    assert run.deleted == 5
+    assert run.duration >= 0
+    assert reaper.last_run == run
+    assert session.query(Alias).count() == 1
+
+    assert IOLoop.current().run_sync(reaper.run).deleted == 0
+
+
+def test_run_error(monkeypatch):
+    monkeypatch.setattr(
+        'satellite.aliases.reaper.AliasStore.cleanup',
+        Mock(side_effect=Exception('DB is gone')),
+    )
+    reaper = AliasReaper(interval=0, batch_size=2)
+
+    assert IOLoop.current().run_sync(reaper.run).deleted == 0
+
+
+def test_run_with_broker(monkeypatch):
+    cleanup = Mock()
+    monkeypatch.setattr('satellite.aliases.reaper.AliasStore.cleanup', cleanup)
+    broker = Mock(cleanup_aliases=Mock(side_effect=[2, 1]))
+    monkeypatch.setattr('satellite.aliases.manager._broker', broker)
+    reaper = AliasReaper(interval=0, batch_size=2)
+
+    assert IOLoop.current().run_sync(reaper.run).deleted == 3
+    assert broker.cleanup_aliases.call_count == 2
+    broker.cleanup_aliases.assert_called_with(2)
+    # The broker is the only writer of the aliases table.
+    cleanup.assert_not_called()
+
+
+def test_run_in_memory(monkeypatch):
+    memory_store = MemoryAliasStore()
+    monkeypatch.setattr('satellite.aliases.store._memory_store', memory_store)
+    AliasStore(60).save(make_alias())
+    AliasStore(-1).save(make_alias())
+
+    reaper = AliasReaper(interval=0, batch_size=2)
+
+    # In-memory volatile aliases of the current process only
+    assert IOLoop.current().run_sync(reaper.run).deleted >= 1
+    assert len(memory_store) == 1
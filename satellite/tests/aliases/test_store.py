@@ -1,15 +1,20 @@
 import uuid
+from unittest.mock import Mock
 
+import pytest
+
+from satellite.aliases import AliasCollision
 from satellite.aliases.generators import AliasGeneratorType
+from satellite.aliases.memory_store import MemoryAliasStore
 from satellite.aliases.store import AliasStore
 from satellite.db import get_session
-from satellite.db.models.alias import Alias
+from satellite.db.models.alias import Alias, get_value_digest
 
 
 def make_alias(store: bool, **params) -> Alias:
     params.setdefault('value', str(uuid.uuid4()))
     params.setdefault('alias_generator', AliasGeneratorType.UUID)
-    params.setdefault('public_alias', f'public_{params["value"]}')
+    params.setdefault('public_alias', f'public_{uuid.uuid4()}')
     alias = Alias(**params)
     if store:
         session = get_session()
@@ -38,6 +43,35 @@ def test_get_by_value():
     assert store.get_by_value(value[::-1]) == []
 
 
+def test_value_digest():
+    alias = make_alias(True)
+    other_alias = make_alias(True, alias_generator=AliasGeneratorType.RAW_UUID)
+
+    assert len(alias.value_digest) == 32
+    assert alias.value_digest != alias.value
+    assert alias.value_digest == get_value_digest(
+        get_session().get_bind(),
+        alias.value,
+        AliasGeneratorType.UUID,
+    )
+    assert alias.value_digest != get_value_digest(
+        get_session().get_bind(),
+        alias.value,
+        AliasGeneratorType.RAW_UUID,
+    )
+    assert other_alias.value_digest != alias.value_digest
+
+
+def test_get_by_value_digest_collision(monkeypatch):
+    alias = make_alias(True)
+    monkeypatch.setattr(
+        'satellite.aliases.store.get_value_digest',
+        Mock(return_value=alias.value_digest),
+    )
+
+    assert AliasStore().get_by_value('other', AliasGeneratorType.UUID) == []
+
+
 def test_get_by_alias():
     alias = make_alias(True)
     store = AliasStore()
@@ -106,3 +140,109 @@ def test_cleanup():
     persistent_store.get_by_value(alias1.value) is not None
     volatile_store.get_by_value(alias2.value) is not None
     volatile_store.get_by_value(alias3_value) is None
+
+
+def test_get_by_values():
+    alias1 = make_alias(True, alias_generator=AliasGeneratorType.UUID)
+    alias2 = make_alias(
+        True,
+        value=alias1.value,
+        alias_generator=AliasGeneratorType.RAW_UUID,
+    )
+    alias3 = make_alias(True)
+    make_alias(True, value=alias3.value)
+    expired_alias = make_alias(False)
+    AliasStore(-1).save(expired_alias)
+
+    aliases = AliasStore().get_by_values(
+        [
+            (alias1.value, AliasGeneratorType.UUID),
+            (alias1.value, AliasGeneratorType.RAW_UUID),
+            (alias3.value, AliasGeneratorType.UUID),
+            (expired_alias.value, AliasGeneratorType.UUID),
+            ('unknown', AliasGeneratorType.UUID),
+        ]
+    )
+
+    assert aliases == {
+        (alias1.value, AliasGeneratorType.UUID): alias1,
+        (alias1.value, AliasGeneratorType.RAW_UUID): alias2,
+        (alias3.value, AliasGeneratorType.UUID): alias3,
+    }
+
+
+def test_save_many():
+    aliases = [make_alias(False) for _ in range(3)]
+    store = AliasStore(60)
+
+    store.save_many(aliases)
+
+    assert store.get_by_values(
+        (alias.value, alias.alias_generator) for alias in aliases
+    ) == {(alias.value, alias.alias_generator): alias for alias in aliases}
+    assert all(alias.expires_at is not None for alias in aliases)
+
+
+def test_get_by_aliases():
+    alias1 = make_alias(True)
+    alias2 = make_alias(True)
+    expired_alias = make_alias(False)
+    AliasStore(-1).save(expired_alias)
+
+    aliases = AliasStore().get_by_aliases(
+        [alias1.public_alias, alias2.public_alias, expired_alias.public_alias, 'x']
+    )
+
+    assert aliases == {alias1.public_alias: alias1, alias2.public_alias: alias2}
+
+
+def test_volatile_in_memory(monkeypatch):
+    monkeypatch.setattr('satellite.aliases.store._memory_store', MemoryAliasStore())
+    alias = make_alias(False)
+    volatile_store = AliasStore(60)
+
+    volatile_store.save(alias)
+
+    assert alias.expires_at is not None
+    assert volatile_store.get_by_value(alias.value) == [alias]
+    assert volatile_store.get_by_alias(alias.public_alias) is alias
+    assert get_session().query(Alias).filter(Alias.id == alias.id).first() is None
+    assert AliasStore().get_by_alias(alias.public_alias) is None
+
+
+def test_cleanup_with_limit():
+    session = get_session()
+    session.query(Alias).delete()
+    session.commit()
+    for _ in range(3):
+        AliasStore(-1).save(make_alias(False))
+
+    assert AliasStore.cleanup(limit=2) == 2
+    assert AliasStore.cleanup(limit=2) == 1
+    assert AliasStore.cleanup(limit=2) == 0
+
+
+def test_save_many_collision():
+    taken_alias = make_alias(True)
+    aliases = [
+        make_alias(False, public_alias=taken_alias.public_alias),
+        make_alias(False, public_alias='duplicate'),
+        make_alias(False, public_alias='duplicate'),
+        make_alias(False),
+    ]
+    store = AliasStore()
+
+    with pytest.raises(AliasCollision) as exc_info:
+        store.save_many(aliases)
+
+    assert exc_info.value.public_aliases == {taken_alias.public_alias, 'duplicate'}
+    assert store.get_by_aliases(alias.public_alias for alias in aliases) == {
+        taken_alias.public_alias: taken_alias
+    }
+    # Public aliases are unique across the stores.
+    assert AliasStore(60).get_taken(
+        [taken_alias.public_alias, aliases[-1].public_alias]
+    ) == {taken_alias.public_alias}
+
+    store.save_many(aliases[-1:])
+    assert store.get_by_alias(aliases[-1].public_alias) == aliases[-1]
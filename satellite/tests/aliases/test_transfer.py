@@ -0,0 +1,154 @@
+import io
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+from satellite.aliases import AliasGeneratorType
+from satellite.aliases.store import AliasStore
+from satellite.aliases.transfer import (
+    InvalidAliasRecord,
+    export_aliases,
+    import_aliases,
+)
+from satellite.db import get_session
+from satellite.db.models.alias import Alias
+
+
+def make_alias(**params) -> Alias:
+    params.setdefault('id', str(uuid.uuid4()))
+    params.setdefault('value', str(uuid.uuid4()))
+    params.setdefault('alias_generator', AliasGeneratorType.UUID)
+    params.setdefault('public_alias', f'public_{uuid.uuid4()}')
+    return Alias(**params)
+
+
+def dump(aliases) -> io.StringIO:
+    return io.StringIO(
+        ''.join(
+            json.dumps(
+                {
+                    'id': alias.id,
+                    'created_at': '2021-01-01T00:00:00',
+                    'value': alias.value,
+                    'alias_generator': alias.alias_generator.value,
+                    'public_alias': alias.public_alias,
+                    'expires_at': None,
+                }
+            )
+            + '\n'
+            for alias in aliases
+        )
+    )
+
+
+def delete(aliases):
+    session = get_session()
+    session.query(Alias).filter(Alias.id.in_([a.id for a in aliases])).delete(
+        synchronize_session=False
+    )
+    session.commit()
+
+
+def test_export_import():
+    aliases = [
+        make_alias(),
+        make_alias(
+            alias_generator=AliasGeneratorType.RAW_UUID,
+            expires_at=datetime(2100, 1, 1, 12, 30, 15, 123),
+        ),
+    ]
+    AliasStore().save_many(aliases)
+    expected = {
+        alias.id: (
+            alias.created_at,
+            alias.value,
+            alias.alias_generator,
+            alias.public_alias,
+            alias.expires_at,
+            alias.value_digest,
+        )
+        for alias in aliases
+    }
+
+    stream = io.StringIO()
+    progress = []
+    exported = export_aliases(stream, batch_size=1, progress=progress.append)
+    assert exported >= len(aliases)
+    assert progress == list(range(1, exported + 1))
+
+    delete(aliases)
+    stream.seek(0)
+    result = import_aliases(stream, batch_size=2)
+    assert result.read == exported
+    assert result.imported == len(aliases)
+    assert result.existing == exported - len(aliases)
+    assert result.conflicting == 0
+
+    get_session().expire_all()
+    for alias_id, fields in expected.items():
+        alias = get_session().query(Alias).get(alias_id)
+        assert (
+            alias.created_at,
+            alias.value,
+            alias.alias_generator,
+            alias.public_alias,
+            alias.expires_at,
+            alias.value_digest,
+        ) == fields
+
+
+def test_import_resume(monkeypatch):
+    aliases = [make_alias() for _ in range(5)]
+    AliasStore().save_many(aliases[:2])
+
+    progress = []
+    result = import_aliases(
+        dump(aliases),
+        batch_size=2,
+        progress=lambda p: progress.append(p.imported),
+    )
+
+    assert (result.read, result.imported, result.existing) == (5, 3, 2)
+    assert progress == [0, 2, 3]
+    assert AliasStore().get_by_aliases([a.public_alias for a in aliases]).keys() == {
+        a.public_alias for a in aliases
+    }
+
+    # Present aliases are looked up in chunks smaller than the batch.
+    monkeypatch.setattr('satellite.aliases.store.QUERY_CHUNK_SIZE', 2)
+    result = import_aliases(dump(aliases))
+    assert (result.read, result.imported, result.existing) == (5, 0, 5)
+
+
+def test_import_duplicates_and_conflicts():
+    alias = make_alias()
+    AliasStore().save_many([alias])
+    conflicting = make_alias(public_alias=alias.public_alias)
+    duplicated = make_alias()
+    duplicated_alias = make_alias(public_alias=duplicated.public_alias)
+
+    result = import_aliases(
+        dump([conflicting, duplicated, duplicated, duplicated_alias])
+    )
+
+    assert result.imported == 1
+    assert result.existing == 1
+    assert result.conflicting == 2
+    assert AliasStore().get_by_alias(alias.public_alias).id == alias.id
+    assert AliasStore().get_by_alias(duplicated.public_alias).id == duplicated.id
+
+
+def test_import_invalid_record():
+    alias = make_alias()
+    stream = dump([alias])
+    stream.seek(0, io.SEEK_END)
+    stream.write('\n{"id": "1", "value": "2"}\n')
+    stream.seek(0)
+
+    with pytest.raises(InvalidAliasRecord, match='line 3'):
+        import_aliases(stream, batch_size=1)
+
+    # Records preceding the invalid one are imported.
+    assert AliasStore().get_by_alias(alias.public_alias).id == alias.id
@@ -0,0 +1,147 @@
+import time
+import uuid
+
+import pytest
+
+from satellite.aliases import AliasCollision, AliasGeneratorType
+from satellite.aliases.store import AliasStore
+from satellite.aliases.write_behind import AliasWriteBehind
+from satellite.db.models.alias import Alias
+
+
+def make_alias() -> Alias:
+    value = str(uuid.uuid4())
+    return Alias(
+        id=str(uuid.uuid4()),
+        value=value,
+        alias_generator=AliasGeneratorType.UUID,
+        public_alias=f'public_{value}',
+    )
+
+
+def wait_flushed(write_behind: AliasWriteBehind, timeout: float = 5):
+    started_at = time.monotonic()
+    while write_behind.pending_count and time.monotonic() - started_at < timeout:
+        time.sleep(0.01)
+    assert write_behind.pending_count == 0
+
+
+def test_pending_aliases():
+    write_behind = AliasWriteBehind(interval=60, batch_size=100)
+    store = AliasStore()
+    alias = make_alias()
+
+    write_behind.add(store, [alias])
+
+    assert write_behind.get_by_value(True, alias.value, alias.alias_generator) is alias
+    assert write_behind.get_by_value(False, alias.value, alias.alias_generator) is None
+    assert write_behind.get_by_alias(True, alias.public_alias) is alias
+    assert store.get_by_alias(alias.public_alias) is None
+
+    assert write_behind.flush() == 1
+
+    assert write_behind.pending_count == 0
+    assert write_behind.get_by_alias(True, alias.public_alias) is None
+    assert store.get_by_alias(alias.public_alias) == alias
+    assert write_behind.flush() == 0
+
+
+def test_volatile_aliases_expiration():
+    write_behind = AliasWriteBehind(interval=60, batch_size=100)
+    alias = make_alias()
+
+    write_behind.add(AliasStore(60), [alias])
+
+    assert alias.expires_at is not None
+    assert write_behind.get_by_alias(False, alias.public_alias) is alias
+    assert write_behind.get_by_alias(True, alias.public_alias) is None
+
+    write_behind.flush()
+
+    assert AliasStore(60).get_by_alias(alias.public_alias) == alias
+    assert AliasStore().get_by_alias(alias.public_alias) is None
+
+
+def test_flush_by_batch_size():
+    write_behind = AliasWriteBehind(interval=60, batch_size=2)
+    store = AliasStore()
+    aliases = [make_alias(), make_alias()]
+
+    write_behind.add(store, aliases[:1])
+    time.sleep(0.05)
+    assert write_behind.pending_count == 1
+
+    write_behind.add(store, aliases[1:])
+    wait_flushed(write_behind)
+    assert len(store.get_by_aliases(alias.public_alias for alias in aliases)) == 2
+
+
+def test_flush_by_interval():
+    write_behind = AliasWriteBehind(interval=0.05, batch_size=100)
+    alias = make_alias()
+
+    write_behind.add(AliasStore(), [alias])
+
+    wait_flushed(write_behind)
+    # Saved by the flusher thread (with its own DB session)
+    assert AliasStore().get_by_alias(alias.public_alias).id == alias.id
+
+
+def test_stop():
+    write_behind = AliasWriteBehind(interval=60, batch_size=100)
+    alias = make_alias()
+    write_behind.add(AliasStore(), [alias])
+
+    write_behind.stop()
+
+    assert write_behind.pending_count == 0
+    assert AliasStore().get_by_alias(alias.public_alias) == alias
+
+
+def test_add_collision():
+    write_behind = AliasWriteBehind(interval=60, batch_size=100)
+    store = AliasStore()
+    stored_alias = make_alias()
+    store.save(stored_alias)
+    pending_alias = make_alias()
+    write_behind.add(AliasStore(60), [pending_alias])
+    aliases = [make_alias(), make_alias()]
+    aliases[0].public_alias = stored_alias.public_alias
+    aliases[1].public_alias = pending_alias.public_alias
+
+    with pytest.raises(AliasCollision) as exc_info:
+        write_behind.add(store, aliases + [make_alias()])
+
+    assert exc_info.value.public_aliases == {
+        stored_alias.public_alias,
+        pending_alias.public_alias,
+    }
+    assert write_behind.pending_count == 1
+
+
+def test_flush_collision():
+    write_behind = AliasWriteBehind(interval=60, batch_size=100)
+    store = AliasStore()
+    aliases = [make_alias(), make_alias()]
+    write_behind.add(store, aliases)
+    # Taken by another process after the aliases were added.
+    taken_alias = make_alias()
+    taken_alias.public_alias = aliases[0].public_alias
+    store.save(taken_alias)
+
+    assert write_behind.flush() == 1
+
+    assert write_behind.pending_count == 0
+    assert store.get_by_alias(aliases[0].public_alias).id == taken_alias.id
+    assert store.get_by_alias(aliases[1].public_alias) == aliases[1]
+
+
+def test_add_not_collision_free():
+    write_behind = AliasWriteBehind(interval=60, batch_size=100)
+    alias = make_alias()
+    alias.alias_generator = AliasGeneratorType.NUM_LENGTH_PRESERVING
+
+    with pytest.raises(ValueError):
+        write_behind.add(AliasStore(), [alias])
+
+    assert write_behind.pending_count == 0
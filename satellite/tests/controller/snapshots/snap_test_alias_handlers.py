@@ -66,6 +66,7 @@ snapshots['TestAliasesHandler::test_get_unknown_alias 1'] = {
     },
     'errors': [
         {
+            'detail': 'Unknown alias: tok_tas_kgq94RpcPrAMSHJWh7o7P6'
         }
     ]
 }
@@ -94,3 +95,23 @@ snapshots['TestAliasesHandler::test_post_ok 1'] = {
         }
     ]
 }
+
+snapshots['TestAliasesRevealHandler::test_post_ok 1'] = {
+    'data': {
+        'tok_sat_P7umYP6NSb9QtHDMgi96Tt': {
+            'aliases': [
+                {
+                    'alias': 'tok_sat_P7umYP6NSb9QtHDMgi96Tt',
+                    'format': 'UUID'
+                }
+            ],
+            'created_at': '2020-11-01T00:00:00',
+            'value': '123321'
+        }
+    },
+    'errors': [
+        {
+            'detail': 'Unknown alias: tok_tas_kgq94RpcPrAMSHJWh7o7P6'
+        }
+    ]
+}
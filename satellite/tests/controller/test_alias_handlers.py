@@ -3,7 +3,7 @@ from unittest.mock import Mock, patch
 
 from freezegun import freeze_time
 
-from satellite.aliases import AliasGeneratorType, AliasStoreType
+from satellite.aliases import AliasGeneratorType, AliasStoreType, RedactFailed
 from satellite.aliases.manager import redact
 from satellite.aliases.store import AliasStore
 from .base import BaseHandlerTestCase
@@ -45,6 +45,24 @@ class TestAliasesHandler(BaseHandlerTestCase):
         self.assertEqual(len(store.get_by_value('123321')), 1)
         self.assertEqual(len(store.get_by_value('abccba')), 1)
 
+    def test_post_redact_failed(self):
+        redact_patch = patch(
+            'satellite.controller.alias_handlers.redact_many',
+            Mock(side_effect=RedactFailed('Unable to generate unique aliases.')),
+        )
+        redact_patch.start()
+        self.addCleanup(redact_patch.stop)
+
+        response = self.fetch(
+            self.get_url('/aliases'),
+            method='POST',
+            body=json.dumps({'data': [{'value': 123, 'format': 'UUID'}]}),
+            headers={'Content-Type': 'application/json'},
+        )
+
+        self.assertEqual(response.code, 500, response.body)
+        self.assertEqual(json.loads(response.body)['error']['reason'], 'Internal error')
+
     def test_get_ok(self):
         uuid_patch = patch(
             'satellite.aliases.manager.uuid.uuid4',
@@ -98,6 +116,45 @@ class TestAliasesHandler(BaseHandlerTestCase):
         self.assertEqual(response.code, 400, response.body)
 
 
+@freeze_time('2020-11-01')
+class TestAliasesRevealHandler(BaseHandlerTestCase):
+    def test_post_ok(self):
+        uuid_patch = patch(
+            'satellite.aliases.manager.uuid.uuid4',
+            Mock(return_value='3c7b3ed3-a4e1-4be4-8d2e-d0a5c4fe4d41'),
+        )
+        uuid_patch.start()
+        self.addCleanup(uuid_patch.stop)
+
+        alias = redact(
+            '123321',
+            generator_type=AliasGeneratorType.UUID,
+            store_type=AliasStoreType.PERSISTENT,
+        )
+
+        response = self.fetch(
+            self.get_url('/aliases/reveal'),
+            method='POST',
+            body=json.dumps(
+                {'aliases': [alias.public_alias, 'tok_tas_kgq94RpcPrAMSHJWh7o7P6']}
+            ),
+            headers={'Content-Type': 'application/json'},
+        )
+
+        self.assertEqual(response.code, 200, response.body)
+        self.assertMatchSnapshot(json.loads(response.body))
+
+    def test_post_no_aliases(self):
+        response = self.fetch(
+            self.get_url('/aliases/reveal'),
+            method='POST',
+            body=json.dumps({'aliases': []}),
+            headers={'Content-Type': 'application/json'},
+        )
+
+        self.assertEqual(response.code, 400, response.body)
+
+
 @freeze_time('2020-11-01')
 class TestAliasHandler(BaseHandlerTestCase):
     def test_get_ok(self):
@@ -5,6 +5,7 @@ from unittest.mock import Mock
 from satellite.audit_logs.records import AuditLogRecord
 from satellite.proxy import ProxyMode, commands, events
 from satellite.proxy.manager import ProxyManager
+from satellite.routes import manager as route_manager
 
 
 @dataclass
@@ -260,3 +261,35 @@ def test_audit_logs(monkeypatch):
         assert manager.get_audit_logs('flow-id') == [record]
     finally:
         manager.stop()
+
+
+def test_reload_routes_on_changes(monkeypatch):
+    proxy_processes = [
+        Mock(mode=ProxyMode.FORWARD),
+        Mock(mode=ProxyMode.REVERSE),
+    ]
+    connections = [
+        (Mock(), Mock()),
+        (Mock(), Mock()),
+    ]
+    monkeypatch.setattr(
+        'satellite.proxy.manager.ProxyProcess',
+        Mock(side_effect=proxy_processes),
+    )
+    monkeypatch.setattr(
+        'satellite.proxy.manager.Pipe',
+        Mock(side_effect=connections),
+    )
+    manager = ProxyManager(9099, 9098, Mock())
+    manager.start()
+
+    try:
+        route_manager._notify_changed()
+        for cmd_channel, _ in connections:
+            cmd_channel.send.assert_called_once_with(commands.ReloadRoutesCommand())
+    finally:
+        manager.stop()
+
+    route_manager._notify_changed()
+    for cmd_channel, _ in connections:
+        cmd_channel.send.assert_called_with(commands.StopCommand())
@@ -0,0 +1,59 @@
+from unittest.mock import Mock
+
+from mitmproxy.options import Options
+from mitmproxy.proxy.config import ProxyConfig
+
+from satellite.proxy import ProxyMode
+from satellite.proxy.server import ProxyServer
+from satellite.routes.table import RouteTable
+from ..factories import RouteFactory
+
+
+def test_reverse_config_cached_per_upstream(monkeypatch, free_port):
+    server = ProxyServer(
+        ProxyConfig(
+            Options(mode='reverse:https://dummy-upstream', listen_port=free_port)
+        )
+    )
+    server.set_channel(Mock())
+    try:
+        monkeypatch.setattr(
+            'satellite.proxy.server.get_proxy_context',
+            Mock(return_value=Mock(mode=ProxyMode.REVERSE)),
+        )
+        connection_handler = Mock()
+        monkeypatch.setattr(
+            'satellite.proxy.server.ConnectionHandler',
+            connection_handler,
+        )
+        proxy_config = Mock(side_effect=ProxyConfig)
+        monkeypatch.setattr('satellite.proxy.server.ProxyConfig', proxy_config)
+        get_table = Mock(
+            return_value=RouteTable.build(
+                [RouteFactory.build(destination_override_endpoint='https://a.com')]
+            )
+        )
+        monkeypatch.setattr(
+            'satellite.proxy.server.route_table.get_table',
+            get_table,
+        )
+
+        server.handle_client_connection(Mock(), ('127.0.0.1', 1234))
+        server.handle_client_connection(Mock(), ('127.0.0.1', 1235))
+
+        proxy_config.assert_called_once()
+        [first_call, second_call] = connection_handler.call_args_list
+        config = first_call[0][2]
+        assert config.options.mode == 'reverse:https://a.com'
+        assert second_call[0][2] is config
+
+        get_table.return_value = RouteTable.build(
+            [RouteFactory.build(destination_override_endpoint='https://b.com')]
+        )
+        server.handle_client_connection(Mock(), ('127.0.0.1', 1236))
+
+        assert proxy_config.call_count == 2
+        config = connection_handler.call_args[0][2]
+        assert config.options.mode == 'reverse:https://b.com'
+    finally:
+        server.socket.close()
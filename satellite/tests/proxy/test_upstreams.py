@@ -0,0 +1,73 @@
+from unittest.mock import Mock
+
+from mitmproxy.test import tflow
+
+from satellite.proxy import REQUESTED_HOST_METADATA_KEY
+from satellite.proxy.upstreams import ReverseUpstreamAddon
+from satellite.routes.table import RouteTable
+from ..factories import RouteFactory
+
+
+def _mock_routes(monkeypatch):
+    monkeypatch.setattr(
+        'satellite.proxy.upstreams.route_table.get_table',
+        Mock(
+            return_value=RouteTable.build(
+                [
+                    RouteFactory.build(
+                        host_endpoint=r'tenant-a\.example\.com',
+                        destination_override_endpoint='https://a.com',
+                    ),
+                    RouteFactory.build(
+                        host_endpoint=r'tenant-b\.example\.com',
+                        destination_override_endpoint='http://b.com:8080',
+                    ),
+                ]
+            )
+        ),
+    )
+
+
+def test_select_upstream_by_host_header(monkeypatch):
+    _mock_routes(monkeypatch)
+    addon = ReverseUpstreamAddon()
+    flow = tflow.tflow()
+    flow.request.headers['Host'] = 'tenant-b.example.com:9098'
+
+    addon.requestheaders(flow)
+    assert flow.metadata[REQUESTED_HOST_METADATA_KEY] == 'tenant-b.example.com'
+
+    # The proxy replaces the Host header with the default upstream one.
+    flow.request.headers['Host'] = 'a.com'
+    addon.request(flow)
+
+    assert flow.request.scheme == 'http'
+    assert flow.request.host == 'b.com'
+    assert flow.request.port == 8080
+    assert flow.request.host_header == 'b.com:8080'
+
+
+def test_select_upstream_by_sni(monkeypatch):
+    _mock_routes(monkeypatch)
+    addon = ReverseUpstreamAddon()
+    flow = tflow.tflow()
+    flow.client_conn.sni = 'tenant-a.example.com'
+
+    addon.requestheaders(flow)
+    addon.request(flow)
+
+    assert flow.request.scheme == 'https'
+    assert flow.request.host == 'a.com'
+    assert flow.request.port == 443
+
+
+def test_default_upstream(monkeypatch):
+    _mock_routes(monkeypatch)
+    addon = ReverseUpstreamAddon()
+    flow = tflow.tflow()
+    flow.request.headers['Host'] = 'localhost:9098'
+
+    addon.requestheaders(flow)
+    addon.request(flow)
+
+    assert flow.request.host == 'a.com'
@@ -0,0 +1,215 @@
+import random
+
+import pytest
+
+from satellite.routes import Phase, table as route_table
+from satellite.routes.compiler import CompiledExpression, compile_expression
+from satellite.routes.expressions import (
+    CompositeExpression,
+    ExpressionError,
+    FIELD_EXTRACTORS,
+    FlowFields,
+    MatchField,
+)
+from satellite.routes.table import RouteTable
+from ..factories import RouteFactory, RuleEntryFactory, load_flow
+
+
+STRING_OPERATORS = [
+    'equals',
+    'does_not_equal',
+    'begins_with',
+    'does_not_begin_with',
+    'ends_with',
+    'does_not_end_with',
+    'matches',
+    'is_empty',
+    'is_not_empty',
+]
+
+NUMBER_OPERATORS = [
+    'equals',
+    'does_not_equal',
+    'less_than',
+    'less_than_or_equals',
+    'greater_than',
+    'greater_than_or_equal',
+]
+
+FIELD_VALUES = {
+    'ContentType': ['application/json', 'text/xml', 'application', ''],
+    'Method': ['GET', 'POST', 'PUT', ''],
+    'PathInfo': ['/post', '/post/1', '/put', '/', ''],
+}
+
+STATUSES = [200, 201, 400, 500]
+
+
+def _random_expression(rnd: random.Random) -> dict:
+    if rnd.random() < 0.2:
+        return {
+            'field': 'Status',
+            'operator': rnd.choice(NUMBER_OPERATORS),
+            'type': 'number',
+            'values': [rnd.choice(STATUSES)],
+        }
+
+    field = rnd.choice(list(FIELD_VALUES))
+    operator = rnd.choice(STRING_OPERATORS)
+    if operator in ['is_empty', 'is_not_empty']:
+        values = []
+    elif operator == 'matches':
+        values = [rnd.choice(['.*', '/p.*', 'app.*json', 'x'])]
+    else:
+        values = [rnd.choice(FIELD_VALUES[field])[: rnd.randint(0, 5)]]
+
+    return {
+        'field': field,
+        'operator': operator,
+        'type': 'string',
+        'values': values,
+    }
+
+
+def _random_config(rnd: random.Random, depth: int = 0) -> dict:
+    rules = []
+    for _ in range(rnd.randint(0, 4)):
+        if depth < 3 and rnd.random() < 0.3:
+            rules.append(_random_config(rnd, depth + 1))
+        else:
+            rules.append({'expression': _random_expression(rnd)})
+
+    return {'condition': rnd.choice(['AND', 'OR']), 'rules': rules}
+
+
+def _random_flow(rnd: random.Random):
+    flow = load_flow('http_raw')
+    flow.request.path = rnd.choice(FIELD_VALUES['PathInfo'])
+    flow.request.method = rnd.choice(FIELD_VALUES['Method'])
+    content_type = rnd.choice(FIELD_VALUES['ContentType'] + [None])
+    if content_type is None:
+        del flow.request.headers['Content-type']
+    else:
+        flow.request.headers['Content-type'] = f'{content_type}; charset=UTF-8'
+    if rnd.random() < 0.3:
+        # Request phase
+        flow.response = None
+    else:
+        flow.response.status_code = rnd.choice(STATUSES)
+    return flow
+
+
+def _evaluate(evaluate, flow):
+    try:
+        return evaluate(flow)
+    except Exception as exc:
+        return type(exc)
+
+
+def test_compiled_expression_matches_interpreter():
+    rnd = random.Random(42)
+    flows = [_random_flow(rnd) for _ in range(20)]
+
+    for _ in range(500):
+        config = _random_config(rnd)
+        interpreted = CompositeExpression.build(config)
+        compiled = compile_expression(config)
+        for flow in flows:
+            assert _evaluate(compiled, flow) is _evaluate(
+                interpreted.evaluate, flow
+            ), config
+
+
+def test_compiled_expression_without_response():
+    config = {
+        'condition': 'OR',
+        'rules': [
+            {
+                'expression': {
+                    'field': 'PathInfo',
+                    'operator': 'matches',
+                    'type': 'string',
+                    'values': ['.*'],
+                },
+            },
+            {
+                'expression': {
+                    'field': 'Status',
+                    'operator': 'equals',
+                    'type': 'number',
+                    'values': [200],
+                },
+            },
+        ],
+    }
+    flow = load_flow('http_raw')
+    flow.response = None
+
+    assert CompositeExpression.build(config).evaluate(flow)
+    assert CompiledExpression.build(config).evaluate(flow)
+
+
+def test_compiled_expression_extracts_field_once(monkeypatch):
+    config = {
+        'condition': 'OR',
+        'rules': [
+            {
+                'expression': {
+                    'field': 'PathInfo',
+                    'operator': 'equals',
+                    'type': 'string',
+                    'values': [path],
+                },
+            }
+            for path in ['/get', '/put', '/post']
+        ],
+    }
+    flow = load_flow('http_raw')
+
+    calls = []
+    extractors = dict(FIELD_EXTRACTORS)
+    extractors[MatchField.PATH_INFO] = lambda flow: (
+        calls.append(flow) or FIELD_EXTRACTORS[MatchField.PATH_INFO](flow)
+    )
+    monkeypatch.setattr('satellite.routes.expressions.FIELD_EXTRACTORS', extractors)
+
+    assert compile_expression(config)(flow)
+    assert calls == [flow]
+
+    # Already extracted fields are shared with other expressions.
+    fields = FlowFields(flow)
+    assert compile_expression(config)(flow, fields)
+    assert CompositeExpression.build(config).evaluate(flow, fields)
+    assert calls == [flow, flow]
+
+
+def test_compile_invalid_expression():
+    config = {
+        'condition': 'AND',
+        'rules': [
+            {
+                'expression': {
+                    'field': 'Status',
+                    'operator': 'begins_with',
+                    'type': 'number',
+                    'values': ['2'],
+                },
+            },
+        ],
+    }
+    with pytest.raises(ExpressionError):
+        compile_expression(config)
+
+
+def test_route_table_with_compiled_expressions():
+    route = RouteFactory.build(rule_entries_list=[RuleEntryFactory.build()])
+
+    route_table.configure(compile_expressions=True)
+    try:
+        table = RouteTable.build([route], route_table._expression_cache)
+    finally:
+        route_table.configure()
+
+    [compiled_filter] = table.get_routes(True)[0].filters[Phase.REQUEST]
+    assert isinstance(compiled_filter.expression, CompiledExpression)
+    assert compiled_filter.expression.evaluate(load_flow('http_raw'))
@@ -1,4 +1,9 @@
-from satellite.routes.expressions import CompositeExpression
+from satellite.routes.expressions import (
+    CompositeExpression,
+    ExpressionCache,
+    FlowFields,
+    MatchField,
+)
 from ..factories import load_flow
 
 
@@ -102,3 +107,45 @@ def test_check_response_status_does_not_match():
     expr = CompositeExpression.build(config)
     flow = load_flow('http_raw')
     assert not expr.evaluate(flow)
+
+
+def test_expression_cache():
+    config = {
+        'condition': 'AND',
+        'rules': [
+            {
+                'expression': {
+                    'field': 'Method',
+                    'operator': 'equals',
+                    'type': 'string',
+                    'values': ['POST'],
+                },
+            },
+        ],
+    }
+    cache = ExpressionCache()
+
+    expr = cache.get('filter-id', config)
+    assert cache.get('filter-id', {**config}) is expr
+    assert cache.get('another-filter-id', config) is not expr
+    assert cache.get('filter-id', {**config, 'condition': 'OR'}) is not expr
+    assert len(cache) == 3
+
+    cache.retain([cache.make_key('filter-id', config)])
+    assert len(cache) == 1
+    assert cache.make_key('filter-id', config) in cache
+    assert cache.get('filter-id', config) is expr
+
+
+def test_flow_fields_extracted_once(monkeypatch):
+    flow = load_flow('http_raw')
+    calls = []
+    monkeypatch.setattr(
+        'satellite.routes.expressions.FIELD_EXTRACTORS',
+        {MatchField.PATH_INFO: lambda flow: calls.append(flow) or flow.request.path},
+    )
+
+    fields = FlowFields(flow)
+    assert fields[MatchField.PATH_INFO] == '/post'
+    assert fields[MatchField.PATH_INFO] == '/post'
+    assert calls == [flow]
@@ -0,0 +1,113 @@
+import random
+import re
+
+import pytest
+
+from satellite.routes.hosts import HostIndex, parse_host_pattern
+from satellite.routes.table import RouteTable
+from ..factories import RouteFactory
+
+
+@pytest.mark.parametrize(
+    'pattern,expected',
+    [
+        ('httpbin\\.org', [('httpbin.org', None)]),
+        (
+            '((echo\\.apps\\.verygood\\.systems)|(httpbin\\.org))',
+            [('echo.apps.verygood.systems', None), ('httpbin.org', None)],
+        ),
+        ('.*\\.example\\.com', [('.example.com', '*')]),
+        ('(.+)\\.example\\.com', [('.example.com', '+')]),
+        (
+            '(.*\\.)?example\\.com',
+            [('example.com', None), ('.example.com', '*')],
+        ),
+        ('(?:a\\.com|.*\\.b\\.com)', [('a.com', None), ('.b.com', '*')]),
+        ('httpbin.org', None),
+        ('.*example\\.com', None),
+        ('[a-z]+\\.com', None),
+        ('(a)|b.', None),
+    ],
+)
+def test_parse_host_pattern(pattern, expected):
+    result = parse_host_pattern(pattern)
+    if expected is None:
+        assert result is None
+    else:
+        assert [(alt.host, alt.suffix_kind) for alt in result] == expected
+
+
+PATTERNS = [
+    'httpbin\\.org',
+    'example\\.com',
+    '.*\\.example\\.com',
+    '.+\\.example\\.com',
+    '(.*\\.)?example\\.com',
+    '(.+\\.)?api\\.example\\.com',
+    '((httpbin\\.org)|(example\\.org))',
+    'api\\..*',
+    '[a-z]+\\.example\\.com',
+    '(?P<sub>[a-z]+)\\.example\\.org',
+    '(a|b)\\.(c|d)\\.com',
+    '(?i)HTTPBIN\\.ORG',
+    '(x)\\1\\.com',
+    '.*',
+]
+
+HOSTS = [
+    'httpbin.org',
+    'HttpBin.org',
+    'example.com',
+    '.example.com',
+    'api.example.com',
+    'v1.api.example.com',
+    'x.y.example.com',
+    'example.org',
+    'api.example.org',
+    'a.c.com',
+    'xx.com',
+    'notexample.com',
+    'example.com.evil',
+    '',
+]
+
+
+def test_host_index_matches_patterns_in_order():
+    rnd = random.Random(42)
+    for _ in range(200):
+        patterns = [re.compile(p) for p in rnd.sample(PATTERNS, rnd.randint(0, 8))]
+        index = HostIndex(patterns)
+        for host in HOSTS:
+            expected = [
+                position
+                for position, pattern in enumerate(patterns)
+                if pattern.fullmatch(host)
+            ]
+            assert list(index.match(host)) == expected, (patterns, host)
+
+
+def test_host_index_is_lazy():
+    patterns = [re.compile('[a-z]+\\.org'), re.compile('(h|x)ttpbin\\.org')]
+    index = HostIndex(patterns)
+
+    matches = index.match('httpbin.org')
+    assert next(matches) == 0
+    # The second pattern is checked only when the next match is requested.
+    patterns[1] = re.compile('no-match')
+    assert list(matches) == []
+
+
+def test_route_table_match_outbound():
+    routes = [
+        RouteFactory.build(host_endpoint='.*\\.example\\.com'),
+        RouteFactory.build(host_endpoint='httpbin\\.org'),
+        RouteFactory.build(host_endpoint='[a-z]+\\.example\\.com'),
+    ]
+    table = RouteTable.build(routes)
+
+    assert [cr.route for cr in table.match_outbound('api.example.com')] == [
+        routes[0],
+        routes[2],
+    ]
+    assert [cr.route for cr in table.match_outbound('httpbin.org')] == [routes[1]]
+    assert list(table.match_outbound('example.com')) == []
@@ -2,20 +2,23 @@ from unittest.mock import Mock, call
 
 from freezegun import freeze_time
 
+from satellite.audit_logs import AuditLogLevel
 from satellite.audit_logs.records import (
     FilterEvaluationLogRecord,
     RouteEvaluationLogRecord,
+    RouteMatchingSummaryLogRecord,
 )
 from satellite.proxy import ProxyMode
 from satellite.routes import Phase
 from satellite.routes.matcher import match_route
+from satellite.routes.table import RouteTable
 from ..factories import RouteFactory, RuleEntryFactory, load_flow
 
 
 def test_match_route_no_match(monkeypatch):
     monkeypatch.setattr(
-        'satellite.routes.matcher.route_manager',
-        Mock(get_all_by_type=Mock(return_value=[])),
+        'satellite.routes.matcher.route_table.get_table',
+        Mock(return_value=RouteTable.build([])),
     )
     emit_audit_log = Mock()
     monkeypatch.setattr(
@@ -37,13 +40,13 @@ def test_match_route_no_match(monkeypatch):
 
 @freeze_time('2020-11-04')
 def test_match_route_inbound(monkeypatch):
-    route = RouteFactory()
+    route = RouteFactory(destination_override_endpoint='https://httpbin.org')
     filters = RuleEntryFactory.build_batch(2, route_id=route.id)
     filters[1].expression_snapshot['rules'][0]['expression']['values'] = ['/put']
     route.rule_entries_list = filters
     monkeypatch.setattr(
-        'satellite.routes.matcher.route_manager',
-        Mock(get_all_by_type=Mock(return_value=[route])),
+        'satellite.routes.matcher.route_table.get_table',
+        Mock(return_value=RouteTable.build([route])),
     )
 
     emit_audit_log = Mock()
@@ -105,8 +108,8 @@ def test_match_route_outbound(monkeypatch):
     route2 = RouteFactory(rule_entries_list=[RuleEntryFactory()])
     route2.host_endpoint = r'echo\.apps\.verygood\.systems'
     monkeypatch.setattr(
-        'satellite.routes.matcher.route_manager',
-        Mock(get_all_by_type=Mock(return_value=[route1, route2])),
+        'satellite.routes.matcher.route_table.get_table',
+        Mock(return_value=RouteTable.build([route1, route2])),
     )
     flow = load_flow('http_raw')
 
@@ -118,3 +121,122 @@ def test_match_route_outbound(monkeypatch):
 
     assert matched_route is route1
     assert matched_filters == [filters[0]]
+
+
+@freeze_time('2020-11-04')
+def test_match_route_skips_filters_by_path(monkeypatch):
+    route = RouteFactory(destination_override_endpoint='https://httpbin.org')
+    filters = RuleEntryFactory.build_batch(2, route_id=route.id)
+    filters[0].expression_snapshot['rules'][0]['expression']['values'] = ['/put']
+    route.rule_entries_list = filters
+    table = RouteTable.build([route])
+    [compiled_route] = table.get_routes(is_outbound=False)
+    skipped_filter, candidate_filter = compiled_route.filters[Phase.REQUEST]
+    monkeypatch.setattr(skipped_filter.expression, 'evaluate', Mock())
+    monkeypatch.setattr(
+        'satellite.routes.matcher.route_table.get_table',
+        Mock(return_value=table),
+    )
+    emit_audit_log = Mock()
+    monkeypatch.setattr('satellite.routes.matcher.audit_logs.emit', emit_audit_log)
+    flow = load_flow('http_raw')
+
+    matched_route, matched_filters = match_route(
+        proxy_mode=ProxyMode.REVERSE,
+        phase=Phase.REQUEST,
+        flow=flow,
+    )
+
+    assert matched_route is route
+    assert matched_filters == [filters[1]]
+    skipped_filter.expression.evaluate.assert_not_called()
+    emit_audit_log.assert_any_call(
+        FilterEvaluationLogRecord(
+            flow_id=flow.id,
+            matched=False,
+            phase=Phase.REQUEST,
+            proxy_mode=ProxyMode.REVERSE,
+            route_id=route.id,
+            filter_id=filters[0].id,
+        )
+    )
+
+
+def _match_with_audit_level(monkeypatch, audit_level: AuditLogLevel):
+    route1 = RouteFactory(destination_override_endpoint='https://httpbin.org')
+    route1.rule_entries_list = RuleEntryFactory.build_batch(1, route_id=route1.id)
+    route1.rule_entries_list[0].expression_snapshot['rules'][0]['expression'][
+        'values'
+    ] = ['/put']
+    route2 = RouteFactory(destination_override_endpoint='https://httpbin.org')
+    route2.rule_entries_list = RuleEntryFactory.build_batch(2, route_id=route2.id)
+    monkeypatch.setattr(
+        'satellite.routes.matcher.route_table.get_table',
+        Mock(return_value=RouteTable.build([route1, route2])),
+    )
+    monkeypatch.setattr(
+        'satellite.routes.matcher.audit_logs.get_level',
+        Mock(return_value=audit_level),
+    )
+    emit_audit_log = Mock()
+    monkeypatch.setattr('satellite.routes.matcher.audit_logs.emit', emit_audit_log)
+    flow = load_flow('http_raw')
+
+    matched_route, _ = match_route(
+        proxy_mode=ProxyMode.REVERSE,
+        phase=Phase.REQUEST,
+        flow=flow,
+    )
+    assert matched_route is route2
+
+    return flow, route2, emit_audit_log
+
+
+@freeze_time('2020-11-04')
+def test_match_route_audit_level_matched(monkeypatch):
+    flow, route, emit_audit_log = _match_with_audit_level(
+        monkeypatch, AuditLogLevel.MATCHED
+    )
+
+    assert emit_audit_log.call_args_list == [
+        call(
+            FilterEvaluationLogRecord(
+                flow_id=flow.id,
+                matched=True,
+                phase=Phase.REQUEST,
+                proxy_mode=ProxyMode.REVERSE,
+                route_id=route.id,
+                filter_id=fltr.id,
+            )
+        )
+        for fltr in route.rule_entries_list
+    ] + [
+        call(
+            RouteEvaluationLogRecord(
+                flow_id=flow.id,
+                matched=True,
+                phase=Phase.REQUEST,
+                proxy_mode=ProxyMode.REVERSE,
+                route_id=route.id,
+            )
+        )
+    ]
+
+
+@freeze_time('2020-11-04')
+def test_match_route_audit_level_summary(monkeypatch):
+    flow, route, emit_audit_log = _match_with_audit_level(
+        monkeypatch, AuditLogLevel.SUMMARY
+    )
+
+    emit_audit_log.assert_called_once_with(
+        RouteMatchingSummaryLogRecord(
+            flow_id=flow.id,
+            matched=True,
+            phase=Phase.REQUEST,
+            proxy_mode=ProxyMode.REVERSE,
+            route_id=route.id,
+            routes_evaluated=2,
+            filters_evaluated=2,
+        )
+    )
@@ -0,0 +1,119 @@
+import random
+
+import pytest
+
+from satellite.routes.expressions import CompositeExpression
+from satellite.routes.paths import PathIndex, get_path_constraint
+from ..factories import load_flow
+
+
+def _path_expression(operator: str, value: str, field: str = 'PathInfo') -> dict:
+    return {
+        'expression': {
+            'field': field,
+            'operator': operator,
+            'type': 'string',
+            'values': [value],
+        },
+    }
+
+
+@pytest.mark.parametrize(
+    'config,expected',
+    [
+        (
+            {'condition': 'AND', 'rules': [_path_expression('equals', '/post')]},
+            [(False, '/post')],
+        ),
+        (
+            {
+                'condition': 'AND',
+                'rules': [
+                    _path_expression('equals', 'GET', field='Method'),
+                    _path_expression('begins_with', '/api'),
+                ],
+            },
+            [(True, '/api')],
+        ),
+        (
+            {
+                'condition': 'OR',
+                'rules': [
+                    _path_expression('begins_with', '/api'),
+                    {'condition': 'AND', 'rules': [_path_expression('equals', '/')]},
+                ],
+            },
+            [(True, '/api'), (False, '/')],
+        ),
+        (
+            {
+                'condition': 'OR',
+                'rules': [
+                    _path_expression('begins_with', '/api'),
+                    _path_expression('equals', 'GET', field='Method'),
+                ],
+            },
+            None,
+        ),
+        (
+            {'condition': 'AND', 'rules': [_path_expression('ends_with', '/post')]},
+            None,
+        ),
+        ({'condition': 'AND', 'rules': []}, None),
+        ({'condition': 'OR', 'rules': []}, []),
+    ],
+)
+def test_get_path_constraint(config, expected):
+    assert get_path_constraint(config) == expected
+
+
+def test_path_index_match():
+    index = PathIndex(
+        [
+            [(False, '/post')],
+            [(True, '/po')],
+            None,
+            [(True, '/get'), (False, '/')],
+            [(True, '')],
+        ]
+    )
+
+    assert index.match('/post') == {0, 1, 2, 4}
+    assert index.match('/posts') == {1, 2, 4}
+    assert index.match('/get/1') == {2, 3, 4}
+    assert index.match('/') == {2, 3, 4}
+    assert index.match(None) == {2}
+    assert PathIndex([None, None]).match('/post') is None
+
+
+PATHS = ['/', '/post', '/post/1', '/posts', '/get', '/api/v1', '']
+
+OPERATORS = ['equals', 'begins_with', 'ends_with', 'does_not_equal']
+
+
+def _random_config(rnd: random.Random, depth: int = 0) -> dict:
+    rules = []
+    for _ in range(rnd.randint(0, 3)):
+        if depth < 2 and rnd.random() < 0.3:
+            rules.append(_random_config(rnd, depth + 1))
+        else:
+            field = rnd.choice(['PathInfo', 'PathInfo', 'Method'])
+            value = rnd.choice(PATHS)[: rnd.randint(0, 6)]
+            rules.append(_path_expression(rnd.choice(OPERATORS), value, field))
+    return {'condition': rnd.choice(['AND', 'OR']), 'rules': rules}
+
+
+def test_path_index_candidates_include_matches():
+    rnd = random.Random(42)
+    flow = load_flow('http_raw')
+
+    for _ in range(100):
+        configs = [_random_config(rnd) for _ in range(rnd.randint(1, 10))]
+        expressions = [CompositeExpression.build(config) for config in configs]
+        index = PathIndex([get_path_constraint(config) for config in configs])
+        for path in PATHS:
+            flow.request.path = path
+            candidates = index.match(path)
+            for position, expr in enumerate(expressions):
+                if expr.evaluate(flow):
+                    assert candidates is None or position in candidates
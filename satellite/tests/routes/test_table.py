@@ -0,0 +1,116 @@
+from satellite.db import get_session
+from satellite.db.models.route import Route
+from satellite.routes import Phase, manager as route_manager, table as route_table
+from satellite.routes.expressions import ExpressionCache
+from satellite.routes.table import RouteTable
+from ..factories import RouteFactory, RuleEntryFactory
+
+
+def test_build():
+    inbound_route = RouteFactory.build(
+        destination_override_endpoint='https://httpbin.org',
+        rule_entries_list=[
+            RuleEntryFactory.build(phase=Phase.REQUEST),
+            RuleEntryFactory.build(phase=Phase.RESPONSE),
+        ],
+    )
+    outbound_route = RouteFactory.build(
+        rule_entries_list=[RuleEntryFactory.build(phase=Phase.RESPONSE)],
+    )
+
+    table = RouteTable.build([inbound_route, outbound_route])
+
+    [compiled_inbound] = table.get_routes(is_outbound=False)
+    assert compiled_inbound.route is inbound_route
+    assert compiled_inbound.host_pattern.fullmatch('httpbin.org')
+    [request_filter] = compiled_inbound.filters[Phase.REQUEST]
+    assert request_filter.rule_entry is inbound_route.rule_entries_list[0]
+    [response_filter] = compiled_inbound.filters[Phase.RESPONSE]
+    assert response_filter.rule_entry is inbound_route.rule_entries_list[1]
+
+    [compiled_outbound] = table.get_routes(is_outbound=True)
+    assert compiled_outbound.route is outbound_route
+    assert compiled_outbound.host_pattern.fullmatch('httpbin.org')
+    assert compiled_outbound.filters[Phase.REQUEST] == ()
+
+
+def test_reload_detaches_routes():
+    session = get_session()
+    session.query(Route).delete()
+    route = RouteFactory(rule_entries_list=RuleEntryFactory.build_batch(2))
+    session.commit()
+    route_id = route.id
+
+    table = route_table.reload()
+    session.close()
+
+    [compiled_route] = table.get_routes(is_outbound=True)
+    assert compiled_route.route is not route
+    assert compiled_route.route.id == route_id
+    fltr = compiled_route.filters[Phase.REQUEST][0].rule_entry
+    assert fltr.rule_chain is compiled_route.route
+    assert fltr.expression_snapshot['condition'] == 'AND'
+
+
+def test_build_reuses_expressions():
+    route = RouteFactory.build(rule_entries_list=RuleEntryFactory.build_batch(2))
+    expression_cache = ExpressionCache()
+
+    table = RouteTable.build([route], expression_cache)
+    assert len(expression_cache) == 2
+    filter1, filter2 = table.get_routes(True)[0].filters[Phase.REQUEST]
+
+    route.rule_entries_list[1].expression_snapshot = {
+        'condition': 'OR',
+        'rules': [],
+    }
+    table = RouteTable.build([route], expression_cache)
+    assert len(expression_cache) == 2
+    new_filter1, new_filter2 = table.get_routes(True)[0].filters[Phase.REQUEST]
+    assert new_filter1.expression is filter1.expression
+    assert new_filter2.expression is not filter2.expression
+
+    table = RouteTable.build([], expression_cache)
+    assert len(expression_cache) == 0
+
+
+def test_get_table_is_cached():
+    route_table.reload()
+    table = route_table.get_table()
+    assert route_table.get_table() is table
+
+
+def test_invalidated_on_route_changes():
+    table = route_table.reload()
+
+    route = route_manager.create(RouteFactory.stub().__dict__)
+    new_table = route_table.get_table()
+    assert new_table is not table
+    assert route.id in [cr.route.id for cr in new_table.get_routes(True)]
+
+    route_manager.delete(route.id)
+    assert route.id not in [
+        cr.route.id for cr in route_table.get_table().get_routes(True)
+    ]
+
+
+def test_match_inbound():
+    routes = [
+        RouteFactory.build(
+            host_endpoint=r'(.*)\.verygoodproxy\.com',
+            destination_override_endpoint='https://a.com',
+        ),
+        RouteFactory.build(
+            host_endpoint=r'tenant\.example\.com',
+            destination_override_endpoint='https://b.com',
+        ),
+    ]
+    table = RouteTable.build(routes)
+
+    assert [cr.route for cr in table.match_inbound('tenant.example.com')] == [routes[1]]
+    assert table.get_upstream('tenant.example.com') == 'https://b.com'
+    assert table.get_upstream('x.verygoodproxy.com') == 'https://a.com'
+    # Any other hosts are served by all the routes.
+    assert [cr.route for cr in table.match_inbound('localhost')] == routes
+    assert table.get_upstream() == 'https://a.com'
+    assert RouteTable.build([]).get_upstream() is None
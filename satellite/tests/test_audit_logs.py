@@ -2,8 +2,10 @@ import dataclasses
 from unittest.mock import Mock
 
 import pytest
+from blinker import Signal
 
-from satellite.audit_logs import emit, subscribe
+from satellite import audit_logs
+from satellite.audit_logs import AuditLogLevel, emit, get_level, subscribe
 from satellite.audit_logs.records import AuditLogRecord
 from satellite.audit_logs.store import AuditLogStore, UnknownFlowIdError
 from satellite.proxy import ProxyMode
@@ -59,3 +61,36 @@ def test_store_get_error():
     with pytest.raises(UnknownFlowIdError) as exc_info:
         store.get('flow-id')
     assert str(exc_info.value) == 'Requested audit logs for unknown flow ID: flow-id'
+
+
+def test_get_level_sampling():
+    flow_ids = [f'flow-{idx}' for idx in range(1000)]
+
+    audit_logs.configure(AuditLogLevel.MATCHED, sample_rate=0.1)
+    try:
+        levels = [get_level(flow_id) for flow_id in flow_ids]
+        assert [get_level(flow_id) for flow_id in flow_ids] == levels
+        assert set(levels) == {AuditLogLevel.MATCHED, AuditLogLevel.OFF}
+        assert 50 < levels.count(AuditLogLevel.MATCHED) < 150
+
+        audit_logs.configure(AuditLogLevel.MATCHED, sample_rate=0)
+        assert {get_level(flow_id) for flow_id in flow_ids} == {AuditLogLevel.OFF}
+    finally:
+        audit_logs.configure()
+
+    assert {get_level(flow_id) for flow_id in flow_ids} == {AuditLogLevel.FULL}
+
+
+def test_emit_off(monkeypatch):
+    # The callback is connected to a signal which is restored on teardown.
+    monkeypatch.setattr('satellite.audit_logs._sig_audit_log', Signal())
+    records = []
+    subscribe(lambda record: records.append(record))
+
+    audit_logs.configure(AuditLogLevel.OFF)
+    try:
+        emit(AuditLogTestRecord(flow_id='flow-id', proxy_mode=ProxyMode.REVERSE))
+    finally:
+        audit_logs.configure()
+
+    assert records == []
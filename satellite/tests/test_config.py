@@ -10,6 +10,15 @@ from satellite.config import InvalidConfigError, configure
 
 DEFAULT_CONFIG_VALUES = MappingProxyType(
     {
+        'alias_broker': False,
+        'alias_cache_size': 10000,
+        'alias_reaper_batch_size': 1000,
+        'alias_reaper_interval': 300,
+        'alias_write_behind_batch_size': 1000,
+        'alias_write_behind_interval': 0,
+        'audit_logs_level': 'full',
+        'audit_logs_sample_rate': 1.0,
+        'compile_route_expressions': False,
         'db_path': str(Path.home() / '.vgs-satellite' / 'db.sqlite'),
         'debug': False,
         'forward_proxy_port': 9099,
@@ -17,6 +26,7 @@ DEFAULT_CONFIG_VALUES = MappingProxyType(
         'reverse_proxy_port': 9098,
         'routes_path': None,
         'silent': False,
+        'volatile_aliases_in_memory': False,
         'volatile_aliases_ttl': 3600,
         'web_server_port': 8089,
     }
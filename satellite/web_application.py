@@ -8,6 +8,8 @@ from tornado import autoreload
 from tornado.ioloop import IOLoop
 from tornado.web import Application, StaticFileHandler
 
+from .aliases import manager as alias_manager
+from .aliases.reaper import AliasReaper
 from .config import SatelliteConfig
 from .controller import (
     BaseHandler,
@@ -58,6 +60,7 @@ class WebApplication(Application):
 
         api_handlers = [
             (r'/aliases', alias_handlers.AliasesHandler),
+            (r'/aliases/reveal', alias_handlers.AliasesRevealHandler),
             (r'/aliases/(?P<public_alias>.+)', alias_handlers.AliasHandler),
             (r'/flows', flow_handlers.Flows),
             (r'/flows/(?P<flow_id>[^/]+)', flow_handlers.FlowHandler),
@@ -93,6 +96,11 @@ class WebApplication(Application):
 
         self._should_exit = False
 
+        self.alias_reaper = AliasReaper(
+            interval=self.config.alias_reaper_interval,
+            batch_size=self.config.alias_reaper_batch_size,
+        )
+
         self.proxy_manager = ProxyManager(
             forward_proxy_port=self.config.forward_proxy_port,
             reverse_proxy_port=self.config.reverse_proxy_port,
@@ -120,11 +128,14 @@ class WebApplication(Application):
 
         self.listen(self.config.web_server_port)
         logger.info(f'Web server listening at {self.config.web_server_port} port.')
+        self.alias_reaper.start()
         IOLoop.current().start()
 
     def stop(self):
         if self._should_exit:
             return
         self._should_exit = True
+        self.alias_reaper.stop()
         self.proxy_manager.stop()
+        alias_manager.flush()
         IOLoop.current().stop()